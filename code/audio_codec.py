@@ -0,0 +1,57 @@
+import os
+import shutil
+import subprocess
+from typing import Optional, Tuple
+
+import numpy as np
+
+from mp3_frames import iter_frames
+
+# Override with the FFMPEG environment variable if ffmpeg isn't on PATH
+FFMPEG = os.environ.get('FFMPEG', 'ffmpeg')
+
+# Google TTS MP3 output: MPEG-2 Layer III, 24 kHz mono, 64 kbps
+DEFAULT_SAMPLE_RATE = 24000
+DEFAULT_BITRATE = '64k'
+
+class AudioCodecError(Exception):
+    """Raised when ffmpeg is missing or fails to decode/encode audio"""
+    pass
+
+def require_ffmpeg() -> None:
+    """Raise AudioCodecError up front if the ffmpeg binary can't be found"""
+    if shutil.which(FFMPEG) is None:
+        raise AudioCodecError(f"ffmpeg not found (looked for '{FFMPEG}'); install it "
+                              f"(e.g. apt install ffmpeg or brew install ffmpeg) or set FFMPEG")
+
+def _run_ffmpeg(args: list, data: bytes) -> bytes:
+    try:
+        result = subprocess.run(
+            [FFMPEG, '-hide_banner', '-loglevel', 'error', *args],
+            input=data, capture_output=True, check=False
+        )
+    except FileNotFoundError:
+        raise AudioCodecError(f"ffmpeg not found (looked for '{FFMPEG}'); install it or set FFMPEG")
+    if result.returncode != 0:
+        raise AudioCodecError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+def mp3_sample_rate(data: bytes) -> int:
+    """Sample rate from the first MP3 frame header"""
+    for frame in iter_frames(data):
+        return frame.sample_rate
+    raise AudioCodecError("No MP3 frames found")
+
+def decode_mp3(data: bytes, sample_rate: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """Decode MP3 bytes to mono float32 samples in [-1, 1] at the file's own sample rate"""
+    sample_rate = sample_rate or mp3_sample_rate(data)
+    pcm = _run_ffmpeg(['-f', 'mp3', '-i', 'pipe:0', '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'],
+                      data)
+    return np.frombuffer(pcm, dtype='<f4').astype(np.float32), sample_rate
+
+def encode_mp3(samples: np.ndarray, sample_rate: int = DEFAULT_SAMPLE_RATE, bitrate: str = DEFAULT_BITRATE) -> bytes:
+    """Encode mono float samples as bare MP3 frames, like the ones the TTS API returns"""
+    pcm = np.clip(samples, -1.0, 1.0).astype('<f4').tobytes()
+    return _run_ffmpeg(['-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+                        '-codec:a', 'libmp3lame', '-b:a', bitrate, '-write_xing', '0', '-id3v2_version', '0',
+                        '-f', 'mp3', 'pipe:1'], pcm)
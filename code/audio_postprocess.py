@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from audio_codec import AudioCodecError, decode_mp3, encode_mp3, require_ffmpeg
+from file_utils import write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+class PostprocessSettings(NamedTuple):
+    """Loudness and trimming parameters; changing any of them reprocesses every file"""
+    target_db: float = -20.0
+    peak_db: float = -1.0
+    silence_db: float = -45.0
+    padding_ms: float = 60.0
+
+    def key(self) -> str:
+        return ','.join(f"{name}={value}" for name, value in zip(self._fields, self))
+
+def gated_loudness(samples: np.ndarray, sample_rate: int, block_ms: float = 400.0) -> float:
+    """
+    Loudness in dBFS using the BS.1770 gating scheme (400ms blocks with 75%
+    overlap, -70 dB absolute gate, -10 dB relative gate), without K-weighting.
+    Returns -inf for silence.
+    """
+    block = int(sample_rate * block_ms / 1000)
+    if len(samples) < block:
+        samples = np.pad(samples, (0, block - len(samples)))
+    blocks = np.lib.stride_tricks.sliding_window_view(samples, block)[::block // 4]
+    power = np.mean(blocks.astype(np.float64) ** 2, axis=1)
+
+    with np.errstate(divide='ignore'):
+        levels = 10 * np.log10(power)
+    gated = power[levels > -70]
+    if not len(gated):
+        return float('-inf')
+    relative_gate = 10 * np.log10(gated.mean()) - 10
+    with np.errstate(divide='ignore'):
+        gated = gated[10 * np.log10(gated) > relative_gate]
+    return float(10 * np.log10(gated.mean()))
+
+def trim_silence(samples: np.ndarray, sample_rate: int, silence_db: float = -45.0,
+                 padding_ms: float = 60.0) -> np.ndarray:
+    """
+    Cut leading and trailing audio quieter than silence_db relative to the
+    loudest 10ms frame, keeping padding_ms of it on each side. All-zero
+    audio has no loudest frame to trim against and is returned unchanged.
+    """
+    frame = max(1, sample_rate // 100)
+    count = len(samples) // frame
+    if not count:
+        return samples
+    energy = np.mean(samples[:count * frame].reshape(count, frame).astype(np.float64) ** 2, axis=1)
+    peak = energy.max()
+    if peak <= 0:
+        return samples
+    loud = np.flatnonzero(energy >= peak * 10 ** (silence_db / 10))
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, loud[0] * frame - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame + padding)
+    return samples[start:end]
+
+def normalize(samples: np.ndarray, sample_rate: int, settings: PostprocessSettings) -> Dict:
+    """
+    Trim and gain-normalize samples, returning the result and what was done.
+    silent is True if there was nothing above the silence floor to work with.
+    """
+    trimmed = trim_silence(samples, sample_rate, settings.silence_db, settings.padding_ms)
+    loudness = gated_loudness(trimmed, sample_rate)
+    gain_db = 0.0 if loudness == float('-inf') else settings.target_db - loudness
+
+    # Never push peaks above peak_db
+    peak = float(np.max(np.abs(trimmed))) if len(trimmed) else 0.0
+    if peak > 0:
+        gain_db = min(gain_db, settings.peak_db - 20 * np.log10(peak))
+
+    return {
+        'samples': trimmed * np.float32(10 ** (gain_db / 20)),
+        'loudness_db': loudness,
+        'gain_db': float(gain_db),
+        'trimmed_ms': (len(samples) - len(trimmed)) * 1000 / sample_rate,
+        'silent': peak == 0,
+    }
+
+def process_file(source: str, destination: str, settings: PostprocessSettings) -> Dict:
+    """Normalize one MP3 into destination. Module-level so it can run in a process pool."""
+    with open(source, 'rb') as f:
+        data = f.read()
+    samples, sample_rate = decode_mp3(data)
+    result = normalize(samples, sample_rate, settings)
+    samples = result.pop('samples')
+    # Silent audio is copied as it is rather than re-encoded
+    write_file_atomic(Path(destination), data if result['silent'] else encode_mp3(samples, sample_rate))
+    return result
+
+def load_manifest(path: Path) -> Dict[str, Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_manifest(path: Path, manifest: Dict[str, Dict]) -> None:
+    data = json.dumps(manifest, indent=1, sort_keys=True) + '\n'
+    write_file_atomic(path, data.encode('utf-8'))
+
+def find_pending(source_dir: Path, output_dir: Path, manifest: Dict[str, Dict],
+                 settings: PostprocessSettings) -> List[os.DirEntry]:
+    """MP3s in source_dir that are new, changed, or were processed with other settings"""
+    settings_key = settings.key()
+    pending = []
+    for entry in os.scandir(source_dir):
+        if not entry.name.endswith('.mp3') or not entry.is_file():
+            continue
+        stat = entry.stat()
+        known = manifest.get(entry.name)
+        if (known and known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns
+                and known.get('settings') == settings_key and (output_dir / entry.name).exists()):
+            continue
+        pending.append(entry)
+    pending.sort(key=lambda e: e.name)
+    return pending
+
+def postprocess_directory(source_dir: Path, output_dir: Path, settings: PostprocessSettings = PostprocessSettings(),
+                          workers: Optional[int] = None, save_every: int = 200) -> Dict[str, int]:
+    """
+    Normalize every MP3 in source_dir that isn't already up to date in output_dir,
+    across a process pool. The manifest is saved every save_every files, so an
+    interrupted run resumes where it stopped.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    pending = find_pending(source_dir, output_dir, manifest, settings)
+    logger.info(f"{len(pending)} files to process in {source_dir}")
+
+    counts = {'processed': 0, 'failed': 0}
+    if not pending:
+        return counts
+
+    settings_key = settings.key()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_file, entry.path, str(output_dir / entry.name), settings): entry
+            for entry in pending
+        }
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                result = future.result()
+            except (AudioCodecError, OSError) as e:
+                logger.error(f"Failed to process {entry.name}: {e}")
+                counts['failed'] += 1
+                continue
+            if result['silent']:
+                logger.warning(f"{entry.name} has no audio above the silence floor; copied unchanged")
+            stat = entry.stat()
+            manifest[entry.name] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'settings': settings_key,
+                **result,
+            }
+            counts['processed'] += 1
+            if counts['processed'] % save_every == 0:
+                save_manifest(manifest_path, manifest)
+                logger.info(f"Processed {counts['processed']} of {len(pending)} files")
+
+    save_manifest(manifest_path, manifest)
+    return counts
+
+def main():
+    defaults = PostprocessSettings()
+    parser = argparse.ArgumentParser(
+        description='Trim silence and normalize loudness of generated MP3s, processing only new files')
+    parser.add_argument('-s', '--source-dir', default='generated_audio',
+                        help='Directory with generated MP3 files (default: generated_audio)')
+    parser.add_argument('-o', '--output-dir', required=True,
+                        help='Directory to write processed MP3 files and the manifest to')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--target-db', type=float, default=defaults.target_db,
+                        help=f'Target gated loudness in dBFS (default: {defaults.target_db})')
+    parser.add_argument('--peak-db', type=float, default=defaults.peak_db,
+                        help=f'Maximum sample peak in dBFS (default: {defaults.peak_db})')
+    parser.add_argument('--silence-db', type=float, default=defaults.silence_db,
+                        help=f'Level below the loudest frame treated as silence when trimming '
+                             f'(default: {defaults.silence_db})')
+    parser.add_argument('--padding-ms', type=float, default=defaults.padding_ms,
+                        help=f'Silence to keep at each end after trimming (default: {defaults.padding_ms})')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    source_dir = Path(args.source_dir)
+    if not source_dir.is_dir():
+        print(f"Source directory not found: {source_dir}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        require_ffmpeg()
+    except AudioCodecError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    settings = PostprocessSettings(args.target_db, args.peak_db, args.silence_db, args.padding_ms)
+    counts = postprocess_directory(source_dir, Path(args.output_dir), settings, args.workers)
+    logger.info(f"Processed {counts['processed']} files, {counts['failed']} failed")
+    if counts['failed']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+try:
+    import numpy as np
+    from audio_postprocess import (PostprocessSettings, find_pending, gated_loudness, normalize, process_file,
+                                   trim_silence)
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 24000
+
+def tone(amplitude: float, seconds: float = 1.0) -> 'np.ndarray':
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+def silence(seconds: float) -> 'np.ndarray':
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype=np.float32)
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestAudioPostprocess(unittest.TestCase):
+    def test_gated_loudness(self):
+        # A full-scale sine has an RMS level of -3 dB
+        self.assertAlmostEqual(gated_loudness(tone(1.0), SAMPLE_RATE), -3.01, places=1)
+        self.assertAlmostEqual(gated_loudness(tone(0.1), SAMPLE_RATE), -23.01, places=1)
+        # Pauses are gated out instead of lowering the level (blocks straddling the edges still count)
+        padded = np.concatenate([silence(1), tone(0.1), silence(1)])
+        self.assertAlmostEqual(gated_loudness(padded, SAMPLE_RATE), -23.01, delta=1.5)
+        self.assertEqual(gated_loudness(silence(1), SAMPLE_RATE), float('-inf'))
+
+    def test_trim_silence(self):
+        samples = np.concatenate([silence(0.5), tone(0.5), silence(0.3)])
+        trimmed = trim_silence(samples, SAMPLE_RATE, padding_ms=50)
+        self.assertAlmostEqual(len(trimmed) / SAMPLE_RATE, 1.1, delta=0.02)
+        # Nothing to trim against: the audio is kept, not cut to nothing
+        self.assertEqual(len(trim_silence(silence(1), SAMPLE_RATE)), SAMPLE_RATE)
+
+    def test_normalize(self):
+        settings = PostprocessSettings(target_db=-20.0, peak_db=-1.0)
+        result = normalize(np.concatenate([silence(0.5), tone(0.05)]), SAMPLE_RATE, settings)
+        self.assertAlmostEqual(gated_loudness(result['samples'], SAMPLE_RATE), -20.0, places=1)
+        self.assertAlmostEqual(result['trimmed_ms'], 440, delta=10)
+
+        # The gain is limited so the peak stays below peak_db
+        quiet_peaks = np.concatenate([tone(0.01), [0.5]]).astype(np.float32)
+        result = normalize(quiet_peaks, SAMPLE_RATE, settings)
+        self.assertAlmostEqual(float(np.max(np.abs(result['samples']))), 10 ** (-1 / 20), places=3)
+
+    def test_silent_file_is_kept(self):
+        result = normalize(silence(0.5), SAMPLE_RATE, PostprocessSettings())
+        self.assertTrue(result['silent'])
+        self.assertEqual(len(result['samples']), len(silence(0.5)))
+        self.assertFalse(normalize(tone(0.1), SAMPLE_RATE, PostprocessSettings())['silent'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source, destination = Path(tmp, 'silent.mp3'), Path(tmp, 'out.mp3')
+            source.write_bytes(b'original mp3')
+            with mock.patch('audio_postprocess.decode_mp3', return_value=(silence(0.5), SAMPLE_RATE)), \
+                    mock.patch('audio_postprocess.encode_mp3') as encode:
+                result = process_file(str(source), str(destination), PostprocessSettings())
+            encode.assert_not_called()
+            self.assertTrue(result['silent'])
+            self.assertEqual(destination.read_bytes(), b'original mp3')
+
+    def test_find_pending(self):
+        settings = PostprocessSettings()
+        with tempfile.TemporaryDirectory() as tmp:
+            source, output = Path(tmp, 'source'), Path(tmp, 'output')
+            source.mkdir()
+            output.mkdir()
+            for name in ('a.mp3', 'b.mp3', 'notes.txt'):
+                (source / name).write_bytes(b'x')
+            (output / 'a.mp3').write_bytes(b'y')
+            stat = os.stat(source / 'a.mp3')
+            manifest = {'a.mp3': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                  'settings': settings.key()}}
+
+            self.assertEqual([e.name for e in find_pending(source, output, manifest, settings)], ['b.mp3'])
+            # Other settings reprocess everything
+            other = settings._replace(target_db=-16.0)
+            self.assertEqual([e.name for e in find_pending(source, output, manifest, other)], ['a.mp3', 'b.mp3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 import argparse
-import random
 import sys
 from typing import List
-from parse import Dialogue, DialogueParseError, parse_dialogues
+from parse import Dialogue, DialogueParseError, sample_dialogue_indices
+from session import get_session
 
 def print_dialogue(dialogue: Dialogue, dialogue_num: int):
     """Print a single dialogue's lines in 'speaker: chinese' format."""
@@ -23,6 +23,8 @@ def main():
                         help='Number of dialogues to process (default: process all remaining)')
     parser.add_argument('-r', '--random-count', type=int,
                         help='Number of dialogues to randomly select')
+    parser.add_argument('--seed', type=int,
+                        help='Random seed for reproducible --random-count selection')
     parser.add_argument('-p', '--prompt', type=str,
                         help='File containing prompt text to display before dialogues')
     args = parser.parse_args()
@@ -53,11 +55,9 @@ def main():
             print(f"Error reading prompt file: {e}", file=sys.stderr)
             sys.exit(1)
 
-    # Read and parse dialogues
+    # Index the dialogue file; only the selected dialogues are read and parsed below
     try:
-        with open(args.dialogues, 'r', encoding='utf-8') as f:
-            yaml_text = f.read()
-        all_dialogues = parse_dialogues(yaml_text)
+        dialogue_file = get_session().dialogue_file(args.dialogues)
     except FileNotFoundError:
         print(f"Dialogue file not found: {args.dialogues}", file=sys.stderr)
         sys.exit(1)
@@ -68,45 +68,46 @@ def main():
         print(f"Error reading dialogue file: {e}", file=sys.stderr)
         sys.exit(1)
 
+    total = len(dialogue_file)
+
     # Handle empty file
-    if not all_dialogues:
+    if not total:
         print("No dialogues found in file", file=sys.stderr)
         sys.exit(1)
 
     # Handle out of range start index
-    if args.first_dialogue >= len(all_dialogues):
-        print(f"Error: --first-dialogue ({args.first_dialogue}) exceeds number of dialogues ({len(all_dialogues)})",
+    if args.first_dialogue >= total:
+        print(f"Error: --first-dialogue ({args.first_dialogue}) exceeds number of dialogues ({total})",
               file=sys.stderr)
         sys.exit(1)
 
     # Select dialogue range
-    end_index = None
+    end_index = total
     if args.dialogue_count is not None:
         end_index = args.first_dialogue + args.dialogue_count
-        if end_index > len(all_dialogues):
+        if end_index > total:
             print(f"Warning: requested {args.dialogue_count} dialogues but only "
-                  f"{len(all_dialogues) - args.first_dialogue} remain after index {args.first_dialogue}",
+                  f"{total - args.first_dialogue} remain after index {args.first_dialogue}",
                   file=sys.stderr)
-
-    # Get the range-selected dialogues
-    selected_dialogues = all_dialogues[args.first_dialogue:end_index]
+            end_index = total
 
     # Handle random selection if requested
     if args.random_count is not None:
-        if args.random_count > len(selected_dialogues):
+        available = end_index - args.first_dialogue
+        if args.random_count > available:
             print(f"Warning: requested {args.random_count} random dialogues but only "
-                  f"{len(selected_dialogues)} are available", file=sys.stderr)
-            random_dialogues = selected_dialogues
-        else:
-            random_dialogues = random.sample(selected_dialogues, args.random_count)
+                  f"{available} are available", file=sys.stderr)
+        indices = sample_dialogue_indices(total, args.random_count, args.first_dialogue, end_index, args.seed)
     else:
-        random_dialogues = selected_dialogues
+        indices = range(args.first_dialogue, end_index)
 
     # Print dialogues, maintaining original indices
-    for dialogue in random_dialogues:
-        # Find the original index of this dialogue
-        original_index = all_dialogues.index(dialogue) + 1
-        print_dialogue(dialogue, original_index)
+    try:
+        for index, dialogue in dialogue_file.select(indices):
+            print_dialogue(dialogue, index + 1)
+    except DialogueParseError as e:
+        print(f"Error parsing dialogues: {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from convert_dialogues import convert_dialogue_format
+from file_utils import write_file_atomic
+from find_unknown_words import get_default_vocabulary_path
+from parse import Dialogue, DialogueParseError, parse_dialogues, save_dialogues
+from session import get_session
+from text_utils import segment_text_with_trie
+from tts import DialogueTTSGenerator, GenerationConfig, attach_existing_audio, plan_generation
+from validate_dialogues import DialogueValidator
+
+logger = logging.getLogger(__name__)
+
+# Bump when a stage's output changes for the same input, so cached outputs are rebuilt
+BUILD_VERSION = 1
+
+class BuildEntry(NamedTuple):
+    """One dialogue file from the manifest: built from source, published to target"""
+    title: Optional[str]
+    source: Path
+    target: Path
+
+def read_build_manifest(manifest_path: Path) -> List[BuildEntry]:
+    """
+    Read build entries from a manifest like www/index.yaml. 'path' is where the
+    viewer loads the file from; an optional 'source' names the file it is built
+    from (default: the published file itself). Both are relative to the manifest.
+    """
+    import yaml
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = yaml.safe_load(f) or []
+    if not isinstance(entries, list):
+        raise ValueError(f"Expected a list of entries in {manifest_path}, got {type(entries)}")
+
+    build_entries = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or 'path' not in entry:
+            raise ValueError(f"Entry {i} in {manifest_path} has no 'path'")
+        target = manifest_path.parent / entry['path']
+        source = manifest_path.parent / entry['source'] if entry.get('source') else target
+        build_entries.append(BuildEntry(entry.get('title'), source, target))
+    return build_entries
+
+def content_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+class StageCache:
+    """Stage outputs stored under the hash of everything the stage read"""
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, stage: str, key: str) -> Path:
+        return self.root / stage / key
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        try:
+            return self.path(stage, key).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def put(self, stage: str, key: str, text: str) -> None:
+        path = self.path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(path, text.encode('utf-8'))
+
+def dump_dialogues(dialogues: List[Dialogue]) -> str:
+    output = StringIO()
+    save_dialogues(dialogues, output, format='json')
+    return output.getvalue()
+
+# Stage functions take and return text and are module-level, so they can run in worker processes
+
+def convert_stage(source_text: str) -> str:
+    """Load YAML or JSON dialogues, converting the old title -> lines mapping format to a list"""
+    content = None
+    if source_text.lstrip().startswith('['):
+        try:
+            content = json.loads(source_text)
+        except ValueError:
+            # Flow-style YAML
+            pass
+    if content is None:
+        import yaml
+        content = yaml.safe_load(source_text) or []
+    if isinstance(content, dict):
+        content = convert_dialogue_format(content)
+    return json.dumps(content, ensure_ascii=False, indent=2)
+
+def validate_stage(text: str, name: str) -> str:
+    """Check the dialogues, failing with every error found, and re-serialize them"""
+    errors = [issue for issue in DialogueValidator().validate_text(text, name) if issue.severity == 'error']
+    if errors:
+        raise DialogueParseError('\n'.join(str(issue) for issue in errors))
+    dialogues = parse_dialogues(text)
+    if not dialogues:
+        raise DialogueParseError("No dialogues found")
+    return dump_dialogues(dialogues)
+
+def segment_stage(text: str, vocabulary_path: str) -> str:
+    """Word counts over all lines as 'word<TAB>count' rows, most frequent first"""
+    word_trie = get_session().trie(vocabulary_path)
+    counts: Dict[str, int] = {}
+    for dialogue in parse_dialogues(text):
+        for line in dialogue.lines:
+            for word in segment_text_with_trie(line.chinese, word_trie):
+                counts[word] = counts.get(word, 0) + 1
+    rows = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return ''.join(f"{word}\t{count}\n" for word, count in rows)
+
+def referenced_audio(text: str) -> List[str]:
+    names = []
+    for dialogue in parse_dialogues(text):
+        for line in dialogue.lines:
+            names.extend(name for name in (line.audio, line.audio_slow) if name)
+    return names
+
+class DialogueBuilder:
+    """
+    Runs each manifest entry through convert -> validate -> segment -> tts.
+
+    Every stage's output is cached under the hash of its inputs, so a stage
+    only runs when something it depends on changed. CPU-bound stages run in
+    worker processes; TTS requests from all files share one rate-limited
+    client, which is only created if some audio is actually missing.
+    """
+    def __init__(self, cache: StageCache, audio_dir: Path, vocabulary_path: Path,
+                 pool: ProcessPoolExecutor, tts_config: GenerationConfig, tts_batch_size: int = 30):
+        self.cache = cache
+        self.audio_dir = audio_dir
+        self.vocabulary_path = vocabulary_path
+        self.pool = pool
+        self.tts_config = tts_config
+        self.tts_batch_size = tts_batch_size
+        self.vocabulary_hash = content_hash(vocabulary_path.read_text(encoding='utf-8'))
+        self._generator = None
+
+    def get_generator(self) -> DialogueTTSGenerator:
+        # Creating the generator imports and authenticates the Google client
+        if self._generator is None:
+            self._generator = DialogueTTSGenerator(
+                output_dir=self.audio_dir,
+                batch_size=self.tts_batch_size,
+                config=self.tts_config
+            )
+        return self._generator
+
+    async def close(self) -> None:
+        if self._generator is not None:
+            await self._generator.close()
+
+    async def run_stage(self, stage: str, key: str, func: Callable[..., str], *args) -> Tuple[str, bool]:
+        """Return (output, ran): the cached output for key, or func's output, which is then cached"""
+        output = await asyncio.get_running_loop().run_in_executor(None, self.cache.get, stage, key)
+        if output is not None:
+            return output, False
+        output = await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+        await asyncio.get_running_loop().run_in_executor(None, self.cache.put, stage, key, output)
+        return output, True
+
+    async def tts_stage(self, name: str, text: str) -> Tuple[str, bool]:
+        """Attach audio file names to every line, generating only audio that doesn't exist yet"""
+        key = content_hash(str(BUILD_VERSION), text)
+        cached = self.cache.get('tts', key)
+        if cached is not None:
+            existing = {entry.name for entry in os.scandir(self.audio_dir)} if self.audio_dir.is_dir() else set()
+            if all(name in existing for name in referenced_audio(cached)):
+                return cached, False
+
+        dialogues = parse_dialogues(text)
+        attach_existing_audio(dialogues, self.audio_dir)
+        plan = plan_generation(dialogues, self.audio_dir, self.tts_config)
+        if plan.requests or plan.derived_slow:
+            logger.info(f"{name}: generating {plan.requests} audio files")
+            dialogues = await self.get_generator().process_dialogues(dialogues)
+        output = dump_dialogues(dialogues)
+        self.cache.put('tts', key, output)
+        return output, True
+
+    async def build(self, entry: BuildEntry) -> Tuple[str, str]:
+        """Build one entry, returning its final text and segment report"""
+        source_text = await asyncio.get_running_loop().run_in_executor(
+            None, entry.source.read_text, 'utf-8')
+        ran = []
+
+        converted, did_run = await self.run_stage(
+            'convert', content_hash(str(BUILD_VERSION), source_text), convert_stage, source_text)
+        ran.append(('convert', did_run))
+        validated, did_run = await self.run_stage(
+            'validate', content_hash(str(BUILD_VERSION), converted), validate_stage, converted, entry.source.name)
+        ran.append(('validate', did_run))
+        words, did_run = await self.run_stage(
+            'segment', content_hash(str(BUILD_VERSION), validated, self.vocabulary_hash),
+            segment_stage, validated, str(self.vocabulary_path))
+        ran.append(('segment', did_run))
+        final, did_run = await self.tts_stage(entry.target.name, validated)
+        ran.append(('tts', did_run))
+
+        logger.info(f"{entry.target.name}: " + ', '.join(
+            f"{stage} {'ran' if did_run else 'up to date'}" for stage, did_run in ran))
+        return final, words
+
+def publish(path: Path, text: str, cache: StageCache) -> bool:
+    """
+    Atomically replace path with text unless it already has that content.
+    The replaced version is kept in the cache under its hash.
+    """
+    path = path.resolve()
+    try:
+        old_text = path.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        old_text = None
+    if old_text == text:
+        return False
+    if old_text is not None:
+        cache.put('replaced', content_hash(old_text), old_text)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_file_atomic(path, text.encode('utf-8'))
+    return True
+
+async def build_all(entries: List[BuildEntry], builder: DialogueBuilder) -> Dict[BuildEntry, object]:
+    """Build all entries concurrently; values are (text, words) results or exceptions"""
+    results = await asyncio.gather(*(builder.build(entry) for entry in entries), return_exceptions=True)
+    return dict(zip(entries, results))
+
+async def main(args: argparse.Namespace) -> int:
+    manifest_path = Path(args.manifest)
+    try:
+        entries = read_build_manifest(manifest_path)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Error reading manifest: {e}")
+        return 1
+
+    # Entries listed twice are built once
+    entries = list({entry.target.resolve(): entry for entry in entries}.values())
+
+    build_dir = Path(args.build_dir)
+    cache = StageCache(build_dir / 'cache')
+    audio_dir = Path(args.audio_output_dir) if args.audio_output_dir else manifest_path.parent / 'audio'
+    tts_config = GenerationConfig(
+        force_normal=False,
+        force_slow=False,
+        max_rps=args.max_rps,
+        local_slow=args.local_slow
+    )
+
+    # Spawned, not forked: the event loop's executor threads already exist at this point
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+        builder = DialogueBuilder(cache, audio_dir, Path(args.vocabulary), pool, tts_config)
+        try:
+            results = await build_all(entries, builder)
+        finally:
+            await builder.close()
+
+    failed = [entry for entry, result in results.items() if isinstance(result, BaseException)]
+    for entry in failed:
+        logger.error(f"Failed to build {entry.source}: {results[entry]}")
+    if failed and not args.publish_partial:
+        logger.error(f"{len(failed)} of {len(entries)} files failed; nothing was published")
+        return 1
+
+    # Publish only once every file is built, so the site never mixes old and new output
+    published = 0
+    for entry, result in results.items():
+        if entry in failed:
+            continue
+        final, words = result
+        if publish(entry.target, final, cache):
+            published += 1
+            logger.info(f"Published {entry.target}")
+        words_path = build_dir / 'words' / f"{entry.target.stem}.tsv"
+        words_path.parent.mkdir(parents=True, exist_ok=True)
+        publish(words_path, words, cache)
+    logger.info(f"Built {len(entries) - len(failed)} files, published {published} changed ones")
+    return 1 if failed else 0
+
+def parse_args() -> argparse.Namespace:
+    repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    parser = argparse.ArgumentParser(
+        description='Build the dialogue files listed in www/index.yaml: convert, validate, segment and '
+                    'generate audio, re-running only stages whose inputs changed, then publish them atomically')
+    parser.add_argument('-m', '--manifest', default=os.path.join(repo_dir, 'www', 'index.yaml'),
+                        help='Manifest listing dialogue files (default: ../www/index.yaml)')
+    parser.add_argument('--build-dir', default=os.path.join(repo_dir, 'build'),
+                        help='Directory for cached stage outputs and word reports (default: ../build)')
+    parser.add_argument('-d', '--audio-output-dir',
+                        help="Directory for audio files (default: 'audio' next to the manifest)")
+    parser.add_argument('--vocabulary', default=get_default_vocabulary_path(),
+                        help='Vocabulary for word segmentation (default: ../words/10K.txt)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Worker processes for the convert, validate and segment stages '
+                             '(default: number of CPUs)')
+    parser.add_argument('--max-rps', type=int, default=18,
+                        help='Maximum TTS requests per second across all files (default: 18)')
+    parser.add_argument('--local-slow', action='store_true',
+                        help='Derive slow audio by time-stretching normal audio (see tts.py --local-slow)')
+    parser.add_argument('--publish-partial', action='store_true',
+                        help='Publish the files that built successfully even if others failed')
+    return parser.parse_args()
+
+def cli():
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main(parse_args())))
+
+if __name__ == '__main__':
+    cli()
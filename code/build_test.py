@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from build import convert_stage, main, read_build_manifest
+from tts import get_audio_paths
+
+OLD_FORMAT = """\
+问候:
+  - {s: A, c: 你好！, t: Привет}
+  - {s: B, c: 我们是老师。}
+"""
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        (self.dir / 'src').mkdir()
+        self.source = self.dir / 'src' / 'old.yaml'
+        self.source.write_text(OLD_FORMAT, encoding='utf-8')
+        self.manifest = self.dir / 'index.yaml'
+        self.manifest.write_text("- title: Old\n  path: dialogues/old.json\n  source: src/old.yaml\n",
+                                 encoding='utf-8')
+        self.vocabulary = self.dir / 'words.txt'
+        self.vocabulary.write_text("你好\n我们\n老师\n", encoding='utf-8')
+
+        # Existing audio means the TTS stage never needs an API client
+        self.audio_dir = self.dir / 'audio'
+        self.audio_dir.mkdir()
+        for text, speaker in (("你好！", "A"), ("我们是老师。", "B")):
+            for path in get_audio_paths(self.audio_dir, text, speaker):
+                path.write_bytes(b'mp3')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def build(self) -> int:
+        args = argparse.Namespace(
+            manifest=str(self.manifest), build_dir=str(self.dir / 'build'), audio_output_dir=None,
+            vocabulary=str(self.vocabulary), jobs=2, max_rps=18, local_slow=False, publish_partial=False
+        )
+        with self.assertLogs('build', level='INFO') as logs:
+            status = asyncio.run(main(args))
+        return status, '\n'.join(logs.output)
+
+    def test_convert_stage(self):
+        converted = json.loads(convert_stage(OLD_FORMAT))
+        self.assertEqual(converted[0]['title'], '问候')
+        self.assertEqual(len(converted[0]['lines']), 2)
+        # List-format files pass through
+        self.assertEqual(json.loads(convert_stage(json.dumps(converted))), converted)
+
+    def test_read_build_manifest(self):
+        entry, = read_build_manifest(self.manifest)
+        self.assertEqual(entry.source, self.source)
+        self.assertEqual(entry.target, self.dir / 'dialogues' / 'old.json')
+
+    def test_build_publishes_and_skips_up_to_date_stages(self):
+        status, log = self.build()
+        self.assertEqual(status, 0)
+        self.assertIn('convert ran', log)
+        published = json.loads((self.dir / 'dialogues' / 'old.json').read_text(encoding='utf-8'))
+        line = published[0]['lines'][0]
+        normal_path, slow_path = get_audio_paths(self.audio_dir, "你好！", "A")
+        self.assertEqual((line['a'], line['as']), (normal_path.name, slow_path.name))
+        words = (self.dir / 'build' / 'words' / 'old.tsv').read_text(encoding='utf-8')
+        self.assertIn("你好\t1\n", words)
+
+        status, log = self.build()
+        self.assertEqual(status, 0)
+        self.assertIn('convert up to date, validate up to date, segment up to date, tts up to date', log)
+        self.assertIn('published 0 changed', log)
+
+        # A changed translation re-runs every stage but needs no new audio
+        self.source.write_text(OLD_FORMAT.replace('Привет', 'Здравствуйте'), encoding='utf-8')
+        status, log = self.build()
+        self.assertIn('convert ran', log)
+        self.assertIn('published 1 changed', log)
+
+    def test_failed_build_publishes_nothing(self):
+        self.source.write_text("问候:\n  - {s: A}\n", encoding='utf-8')
+        status, log = self.build()
+        self.assertEqual(status, 1)
+        self.assertIn('nothing was published', log)
+        self.assertFalse((self.dir / 'dialogues').exists())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from file_utils import atomic_output
+from find_unknown_words import get_default_vocabulary_path
+from parse import load_dialogue_dicts_any_format
+from pinyin_index import PinyinIndex, get_default_pinyin_path, normalize_pinyin, split_syllables
+from session import get_session
+from text_utils import clean_text
+from trie import Trie
+
+HANZI_RE = re.compile(r'[㐀-䶿一-鿿]')
+# Runs of pinyin letters once tone marks are gone; digits, spaces and punctuation end them
+PINYIN_TOKEN_RE = re.compile(r'[a-zv]+')
+# Expected syllables are tuples of accepted readings; an empty tuple, for a
+# character the word list has no pinyin for, accepts any one syllable
+ANY_SYLLABLE: Tuple[str, ...] = ()
+# Digits and Latin in the hanzi accept any number of syllables ("110" is yāoyāolíng)
+GAP = None
+# Common readings besides the one in the word list: polyphones and colloquial variants
+ALTERNATIVE_READINGS = {
+    '这': ('zhei',), '那': ('nei',), '哪': ('nei',), '谁': ('shui',), '一': ('yao',),
+    '了': ('liao',), '着': ('zhao', 'zhuo'), '得': ('dei',), '还': ('huan',), '行': ('hang',),
+    '大': ('dai',), '嗯': ('ng', 'n'), '都': ('du',), '觉': ('jiao',), '长': ('zhang',),
+    '地': ('di',), '的': ('di',), '和': ('huo', 'hu'), '没': ('mo',),
+    '便': ('pian',), '重': ('chong',), '种': ('zhong',), '差': ('chai',), '数': ('shuo',),
+}
+
+Syllable = Optional[Tuple[str, ...]]
+
+class PinyinMismatch(NamedTuple):
+    """A word whose pinyin in the line's 'p' field differs from the word list's, both toneless"""
+    word: str
+    expected: str
+    found: str
+
+def pinyin_syllables(text: str) -> List[str]:
+    """Toneless syllables of a 'p' field; words that aren't pinyin stay whole"""
+    syllables = []
+    for token in PINYIN_TOKEN_RE.findall(normalize_pinyin(text)):
+        syllables.extend(split_syllables(token) or [token])
+    return syllables
+
+def format_syllables(syllables: Sequence[Syllable]) -> str:
+    """'na/nei ge' style text of expected syllables, with * for any syllable"""
+    return ' '.join('…' if s is GAP else '/'.join(s) or '*' for s in syllables)
+
+def _matches(expected: Syllable, found: str) -> bool:
+    # 儿 is er on its own and r after another syllable (nǎr)
+    return expected is GAP or not expected or found in expected or (found == 'r' and 'er' in expected)
+
+def _insertion_cost(found: str) -> int:
+    # Erhua is often written in the pinyin only (hǎohāor for 好好)
+    return 0 if found == 'r' else 1
+
+def align(expected: Sequence[Syllable], found: Sequence[str]) -> List[Tuple[Optional[int], Optional[int]]]:
+    """
+    Minimum edit alignment of expected and found syllables as (expected
+    index, found index) pairs, with None on the side of an insertion or
+    deletion. A GAP takes any number of found syllables, including none.
+    """
+    infinity = len(expected) + len(found) + 1
+    cost = [[infinity] * (len(found) + 1) for _ in range(len(expected) + 1)]
+    cost[0][0] = 0
+    for i in range(len(expected) + 1):
+        for j in range(len(found) + 1):
+            if i and expected[i - 1] is GAP:
+                cost[i][j] = min(cost[i - 1][j], cost[i][j - 1] if j else infinity)
+                continue
+            if i:
+                cost[i][j] = min(cost[i][j], cost[i - 1][j] + 1)
+            if j:
+                cost[i][j] = min(cost[i][j], cost[i][j - 1] + _insertion_cost(found[j - 1]))
+            if i and j:
+                cost[i][j] = min(cost[i][j], cost[i - 1][j - 1] + (not _matches(expected[i - 1], found[j - 1])))
+
+    pairs = []
+    i, j = len(expected), len(found)
+    gap_used = False
+    while i or j:
+        if i and expected[i - 1] is GAP:
+            if j and cost[i][j] == cost[i][j - 1]:
+                j -= 1
+                pairs.append((i - 1, j))
+                gap_used = True
+            else:
+                i -= 1
+                if not gap_used:
+                    pairs.append((i, None))
+                gap_used = False
+        elif i and j and cost[i][j] == cost[i - 1][j - 1] + (not _matches(expected[i - 1], found[j - 1])):
+            i, j = i - 1, j - 1
+            pairs.append((i, j))
+        elif i and cost[i][j] == cost[i - 1][j] + 1:
+            i -= 1
+            pairs.append((i, None))
+        else:
+            j -= 1
+            pairs.append((None, j))
+    pairs.reverse()
+    return pairs
+
+class PinyinChecker:
+    """
+    Checks the 'p' field of dialogue lines against pinyin from a word list.
+
+    Each line's hanzi are segmented with the vocabulary trie and every word
+    is looked up in the pinyin index, falling back to its single characters;
+    characters with no pinyin match any syllable, and common alternative
+    readings are accepted. The expected syllables are aligned with the 'p'
+    field, and every word whose syllables differ is a mismatch. Comparison
+    is toneless, since the word list has no tones. Segmentations are cached
+    per text, as the same lines recur across corpora.
+    """
+    def __init__(self, trie: Trie, index: PinyinIndex):
+        self.trie = trie
+        self.index = index
+        self._expected: Dict[str, List[Tuple[str, List[Syllable]]]] = {}
+
+    def word_syllables(self, word: str) -> List[Syllable]:
+        if not HANZI_RE.search(word):
+            return [GAP]
+        entry = self.index.lookup(word)
+        syllables = split_syllables(entry[0]) if entry else None
+        if syllables is not None and len(syllables) == len(word):
+            return [(syllable, *ALTERNATIVE_READINGS.get(char, ())) for char, syllable in zip(word, syllables)]
+        if len(word) == 1:
+            return [ANY_SYLLABLE]
+        return [syllable for char in word for syllable in self.word_syllables(char)]
+
+    def expected(self, chinese: str) -> List[Tuple[str, List[Syllable]]]:
+        """(word, syllables) for each word of chinese, cached; runs of digits and Latin are one word"""
+        words = self._expected.get(chinese)
+        if words is None:
+            words = []
+            for word in self.trie.segment(clean_text(chinese)):
+                if words and not HANZI_RE.search(word) and not HANZI_RE.search(words[-1][0]):
+                    words[-1] = (words[-1][0] + word, [GAP])
+                else:
+                    words.append((word, self.word_syllables(word)))
+            self._expected[chinese] = words
+        return words
+
+    def check_line(self, chinese: str, pinyin: str) -> List[PinyinMismatch]:
+        words = self.expected(chinese)
+        expected = [syllable for _, syllables in words for syllable in syllables]
+        found = pinyin_syllables(pinyin)
+        # Syllables of the 'p' field aligned with each word; insertions go to the word before
+        found_by_word: List[List[str]] = [[] for _ in words]
+        matched = [True] * len(words)
+        owners = [position for position, (_, syllables) in enumerate(words) for _ in syllables]
+        owner = 0
+        for i, j in align(expected, found) if words else []:
+            if i is not None:
+                owner = owners[i]
+            if j is not None:
+                found_by_word[owner].append(found[j])
+            if i is None:
+                matched[owner] = matched[owner] and _insertion_cost(found[j]) == 0
+            elif j is None:
+                matched[owner] = matched[owner] and expected[i] is GAP
+            elif not _matches(expected[i], found[j]):
+                matched[owner] = False
+
+        mismatches = []
+        for (word, syllables), ok, word_found in zip(words, matched, found_by_word):
+            if not ok and any(syllables):
+                mismatches.append(PinyinMismatch(word, format_syllables(syllables), ' '.join(word_found)))
+        return mismatches
+
+    def glosses(self, chinese: str) -> List[Dict[str, str]]:
+        """Pinyin and gloss of each word of chinese that the word list explains"""
+        glosses = []
+        for word, _ in self.expected(chinese):
+            entry = self.index.lookup(word)
+            if entry:
+                glosses.append({'word': word, 'pinyin': entry[0], 'gloss': entry[1]})
+        return glosses
+
+_checkers: Dict[Tuple[str, str], PinyinChecker] = {}
+
+def get_checker(vocabulary: str, pinyin_file: str) -> PinyinChecker:
+    """Checker over the session's trie and pinyin index, kept with its segmentation cache while they are current"""
+    trie, index = get_session().trie(vocabulary), get_session().pinyin_index(pinyin_file)
+    checker = _checkers.get((vocabulary, pinyin_file))
+    if checker is None or checker.trie is not trie or checker.index is not index:
+        checker = _checkers[vocabulary, pinyin_file] = PinyinChecker(trie, index)
+    return checker
+
+def check_file(path: str, vocabulary: str, pinyin_file: str, all_lines: bool = False,
+               gloss: bool = False) -> Tuple[List[dict], Dict[str, int]]:
+    """
+    Report records for the lines of a dialogue file whose pinyin doesn't
+    match (every line with all_lines), and counts of lines and mismatches
+    """
+    checker = get_checker(vocabulary, pinyin_file)
+    records = []
+    counts = {'lines': 0, 'no_pinyin': 0, 'mismatched_lines': 0, 'mismatched_words': 0}
+    for i, dialogue in enumerate(load_dialogue_dicts_any_format(path)):
+        if not isinstance(dialogue, dict) or not isinstance(dialogue.get('lines'), list):
+            continue
+        for j, line in enumerate(dialogue['lines']):
+            if not isinstance(line, dict) or not isinstance(line.get('c'), str):
+                continue
+            counts['lines'] += 1
+            pinyin = line.get('p')
+            if not isinstance(pinyin, str) or not pinyin.strip():
+                counts['no_pinyin'] += 1
+                continue
+            mismatches = checker.check_line(line['c'], pinyin)
+            if mismatches:
+                counts['mismatched_lines'] += 1
+                counts['mismatched_words'] += len(mismatches)
+            if mismatches or all_lines:
+                record = {
+                    'path': path, 'dialogue': i, 'title': dialogue.get('title'), 'line': j,
+                    'c': line['c'], 'p': pinyin, 'mismatches': [m._asdict() for m in mismatches],
+                }
+                if gloss:
+                    record['glosses'] = checker.glosses(line['c'])
+                records.append(record)
+    return records, counts
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the pinyin ('p') of dialogue lines matches their hanzi, using the vocabulary "
+                    "trie and the pinyin of ../words/10k-expl.txt; prints one JSON object per line to report")
+    parser.add_argument('files', nargs='+', help='Dialogue files (YAML/JSON, list or old title -> lines format)')
+    parser.add_argument('--vocabulary', help='Word list for segmentation (default: ../words/10K.txt)')
+    parser.add_argument('--pinyin-file', help='hanzi,pinyin,gloss word list (default: ../words/10k-expl.txt)')
+    parser.add_argument('-o', '--output', help='Write the report to this file (default: stdout)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of files to check in parallel (default: 1)')
+    parser.add_argument('--all', action='store_true', help='Report every line, not only mismatches')
+    parser.add_argument('--gloss', action='store_true', help='Add the pinyin and gloss of known words to records')
+    args = parser.parse_args()
+
+    vocabulary = args.vocabulary or get_default_vocabulary_path()
+    pinyin_file = args.pinyin_file or get_default_pinyin_path()
+    try:
+        get_checker(vocabulary, pinyin_file)
+    except Exception as e:
+        print(f"Error processing word lists: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.jobs > 1 and len(args.files) > 1:
+        # Each worker loads the word lists once and keeps its own segmentation cache
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(check_file, path, vocabulary, pinyin_file, args.all, args.gloss)
+                       for path in args.files]
+            results = [future.exception() or future.result() for future in futures]
+    else:
+        results = []
+        for path in args.files:
+            try:
+                results.append(check_file(path, vocabulary, pinyin_file, args.all, args.gloss))
+            except Exception as e:
+                results.append(e)
+
+    totals = {'lines': 0, 'no_pinyin': 0, 'mismatched_lines': 0, 'mismatched_words': 0}
+    failed = 0
+    with atomic_output(Path(args.output)) if args.output else nullcontext(sys.stdout) as output:
+        for path, result in zip(args.files, results):
+            if isinstance(result, Exception):
+                failed += 1
+                if isinstance(result, FileNotFoundError):
+                    print(f"File not found: {path}", file=sys.stderr)
+                else:
+                    print(f"Error checking {path}: {result}", file=sys.stderr)
+                continue
+            records, counts = result
+            for record in records:
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            for key, count in counts.items():
+                totals[key] += count
+
+    print(f"{len(args.files) - failed} files, {totals['lines']} lines: {totals['mismatched_lines']} lines with "
+          f"{totals['mismatched_words']} mismatched words, {totals['no_pinyin']} without pinyin", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+from check_pinyin import ANY_SYLLABLE, GAP, PinyinChecker, PinyinMismatch, align, check_file, pinyin_syllables
+from pinyin_index import PinyinEntry, PinyinIndex
+from trie import build_trie_from_words
+
+WORDS = ['知道,zhidao,to know', '你,ni,you', '我,wo,I/me', '那,na,that', '个,ge,measure word',
+         '好,hao,good', '了,le,completion particle', '转,zhuan,to turn']
+
+def make_checker():
+    index = PinyinIndex(PinyinEntry(*line.split(',', 2), rank) for rank, line in enumerate(WORDS))
+    trie = build_trie_from_words(['知道', '你', '我', '那个', '那', '个', '好好', '银行', '转'])
+    return PinyinChecker(trie, index)
+
+class TestAlign(unittest.TestCase):
+    def test_pinyin_syllables(self):
+        self.assertEqual(pinyin_syllables('Nǐ zhīdào ma? Hǎohāor!'), ['ni', 'zhi', 'dao', 'ma', 'hao', 'hao', 'r'])
+        self.assertEqual(pinyin_syllables('OK, 3 ge'), ['ok', 'ge'])
+
+    def test_align(self):
+        self.assertEqual(align([('ni',), ('hao',)], ['ni', 'hao']), [(0, 0), (1, 1)])
+        self.assertEqual(align([('ni',), ANY_SYLLABLE], ['ni', 'men', 'hao']), [(0, 0), (None, 1), (1, 2)])
+        self.assertEqual(align([('wo',), GAP, ('ge',)], ['wo', 'san', 'shi', 'ge']),
+                         [(0, 0), (1, 1), (1, 2), (2, 3)])
+
+class TestPinyinChecker(unittest.TestCase):
+    def setUp(self):
+        self.checker = make_checker()
+
+    def test_matching_lines(self):
+        for chinese, pinyin in [
+            ('你知道吗？', 'Nǐ zhīdào ma?'),  # 吗 has no pinyin in the list
+            ('那个好好！', 'Nèige hǎohāor!'),  # colloquial nei, erhua only in the pinyin
+            ('转110', 'zhuǎn yāoyāolíng'),  # digits take any syllables
+            ('银行', 'yínháng'),
+        ]:
+            self.assertEqual(self.checker.check_line(chinese, pinyin), [], chinese)
+
+    def test_mismatches(self):
+        self.assertEqual(self.checker.check_line('好！那你下午去！', 'Hǎo! Nà wǒ xiàwǔ qù!'),
+                         [PinyinMismatch('你', 'ni', 'wo')])
+        self.assertEqual(self.checker.check_line('我知道了', 'Wǒ zhīdào'),
+                         [PinyinMismatch('了', 'le/liao', '')])
+        self.assertEqual(self.checker.check_line('我知道', 'Wǒmen zhīdào'),
+                         [PinyinMismatch('我', 'wo', 'wo men')])
+
+    def test_glosses(self):
+        self.assertEqual(self.checker.glosses('你知道吗'), [
+            {'word': '你', 'pinyin': 'ni', 'gloss': 'you'},
+            {'word': '知道', 'pinyin': 'zhidao', 'gloss': 'to know'},
+        ])
+
+class TestCheckFile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.vocabulary = os.path.join(self.dir.name, 'vocabulary.txt')
+        self.pinyin_file = os.path.join(self.dir.name, 'expl.txt')
+        with open(self.vocabulary, 'w', encoding='utf-8') as f:
+            f.write('知道\n你\n我\n')
+        with open(self.pinyin_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(WORDS) + '\n')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+        return path
+
+    def test_old_and_new_formats(self):
+        lines = [{'c': '你知道', 'p': 'Wǒ zhīdào'}, {'c': '我', 'p': 'Wǒ'}, {'c': '我'}]
+        for path in [self.write('new.json', [{'title': 'T', 'lines': lines}]),
+                     self.write('old.json', {'T': lines})]:
+            records, counts = check_file(path, self.vocabulary, self.pinyin_file)
+            self.assertEqual(counts, {'lines': 3, 'no_pinyin': 1, 'mismatched_lines': 1, 'mismatched_words': 1})
+            self.assertEqual(records, [{
+                'path': path, 'dialogue': 0, 'title': 'T', 'line': 0, 'c': '你知道', 'p': 'Wǒ zhīdào',
+                'mismatches': [{'word': '你', 'expected': 'ni', 'found': 'wo'}],
+            }])
+
+    def test_all_lines_with_glosses(self):
+        path = self.write('new.json', [{'title': 'T', 'lines': [{'c': '我', 'p': 'Wǒ'}]}])
+        records, _ = check_file(path, self.vocabulary, self.pinyin_file, all_lines=True, gloss=True)
+        self.assertEqual(records[0]['mismatches'], [])
+        self.assertEqual(records[0]['glosses'], [{'word': '我', 'pinyin': 'wo', 'gloss': 'I/me'}])
+
+if __name__ == '__main__':
+    unittest.main()
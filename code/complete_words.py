@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from session import get_session
+from find_unknown_words import get_default_vocabulary_path
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the most frequent vocabulary words starting with each prefix')
+    parser.add_argument('prefixes', nargs='+', help='Prefixes to complete')
+    parser.add_argument('--vocabulary',
+                        help='Word list in frequency order (default: ../words/10K.txt)')
+    parser.add_argument('-k', type=int, default=10, help='Number of completions (default: 10)')
+    args = parser.parse_args()
+
+    try:
+        word_trie = get_session().trie(args.vocabulary or get_default_vocabulary_path())
+    except Exception as e:
+        print(f"Error processing vocabulary file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for prefix in args.prefixes:
+        print(f"{prefix}\t{' '.join(word_trie.complete(prefix, args.k))}")
+
+if __name__ == '__main__':
+    main()
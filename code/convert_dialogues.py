@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 import argparse
-import json
+import os
 import sys
-import yaml
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from file_utils import atomic_output
+from parse import DialogueParseError, write_json_list
 
 def convert_dialogue_format(old_format: Dict) -> List[Dict]:
     """
@@ -41,62 +45,150 @@ def convert_dialogue_format(old_format: Dict) -> List[Dict]:
 
     return new_format
 
+def _construct_from_events(loader: Any, anchors: Dict[str, Any]) -> Any:
+    """Build the value of the next YAML node from parser events (no merge keys or custom tags)"""
+    import yaml
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise DialogueParseError(f"Unknown alias *{event.anchor} at {event.start_mark}")
+        return anchors[event.anchor]
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        constructor = loader.yaml_constructors.get(tag, loader.yaml_constructors[None])
+        value = constructor(loader, node)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        value = []
+        if event.anchor:
+            anchors[event.anchor] = value
+        while not loader.check_event(yaml.SequenceEndEvent):
+            value.append(_construct_from_events(loader, anchors))
+        loader.get_event()
+    elif isinstance(event, yaml.MappingStartEvent):
+        value = {}
+        if event.anchor:
+            anchors[event.anchor] = value
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _construct_from_events(loader, anchors)
+            value[key] = _construct_from_events(loader, anchors)
+        loader.get_event()
+    else:
+        raise DialogueParseError(f"Unexpected YAML event {type(event).__name__} at {event.start_mark}")
+
+    if event.anchor:
+        anchors[event.anchor] = value
+    return value
+
+def iter_converted_dialogues(stream: TextIO) -> Iterator[Dict]:
+    """
+    Convert an old-format YAML stream to new-format dialogues one at a time.
+
+    The input is read as parser events, and each title -> lines entry is
+    yielded as soon as its lines have been parsed, so memory use doesn't
+    grow with the file. Gives the same dialogues as convert_dialogue_format
+    on the loaded mapping.
+
+    Raises:
+        yaml.YAMLError: If YAML parsing fails
+        DialogueParseError: If the document is not a mapping
+    """
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)(stream)
+    try:
+        loader.get_event()  # StreamStart
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStart
+        if loader.check_event(yaml.ScalarEvent) and loader.peek_event().value in ('', '~', 'null', 'Null', 'NULL'):
+            # Empty document
+            return
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise DialogueParseError("Input file must contain a YAML dictionary/object")
+        loader.get_event()
+
+        anchors: Dict[str, Any] = {}
+        while not loader.check_event(yaml.MappingEndEvent):
+            title = _construct_from_events(loader, anchors)
+            lines = _construct_from_events(loader, anchors)
+            yield {"title": title, "lines": lines}
+    finally:
+        loader.dispose()
+
+def convert_file(input_path: str, output_path: Optional[str], indent: Optional[int] = 2,
+                 ensure_ascii: bool = False) -> int:
+    """
+    Stream-convert one old-format file to new-format JSON, written atomically
+    to output_path or to stdout if it is None. Returns the number of dialogues.
+    Module-level so it can run in a process pool.
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        dialogues = iter_converted_dialogues(f)
+        if output_path is None:
+            return write_json_list(dialogues, sys.stdout, indent, ensure_ascii=ensure_ascii, allow_nan=False)
+        with atomic_output(Path(output_path)) as out:
+            return write_json_list(dialogues, out, indent, ensure_ascii=ensure_ascii, allow_nan=False)
+
 def main():
     parser = argparse.ArgumentParser(description='Convert dialogue files from old YAML to new JSON format')
-    parser.add_argument('input', type=str, help='Input YAML file in old format')
-    parser.add_argument('-o', '--output', type=str, help='Output JSON file (default: stdout)')
+    parser.add_argument('input', type=str, nargs='+', help='Input YAML files in old format')
+    parser.add_argument('-o', '--output', type=str,
+                        help='Output JSON file for a single input (default: stdout)')
+    parser.add_argument('--output-dir', type=str,
+                        help='Write each input to <name>.json in this directory')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of files to convert in parallel with --output-dir (default: 1)')
     parser.add_argument('--indent', type=int, default=2, help='JSON indentation (default: 2)')
     parser.add_argument('--ensure-ascii', action='store_true',
                         help='Ensure ASCII output in JSON (default: False, allowing Unicode)')
     args = parser.parse_args()
 
-    # Read input file
-    try:
-        with open(args.input, 'r', encoding='utf-8') as f:
-            input_text = f.read()
-    except FileNotFoundError:
-        print(f"Error: Input file not found: {args.input}", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error reading input file: {e}", file=sys.stderr)
-        sys.exit(1)
+    if len(args.input) > 1 and not args.output_dir:
+        parser.error('--output-dir is required with several input files')
+    if args.output and args.output_dir:
+        parser.error('--output and --output-dir exclude each other')
 
-    # Parse YAML and convert format
-    try:
-        old_format = yaml.safe_load(input_text)
-        if old_format is None:  # Empty file case
-            new_format = []
-        elif not isinstance(old_format, dict):
-            print("Error: Input file must contain a YAML dictionary/object", file=sys.stderr)
-            sys.exit(1)
-        else:
-            new_format = convert_dialogue_format(old_format)
-    except yaml.YAMLError as e:
-        print(f"Error parsing YAML: {e}", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error converting format: {e}", file=sys.stderr)
-        sys.exit(1)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        outputs = [os.path.join(args.output_dir, Path(path).stem + '.json') for path in args.input]
+    else:
+        outputs = [args.output]
 
-    # Generate JSON output
-    try:
-        output_json = json.dumps(
-            new_format,
-            ensure_ascii=args.ensure_ascii,
-            indent=args.indent,
-            allow_nan=False  # Ensure valid JSON output
-        )
-
-        if args.output:
-            with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(output_json)
-                f.write('\n')  # Add trailing newline
+    def report(path: str, error: Exception) -> None:
+        import yaml
+        if isinstance(error, FileNotFoundError):
+            print(f"Error: Input file not found: {path}", file=sys.stderr)
+        elif isinstance(error, yaml.YAMLError):
+            print(f"Error parsing YAML in {path}: {error}", file=sys.stderr)
+        elif isinstance(error, DialogueParseError):
+            print(f"Error: {path}: {error}", file=sys.stderr)
         else:
-            print(output_json)
+            print(f"Error converting {path}: {error}", file=sys.stderr)
+
+    failed = 0
+    if args.jobs > 1 and len(args.input) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {
+                pool.submit(convert_file, path, output, args.indent, args.ensure_ascii): path
+                for path, output in zip(args.input, outputs)
+            }
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    failed += 1
+                    report(futures[future], future.exception())
+    else:
+        for path, output in zip(args.input, outputs):
+            try:
+                convert_file(path, output, args.indent, args.ensure_ascii)
+            except Exception as e:
+                failed += 1
+                report(path, e)
 
-    except Exception as e:
-        print(f"Error writing output: {e}", file=sys.stderr)
+    if failed:
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,8 @@
+import io
+import json
 import unittest
-from convert_dialogues import convert_dialogue_format
+from convert_dialogues import convert_dialogue_format, iter_converted_dialogues
+from parse import DialogueParseError, write_json_list
 
 class TestDialogueConversion(unittest.TestCase):
     def test_convert_basic(self):
@@ -107,5 +110,42 @@ class TestDialogueConversion(unittest.TestCase):
         result = convert_dialogue_format(old_format)
         self.assertEqual(result, expected)
 
+class TestStreamingConversion(unittest.TestCase):
+    YAML = """
+Dialogue 1:
+  - s: A
+    c: 你好
+    p: Nǐ hǎo
+  - &bye
+    s: B
+    c: 再见
+Dialogue 2:
+  - *bye
+  - {s: A, c: '123', d: 1}
+"""
+
+    def test_same_as_loading_whole_file(self):
+        import yaml
+        expected = convert_dialogue_format(yaml.safe_load(self.YAML))
+        self.assertEqual(list(iter_converted_dialogues(io.StringIO(self.YAML))), expected)
+
+    def test_streamed_json_matches_dumps(self):
+        import yaml
+        expected = convert_dialogue_format(yaml.safe_load(self.YAML))
+        for indent in (None, 0, 2):
+            output = io.StringIO()
+            count = write_json_list(iter_converted_dialogues(io.StringIO(self.YAML)), output, indent,
+                                    ensure_ascii=False)
+            self.assertEqual(count, 2)
+            self.assertEqual(output.getvalue(), json.dumps(expected, ensure_ascii=False, indent=indent) + '\n')
+
+    def test_empty_file(self):
+        self.assertEqual(list(iter_converted_dialogues(io.StringIO(''))), [])
+        self.assertEqual(list(iter_converted_dialogues(io.StringIO('~\n'))), [])
+
+    def test_not_a_mapping(self):
+        with self.assertRaises(DialogueParseError):
+            list(iter_converted_dialogues(io.StringIO('- title: x\n  lines: []\n')))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+import numpy as np
+
+from file_utils import atomic_output
+from parse import DialogueParseError, load_dialogue_dicts_any_format, write_json_list
+from text_utils import clean_text
+
+# A prime above every 32-bit shingle hash, so (a * x + b) % PRIME permutes them
+PRIME = np.uint64((1 << 32) + 15)
+
+class DialogueRef(NamedTuple):
+    """A dialogue of an input file; index is its 0-based position in the file"""
+    path: str
+    index: int
+    title: str
+
+def dialogue_text(dialogue: dict) -> str:
+    """Cleaned Chinese text of a dialogue's lines, one line per row"""
+    lines = dialogue.get('lines') if isinstance(dialogue, dict) else None
+    if not isinstance(lines, list):
+        return ''
+    return '\n'.join(clean_text(line['c']) for line in lines
+                     if isinstance(line, dict) and isinstance(line.get('c'), str))
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """32-bit hashes of the size-character shingles of text; shorter lines count as one shingle"""
+    hashes = set()
+    for line in text.split('\n'):
+        if 0 < len(line) <= size:
+            hashes.add(zlib.crc32(line.encode('utf-8')))
+        for start in range(len(line) - size + 1):
+            hashes.add(zlib.crc32(line[start:start + size].encode('utf-8')))
+    return hashes
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1 / bands) ** (1 / rows) is the highest one not above threshold, so
+    pairs at the threshold are likely to share a band
+    """
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    below = [option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold]
+    return max(below or options, key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+class MinHasher:
+    """
+    MinHash signatures of many shingle sets at once. Every shingle hash of
+    every set goes through all num_perm hash functions as one NumPy array
+    operation per block of functions, and np.minimum.reduceat takes each
+    set's minimum per function.
+    """
+    def __init__(self, num_perm: int = 128, seed: int = 1, block: int = 16):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.block = block
+        # Below 2**32 like the hashes, so a * x + b fits in 64 bits
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, sets: List[Set[int]]) -> np.ndarray:
+        """(len(sets), num_perm) array of signatures; empty sets get PRIME, which no hash reaches"""
+        result = np.full((len(sets), self.num_perm), PRIME, dtype=np.uint64)
+        nonempty = [i for i, hashes in enumerate(sets) if hashes]
+        if not nonempty:
+            return result
+        values = np.fromiter((h for i in nonempty for h in sets[i]), dtype=np.uint64)
+        starts = np.cumsum([0] + [len(sets[i]) for i in nonempty[:-1]])
+        for first in range(0, self.num_perm, self.block):
+            a = self.a[first:first + self.block, None]
+            b = self.b[first:first + self.block, None]
+            permuted = (a * values + b) % PRIME
+            result[nonempty, first:first + self.block] = np.minimum.reduceat(permuted, starts, axis=1).T
+        return result
+
+def lsh_candidates(signatures: np.ndarray, bands: int, skip: Iterable[int] = ()) -> Set[Tuple[int, int]]:
+    """
+    Pairs (i, j), i < j, of rows that agree on every value of at least one
+    band. Each band is one dictionary pass over the rows, so the work is
+    linear in the number of rows plus the number of pairs sharing a bucket.
+    """
+    skip = set(skip)
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        chunk = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(len(chunk)):
+            if i not in skip:
+                buckets[chunk[i].tobytes()].append(i)
+        for members in buckets.values():
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    pairs.add((i, j))
+    return pairs
+
+def clusters_from_pairs(count: int, pairs: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """Connected components of size two or more, each sorted, in order of their first member"""
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(count):
+        groups[find(i)].append(i)
+    return sorted((members for members in groups.values() if len(members) > 1), key=lambda members: members[0])
+
+def find_near_duplicates(texts: List[str], threshold: float = 0.8, num_perm: int = 128,
+                         shingle_size: int = 3) -> List[List[int]]:
+    """
+    Clusters of indices of texts whose shingle sets have Jaccard similarity
+    of at least threshold with another member. LSH finds candidate pairs
+    from MinHash signatures and each candidate is then checked exactly, so
+    there are no false positives; pairs LSH misses are the only error.
+    """
+    sets = [shingles(text, shingle_size) for text in texts]
+    signatures = MinHasher(num_perm).signatures(sets)
+    bands, _ = choose_bands(num_perm, threshold)
+    candidates = lsh_candidates(signatures, bands, skip=(i for i, hashes in enumerate(sets) if not hashes))
+    pairs = [(i, j) for i, j in candidates if jaccard(sets[i], sets[j]) >= threshold]
+    return clusters_from_pairs(len(texts), pairs)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find clusters of near-duplicate dialogues (MinHash/LSH over shingles of the Chinese text) '
+                    'and optionally write the dialogues without the duplicates, e.g. before tts.py')
+    parser.add_argument('files', nargs='+', help='Dialogue files (YAML/JSON, list or old title -> lines format)')
+    parser.add_argument('--threshold', type=float, default=0.8,
+                        help='Minimum Jaccard similarity of shingle sets (default: 0.8)')
+    parser.add_argument('--num-perm', type=int, default=128, help='MinHash signature length (default: 128)')
+    parser.add_argument('--shingle-size', type=int, default=3, help='Characters per shingle (default: 3)')
+    parser.add_argument('-o', '--output',
+                        help='Write all dialogues except later members of each cluster to this JSON file')
+    args = parser.parse_args()
+
+    if not 0 < args.threshold <= 1:
+        parser.error('--threshold must be in (0, 1]')
+
+    # Only needed for the YAML error type; parse imports it lazily too
+    import yaml
+
+    refs: List[DialogueRef] = []
+    dialogues: List[dict] = []
+    for path in args.files:
+        try:
+            content = load_dialogue_dicts_any_format(path)
+        except FileNotFoundError:
+            print(f"File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+        except (DialogueParseError, ValueError, yaml.YAMLError) as e:
+            print(f"Error parsing {path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        for i, dialogue in enumerate(content):
+            title = dialogue.get('title') if isinstance(dialogue, dict) else None
+            refs.append(DialogueRef(path, i, title or ''))
+            dialogues.append(dialogue)
+
+    texts = [dialogue_text(dialogue) for dialogue in dialogues]
+    clusters = find_near_duplicates(texts, args.threshold, args.num_perm, args.shingle_size)
+
+    print("cluster\tpath\tdialogue\ttitle\tsimilarity")
+    for number, members in enumerate(clusters, 1):
+        first = shingles(texts[members[0]], args.shingle_size)
+        for i in members:
+            similarity = jaccard(first, shingles(texts[i], args.shingle_size))
+            print(f"{number}\t{refs[i].path}\t{refs[i].index}\t{refs[i].title}\t{similarity:.2f}")
+
+    duplicates = {i for members in clusters for i in members[1:]}
+    if args.output:
+        with atomic_output(Path(args.output)) as out:
+            write_json_list((d for i, d in enumerate(dialogues) if i not in duplicates), out, ensure_ascii=False)
+    print(f"{len(dialogues)} dialogues, {len(clusters)} clusters, {len(duplicates)} duplicates"
+          f"{' dropped' if args.output else ''}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+
+try:
+    import numpy as np
+    from dedupe_dialogues import (MinHasher, choose_bands, clusters_from_pairs, dialogue_text,
+                                  find_near_duplicates, jaccard, main, shingles)
+except ImportError:
+    np = None
+
+def make_dialogue(*lines):
+    return {'title': 'T', 'lines': [{'c': line, 's': 'A'} for line in lines]}
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestShingles(unittest.TestCase):
+    def test_dialogue_text(self):
+        self.assertEqual(dialogue_text(make_dialogue('你好！', '我很好，谢谢。')), '你好\n我很好谢谢')
+        self.assertEqual(dialogue_text({'title': 'T'}), '')
+
+    def test_shingles(self):
+        self.assertEqual(len(shingles('我很好谢谢')), 3)
+        # Lines don't run into each other, and short lines are one shingle
+        self.assertEqual(shingles('你好\n我很好'), shingles('你好') | shingles('我很好'))
+        self.assertEqual(len(shingles('你好')), 1)
+        self.assertEqual(shingles(''), set())
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestMinHash(unittest.TestCase):
+    def test_signature_agreement_estimates_jaccard(self):
+        a = set(range(1000))
+        b = set(range(500, 1500))
+        signatures = MinHasher(num_perm=256).signatures([a, b, set(), a])
+        self.assertEqual(signatures.shape, (4, 256))
+        agreement = np.mean(signatures[0] == signatures[1])
+        self.assertAlmostEqual(agreement, jaccard(a, b), delta=0.1)
+        self.assertTrue(np.array_equal(signatures[0], signatures[3]))
+        self.assertFalse(np.any(signatures[2] == signatures[0]))
+
+    def test_choose_bands(self):
+        bands, rows = choose_bands(128, 0.8)
+        self.assertEqual(bands * rows, 128)
+        self.assertLessEqual((1 / bands) ** (1 / rows), 0.8)
+
+    def test_clusters_from_pairs(self):
+        self.assertEqual(clusters_from_pairs(6, [(4, 1), (1, 3), (0, 5)]), [[0, 5], [1, 3, 4]])
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestFindNearDuplicates(unittest.TestCase):
+    def test_clusters(self):
+        original = '我们今天下午去北京看朋友\n好的我们几点出发'
+        texts = [
+            original,
+            '你喜欢喝什么茶\n我喜欢喝绿茶',
+            original.replace('今天', '明天'),
+            '',
+            original,
+            '',
+        ]
+        self.assertEqual(find_near_duplicates(texts, threshold=0.6), [[0, 2, 4]])
+        self.assertEqual(find_near_duplicates(texts, threshold=1.0), [[0, 4]])
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestMain(unittest.TestCase):
+    def test_malformed_file_is_reported(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+            f.write('a: [\n')
+        stderr = io.StringIO()
+        try:
+            with mock.patch.object(sys, 'argv', ['dedupe_dialogues.py', f.name]), redirect_stderr(stderr):
+                with self.assertRaises(SystemExit) as context:
+                    main()
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn(f"Error parsing {f.name}", stderr.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
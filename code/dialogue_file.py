@@ -0,0 +1,276 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from parse import Dialogue, DialogueParseError, parse_dialogue_from_dict
+
+INDEX_SUFFIX = '.idx.json'
+INDEX_VERSION = 1
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class DialogueIndex:
+    """
+    Byte offsets of every dialogue in a list-format JSON/YAML dialogue file,
+    or in a JSON Lines file with one dialogue per line.
+
+    Each span is (start, end, column): the dialogue's text is bytes
+    [start, end) of the file, and column is the indentation its first line
+    starts at, which YAML block items need restored before parsing.
+    """
+    def __init__(self, format: str, spans: List[Tuple[int, int, int]], size: int, mtime_ns: int):
+        self.format = format
+        self.spans = spans
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def to_dict(self) -> dict:
+        return {
+            'version': INDEX_VERSION,
+            'format': self.format,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'spans': self.spans,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DialogueIndex':
+        return cls(
+            format=data['format'],
+            spans=[tuple(span) for span in data['spans']],
+            size=data['size'],
+            mtime_ns=data['mtime_ns'],
+        )
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Return True if the index was built for a file with this size and mtime."""
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+def _scan_json(data: bytes) -> List[Tuple[int, int, int]]:
+    """Find the byte span of each element of a top-level JSON array."""
+    # Decoding as latin-1 maps every byte to exactly one character, so string
+    # offsets are byte offsets. UTF-8 continuation bytes are all >= 0x80 and
+    # can never be mistaken for JSON syntax; string contents come out garbled,
+    # but only the positions are kept.
+    text = data.decode('latin-1')
+    decoder = json.JSONDecoder()
+    pos = _JSON_WHITESPACE.match(text, 0).end()
+    if pos == len(text):
+        return []
+    if text[pos] != '[':
+        raise DialogueParseError("Invalid JSON structure. Expected list of dialogues")
+    pos = _JSON_WHITESPACE.match(text, pos + 1).end()
+    spans = []
+    if text.startswith(']', pos):
+        return spans
+    while True:
+        _, end = decoder.raw_decode(text, pos)
+        spans.append((pos, end, 0))
+        pos = _JSON_WHITESPACE.match(text, end).end()
+        if text.startswith(',', pos):
+            pos = _JSON_WHITESPACE.match(text, pos + 1).end()
+        elif text.startswith(']', pos):
+            return spans
+        else:
+            raise DialogueParseError(f"Invalid JSON structure at byte {pos}")
+
+def _scan_json_lines(data: bytes) -> List[Tuple[int, int, int]]:
+    """Find the byte span of each non-empty line of a JSON Lines file."""
+    spans = []
+    start = 0
+    for line in data.splitlines(keepends=True):
+        if line.strip():
+            spans.append((start, start + len(line.rstrip()), 0))
+        start += len(line)
+    return spans
+
+def _load_yaml_chunk(text: str, column: int) -> dict:
+    """Parse one dialogue cut out of a YAML file, re-indented to its original column"""
+    import yaml
+    try:
+        return yaml.safe_load(' ' * column + text)
+    except yaml.YAMLError as e:
+        raise ValueError(str(e))
+
+def _scan_yaml(data: bytes) -> List[Tuple[int, int, int]]:
+    """Find the byte span of each item of a top-level YAML sequence."""
+    text = data.decode('utf-8')
+    spans = []
+    depth = 0
+    item_start = None
+    # YAML marks are character offsets; convert them to byte offsets incrementally
+    char_pos = byte_pos = 0
+
+    def to_bytes(index: int) -> int:
+        nonlocal char_pos, byte_pos
+        byte_pos += len(text[char_pos:index].encode('utf-8'))
+        char_pos = index
+        return byte_pos
+
+    import yaml
+    for event in yaml.parse(text, Loader=yaml.SafeLoader):
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            if depth == 0 and not isinstance(event, yaml.SequenceStartEvent):
+                raise DialogueParseError("Invalid YAML structure. Expected list of dialogues, got a mapping")
+            if depth == 1:
+                item_start = event.start_mark
+            depth += 1
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            depth -= 1
+            if depth == 1:
+                spans.append((to_bytes(item_start.index), to_bytes(event.end_mark.index), item_start.column))
+        elif isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+            if depth == 0:
+                raise DialogueParseError("Invalid YAML structure. Expected list of dialogues")
+            if depth == 1:
+                spans.append((to_bytes(event.start_mark.index), to_bytes(event.end_mark.index),
+                              event.start_mark.column))
+    return spans
+
+def build_index(path: Union[str, Path]) -> DialogueIndex:
+    """
+    Scan a dialogue file once and record where each dialogue starts and ends.
+
+    Raises:
+        DialogueParseError: If the file is not a list of dialogues
+    """
+    path = Path(path)
+    stat = path.stat()
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data.lstrip().startswith(b'{'):
+        # JSON Lines, as generate_dialogues.py writes
+        return DialogueIndex('jsonl', _scan_json_lines(data), stat.st_size, stat.st_mtime_ns)
+    if data.lstrip().startswith(b'['):
+        try:
+            return DialogueIndex('json', _scan_json(data), stat.st_size, stat.st_mtime_ns)
+        except ValueError:
+            # Flow-style YAML that isn't strict JSON
+            pass
+    import yaml
+    try:
+        spans = _scan_yaml(data)
+    except yaml.YAMLError as e:
+        raise DialogueParseError(f"Error indexing {path}: {e}")
+    return DialogueIndex('yaml', spans, stat.st_size, stat.st_mtime_ns)
+
+def index_path_for(path: Union[str, Path]) -> Path:
+    """Return the sidecar index path for a dialogue file."""
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+def load_index(path: Union[str, Path], write_sidecar: bool = True) -> DialogueIndex:
+    """
+    Load the sidecar index for a dialogue file, rebuilding it if it is missing
+    or the file has changed since it was written.
+    """
+    path = Path(path)
+    sidecar = index_path_for(path)
+    stat = path.stat()
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == INDEX_VERSION:
+            index = DialogueIndex.from_dict(data)
+            if index.matches(stat):
+                return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(path)
+    if write_sidecar:
+        tmp_path = sidecar.with_name(sidecar.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index.to_dict(), f)
+            os.replace(tmp_path, sidecar)
+        except OSError:
+            # Read-only location: keep using the in-memory index
+            pass
+    return index
+
+class DialogueFile:
+    """
+    Lazy, random-access view of a list-format dialogue file.
+
+    Only the byte ranges of requested dialogues are read and parsed, so
+    len() and range access cost O(range) once the index exists. With
+    cache=True parsed dialogues are kept and never read twice.
+    """
+    def __init__(self, path: Union[str, Path], write_index: bool = True, cache: bool = False):
+        self.path = Path(path)
+        self.index = load_index(self.path, write_index)
+        self._parsed: Optional[Dict[int, Dialogue]] = {} if cache else None
+
+    def __len__(self) -> int:
+        return len(self.index.spans)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dialogue, List[Dialogue]]:
+        if isinstance(key, slice):
+            return [dialogue for _, dialogue in self.select(range(*key.indices(len(self))))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("dialogue index out of range")
+        return next(self.select([key]))[1]
+
+    def __iter__(self) -> Iterator[Dialogue]:
+        for _, dialogue in self.select(range(len(self))):
+            yield dialogue
+
+    def select(self, indices: Iterable[int]) -> Iterator[Tuple[int, Dialogue]]:
+        """
+        Parse only the dialogues at the given indices, yielding (index, dialogue)
+        pairs in the order the indices are given.
+
+        Raises:
+            IndexError: If an index is out of range
+            DialogueParseError: If a selected dialogue is invalid
+        """
+        if self._parsed is None:
+            yield from self._read(indices)
+            return
+
+        indices = list(indices)
+        missing = [i for i in dict.fromkeys(indices) if i not in self._parsed]
+        for i, dialogue in self._read(missing):
+            self._parsed[i] = dialogue
+        for i in indices:
+            yield i, self._parsed[i]
+
+    def _read(self, indices: Iterable[int]) -> Iterator[Tuple[int, Dialogue]]:
+        indices = list(indices)
+        if not indices:
+            return
+        spans = self.index.spans
+        for i in indices:
+            if not 0 <= i < len(spans):
+                raise IndexError(f"dialogue index {i} out of range")
+
+        with open(self.path, 'rb') as f:
+            if indices == list(range(indices[0], indices[0] + len(indices))):
+                # Contiguous range: read one block covering all of it
+                block_start = spans[indices[0]][0]
+                f.seek(block_start)
+                block = f.read(spans[indices[-1]][1] - block_start)
+                chunks = [block[spans[i][0] - block_start:spans[i][1] - block_start] for i in indices]
+            else:
+                chunks = []
+                for i in indices:
+                    f.seek(spans[i][0])
+                    chunks.append(f.read(spans[i][1] - spans[i][0]))
+
+        for i, chunk in zip(indices, chunks):
+            column = spans[i][2]
+            text = chunk.decode('utf-8')
+            try:
+                if self.index.format in ('json', 'jsonl'):
+                    dialogue_dict = json.loads(text)
+                else:
+                    dialogue_dict = _load_yaml_chunk(text, column)
+                yield i, parse_dialogue_from_dict(dialogue_dict)
+            except (ValueError, DialogueParseError) as e:
+                raise DialogueParseError(f"Error in dialogue {i}: {str(e)}")
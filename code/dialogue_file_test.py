@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from parse import Dialogue, DialogueLine, DialogueParseError, save_dialogues
+from dialogue_file import DialogueFile, build_index, index_path_for, load_index
+
+class TestDialogueFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.dialogues = [
+            Dialogue(title=f"Диалог {i}", lines=[
+                DialogueLine(chinese=f"你好{i}！", speaker="A", translation="Привет"),
+                DialogueLine(chinese="再见。", speaker="B"),
+            ])
+            for i in range(5)
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name: str, format: str) -> Path:
+        path = self.dir / name
+        save_dialogues(self.dialogues, path, format=format)
+        return path
+
+    def test_json_len_and_slicing(self):
+        dialogue_file = DialogueFile(self.write("d.json", "json"))
+        self.assertEqual(len(dialogue_file), 5)
+        self.assertEqual(dialogue_file[2], self.dialogues[2])
+        self.assertEqual(dialogue_file[-1], self.dialogues[-1])
+        self.assertEqual(dialogue_file[1:4], self.dialogues[1:4])
+        self.assertEqual(list(dialogue_file), self.dialogues)
+
+    def test_json_lines_len_and_slicing(self):
+        dialogue_file = DialogueFile(self.write("d.jsonl", "jsonl"))
+        self.assertEqual(dialogue_file.index.format, "jsonl")
+        self.assertEqual(len(dialogue_file), 5)
+        self.assertEqual(dialogue_file[4], self.dialogues[4])
+        self.assertEqual(dialogue_file[1:3], self.dialogues[1:3])
+
+    def test_yaml_len_and_slicing(self):
+        dialogue_file = DialogueFile(self.write("d.yaml", "yaml"))
+        self.assertEqual(dialogue_file.index.format, "yaml")
+        self.assertEqual(len(dialogue_file), 5)
+        self.assertEqual(dialogue_file[3], self.dialogues[3])
+        self.assertEqual(dialogue_file[::2], self.dialogues[::2])
+
+    def test_select_keeps_indices(self):
+        dialogue_file = DialogueFile(self.write("d.json", "json"))
+        selected = list(dialogue_file.select([4, 0]))
+        self.assertEqual([i for i, _ in selected], [4, 0])
+        self.assertEqual(selected[0][1], self.dialogues[4])
+
+    def test_cache_parses_each_dialogue_once(self):
+        dialogue_file = DialogueFile(self.write("d.json", "json"), cache=True)
+        first = dialogue_file[1:3]
+        self.assertEqual(list(dialogue_file._parsed), [1, 2])
+        self.assertIs(dialogue_file[2], first[1])
+        self.assertEqual([i for i, _ in dialogue_file.select([3, 1, 3])], [3, 1, 3])
+        self.assertEqual(list(dialogue_file), self.dialogues)
+
+    def test_out_of_range(self):
+        dialogue_file = DialogueFile(self.write("d.json", "json"))
+        with self.assertRaises(IndexError):
+            dialogue_file[5]
+
+    def test_sidecar_is_reused_and_refreshed(self):
+        path = self.write("d.json", "json")
+        DialogueFile(path)
+        self.assertTrue(index_path_for(path).exists())
+
+        self.dialogues.append(Dialogue(lines=[DialogueLine(chinese="新的")]))
+        save_dialogues(self.dialogues, path, format='json')
+        # Force a different mtime even on coarse-grained filesystems
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        dialogue_file = DialogueFile(path)
+        self.assertEqual(len(dialogue_file), 6)
+        self.assertEqual(dialogue_file[5].lines[0].chinese, "新的")
+        self.assertEqual(len(load_index(path).spans), 6)
+
+    def test_empty_list(self):
+        path = self.dir / "empty.json"
+        path.write_text("[]\n", encoding='utf-8')
+        self.assertEqual(len(DialogueFile(path)), 0)
+
+    def test_old_dict_format_rejected(self):
+        path = self.dir / "old.yaml"
+        path.write_text("Title:\n- c: 你好\n", encoding='utf-8')
+        with self.assertRaises(DialogueParseError):
+            build_index(path)
+
+    def test_invalid_dialogue_reports_index(self):
+        path = self.dir / "bad.json"
+        path.write_text('[{"lines": [{"c": "你好"}]}, {"title": "no lines"}]', encoding='utf-8')
+        dialogue_file = DialogueFile(path)
+        self.assertEqual(dialogue_file[0].lines[0].chinese, "你好")
+        with self.assertRaises(DialogueParseError) as context:
+            dialogue_file[1]
+        self.assertTrue("Error in dialogue 1" in str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+import argparse
+import math
+import re
+import sys
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO
+
+from parse import DialogueParseError
+from session import get_session
+from find_unknown_words import get_default_vocabulary_path
+
+HANZI_RUN_RE = re.compile(r'[㐀-䶿一-鿿]+')
+# Joins runs of hanzi in the corpus text; n-grams never contain it
+SEPARATOR = '\n'
+
+class Candidate(NamedTuple):
+    word: str
+    freq: int
+    pmi: float  # log2 of how much more often the word occurs than its weakest split predicts
+    left_entropy: float  # bits; how freely the word combines with the preceding character
+    right_entropy: float
+
+    @property
+    def score(self) -> float:
+        # Words hold together inside (PMI) and combine freely outside (branching entropy)
+        return self.pmi + min(self.left_entropy, self.right_entropy)
+
+def corpus_text(texts: Iterable[str]) -> str:
+    """Runs of hanzi from texts joined by SEPARATOR, with a separator at each end"""
+    runs = []
+    for text in texts:
+        runs.extend(HANZI_RUN_RE.findall(text))
+    return SEPARATOR + SEPARATOR.join(runs) + SEPARATOR
+
+def build_suffix_array(text: str, depth: int) -> List[int]:
+    """
+    Start positions of the non-separator suffixes of text, sorted by their
+    first depth characters, which is all the n-gram statistics up to that
+    length need. Sorting the short prefixes is O(n log n) in C.
+    """
+    positions = [i for i, char in enumerate(text) if char != SEPARATOR]
+    positions.sort(key=lambda i: text[i:i + depth])
+    return positions
+
+def lcp_array(text: str, suffixes: List[int], depth: int) -> List[int]:
+    """Common prefix length (up to depth, not counting separators) of each suffix and the one before it"""
+    lcp = [0] * len(suffixes)
+    for k in range(1, len(suffixes)):
+        a, b = suffixes[k - 1], suffixes[k]
+        n = 0
+        while n < depth and text[a + n] == text[b + n] and text[a + n] != SEPARATOR:
+            n += 1
+        lcp[k] = n
+    return lcp
+
+def entropy(counts: Counter) -> float:
+    total = sum(counts.values())
+    return -sum(c / total * math.log2(c / total) for c in counts.values())
+
+class WordDiscovery:
+    """
+    N-gram statistics over a corpus from one truncated suffix array.
+
+    Every occurrence of an n-gram is a run of adjacent suffixes whose common
+    prefix is at least n long, so one scan per length gives each n-gram's
+    frequency, and the characters before and after its occurrences give its
+    left and right branching entropy. Sentence boundaries count as distinct
+    neighbours.
+    """
+    def __init__(self, texts: Iterable[str], max_len: int = 4, min_freq: int = 3):
+        self.text = corpus_text(texts)
+        self.max_len = max_len
+        self.min_freq = min_freq
+        self.size = len(self.text) - self.text.count(SEPARATOR)
+        self.suffixes = build_suffix_array(self.text, max_len)
+        self.lcp = lcp_array(self.text, self.suffixes, max_len)
+        self.counts: Dict[str, int] = {}
+        self.neighbours: Dict[str, tuple] = {}
+        self._count()
+
+    def _count(self) -> None:
+        text, suffixes, lcp = self.text, self.suffixes, self.lcp
+        for n in range(1, self.max_len + 1):
+            start = 0
+            for k in range(1, len(suffixes) + 1):
+                if k < len(suffixes) and lcp[k] >= n:
+                    continue
+                freq = k - start
+                position = suffixes[start]
+                gram = text[position:position + n]
+                if freq >= self.min_freq and SEPARATOR not in gram:
+                    self.counts[gram] = freq
+                    if n > 1:
+                        self.neighbours[gram] = (
+                            # Boundaries are all different neighbours
+                            Counter(text[i - 1] if text[i - 1] != SEPARATOR else i for i in suffixes[start:k]),
+                            Counter(text[i + n] if text[i + n] != SEPARATOR else i for i in suffixes[start:k]),
+                        )
+                start = k
+
+    def pmi(self, gram: str) -> float:
+        """Pointwise mutual information of the weakest way to split gram in two"""
+        p = self.counts[gram] / self.size
+        return min(
+            math.log2(p / (self.counts[gram[:i]] / self.size * self.counts[gram[i:]] / self.size))
+            for i in range(1, len(gram))
+        )
+
+    def candidates(self, min_pmi: float = 1.0, min_entropy: float = 1.0) -> Iterator[Candidate]:
+        """Multi-character n-grams that pass the frequency, PMI and entropy thresholds"""
+        for gram, (left, right) in self.neighbours.items():
+            left_entropy, right_entropy = entropy(left), entropy(right)
+            if min(left_entropy, right_entropy) < min_entropy:
+                continue
+            pmi = self.pmi(gram)
+            if pmi >= min_pmi:
+                yield Candidate(gram, self.counts[gram], pmi, left_entropy, right_entropy)
+
+def rank_new_words(discovery: WordDiscovery, is_known, min_pmi: float = 1.0, min_entropy: float = 1.0,
+                   limit: Optional[int] = None) -> List[Candidate]:
+    """Candidates not accepted by is_known, best score first"""
+    ranked = sorted(
+        (c for c in discovery.candidates(min_pmi, min_entropy) if not is_known(c.word)),
+        key=lambda c: (-c.score, -c.freq, c.word),
+    )
+    return ranked if limit is None else ranked[:limit]
+
+def iter_corpus_texts(paths: Iterable[str]) -> Iterator[str]:
+    """Chinese text of every line in dialogue files, or in book texts (.txt) read with import_book"""
+    for path in paths:
+        if path.endswith('.txt'):
+            from import_book import iter_book_dialogues
+            with open(path, 'r', encoding='utf-8') as f:
+                for dialogue in iter_book_dialogues(f):
+                    yield from (line.chinese for line in dialogue.lines)
+        else:
+            for dialogue in get_session().dialogue_file(path):
+                yield from (line.chinese for line in dialogue.lines)
+
+def write_candidates(candidates: List[Candidate], output: TextIO) -> None:
+    output.write("word\tfreq\tpmi\tleft_entropy\tright_entropy\tscore\n")
+    for c in candidates:
+        output.write(f"{c.word}\t{c.freq}\t{c.pmi:.2f}\t{c.left_entropy:.2f}\t{c.right_entropy:.2f}\t{c.score:.2f}\n")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find likely words missing from the vocabulary: frequent n-grams that hold together '
+                    '(PMI) and combine freely with their neighbours (branching entropy)')
+    parser.add_argument('files', nargs='+',
+                        help='Dialogue files (YAML/JSON) and book texts (.txt, read like import_book.py)')
+    parser.add_argument('--vocabulary',
+                        help='Known words to leave out (default: ../words/10K.txt)')
+    parser.add_argument('--max-len', type=int, default=4, help='Longest candidate in characters (default: 4)')
+    parser.add_argument('--min-freq', type=int, default=3, help='Minimum occurrences (default: 3)')
+    parser.add_argument('--min-pmi', type=float, default=1.0, help='Minimum PMI in bits (default: 1.0)')
+    parser.add_argument('--min-entropy', type=float, default=1.0,
+                        help='Minimum left and right branching entropy in bits (default: 1.0)')
+    parser.add_argument('--top', type=int, help='Only print the best N candidates')
+    args = parser.parse_args()
+
+    if args.max_len < 2:
+        parser.error('--max-len must be at least 2')
+
+    try:
+        known = get_session().word_set(args.vocabulary or get_default_vocabulary_path())
+    except Exception as e:
+        print(f"Error processing vocabulary file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        discovery = WordDiscovery(iter_corpus_texts(args.files), args.max_len, args.min_freq)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    except DialogueParseError as e:
+        print(f"Error parsing dialogues: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    candidates = rank_new_words(discovery, known.__contains__, args.min_pmi, args.min_entropy, args.top)
+    write_candidates(candidates, sys.stdout)
+    print(f"{discovery.size} characters, {len(candidates)} candidates", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import unittest
+from collections import Counter
+from discover_words import SEPARATOR, WordDiscovery, build_suffix_array, corpus_text, lcp_array, rank_new_words
+
+TEXTS = [
+    "我喜欢长城。", "长城很长！", "你去过长城吗？", "他们在长城上。", "我们看长城吧",
+    "我喜欢你。", "你喜欢他吗？", "他喜欢我们", "喜欢就好",
+]
+
+class TestSuffixArray(unittest.TestCase):
+    def test_corpus_text(self):
+        self.assertEqual(corpus_text(["你好，世界！", "abc 再见"]), "\n你好\n世界\n再见\n")
+
+    def test_sorted_suffixes(self):
+        text = corpus_text(["香蕉香蕉"])
+        suffixes = build_suffix_array(text, 4)
+        self.assertEqual([text[i:] for i in suffixes], ["蕉\n", "蕉香蕉\n", "香蕉\n", "香蕉香蕉\n"])
+        self.assertEqual(lcp_array(text, suffixes, 4), [0, 1, 0, 2])
+
+class TestWordDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.discovery = WordDiscovery(TEXTS, max_len=3, min_freq=2)
+
+    def test_counts_match_naive_count(self):
+        text = corpus_text(TEXTS)
+        naive = Counter(text[i:i + n] for n in range(1, 4) for i in range(len(text) - n + 1)
+                        if SEPARATOR not in text[i:i + n])
+        self.assertEqual(self.discovery.counts, {gram: c for gram, c in naive.items() if c >= 2})
+
+    def test_ranks_unknown_words(self):
+        words = [c.word for c in rank_new_words(self.discovery, {'喜欢', '我们'}.__contains__,
+                                                min_pmi=0, min_entropy=1.0)]
+        self.assertEqual(words[0], '长城')
+        self.assertNotIn('喜欢', words)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import enum
+import re
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+from xml.sax.saxutils import unescape
+
+# MPEG-2 Layer III, 64 kbps, 24 kHz, mono: the format Google TTS returns for MP3
+FRAME_HEADER = b'\xff\xf3\x84\xc4'
+FRAME_LENGTH = 192
+FRAME_SECONDS = 576 / 24000
+
+SILENCE = 0
+
+_SSML_TOKEN = re.compile(r'<mark name="([^"]*)"\s*/>|<break time="(\d+)ms"\s*/>|<[^>]*>|([^<]+)')
+
+def make_frames(count: int, fill: int) -> bytes:
+    """Build count valid MP3 frames whose payload bytes are all fill"""
+    return (FRAME_HEADER + bytes([fill]) * (FRAME_LENGTH - len(FRAME_HEADER))) * count
+
+def frame_fills(audio: bytes) -> List[int]:
+    """Payload marker of each frame made by make_frames"""
+    return [audio[i + len(FRAME_HEADER)] for i in range(0, len(audio), FRAME_LENGTH)]
+
+class _Message(SimpleNamespace):
+    """Request message built from keyword fields, like the proto-plus types"""
+
+class _SynthesizeSpeechRequest(_Message):
+    class TimepointType(enum.IntEnum):
+        TIMEPOINT_TYPE_UNSPECIFIED = 0
+        SSML_MARK = 1
+
+# Stand-in for the request types of google.cloud.texttospeech_v1beta1, for
+# DialogueTTSGenerator(client=FakeTextToSpeechClient(), texttospeech=texttospeech)
+texttospeech = SimpleNamespace(
+    SynthesisInput=_Message,
+    VoiceSelectionParams=_Message,
+    AudioConfig=_Message,
+    SynthesizeSpeechRequest=_SynthesizeSpeechRequest,
+    AudioEncoding=SimpleNamespace(MP3=2),
+)
+
+class FakeTextToSpeechClient:
+    """
+    In-process stand-in for texttospeech_v1beta1.TextToSpeechAsyncClient.
+
+    Produces well-formed MP3 frames: each text run is seconds_per_char long
+    per character (scaled by speaking_rate) and breaks are silence. Frames of
+    the n-th text run (counting from 1) carry the payload byte n, silence
+    carries 0, so tests can check exactly where audio was cut. SSML marks get
+    timepoints offset by mark_jitter seconds, like the off-frame-boundary
+    times the real service returns.
+
+    latency and max_concurrent simulate a server with a per-connection
+    concurrent stream limit.
+    """
+    def __init__(self, seconds_per_char: float = 0.2, latency: float = 0.0,
+                 max_concurrent: Optional[int] = None, mark_jitter: float = 0.004):
+        self.seconds_per_char = seconds_per_char
+        self.latency = latency
+        self.mark_jitter = mark_jitter
+        self.requests: List[SimpleNamespace] = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self._streams = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+    def _render(self, text: Optional[str], ssml: Optional[str], speaking_rate: float) -> Tuple[bytes, list]:
+        frames_per_char = self.seconds_per_char / (speaking_rate or 1.0) / FRAME_SECONDS
+        audio = bytearray()
+        timepoints = []
+        runs = 0
+
+        def speak(chunk: str) -> None:
+            nonlocal runs
+            runs += 1
+            audio.extend(make_frames(max(1, round(len(chunk) * frames_per_char)), runs % 256 or 1))
+
+        if ssml is None:
+            speak(text)
+            return bytes(audio), timepoints
+
+        for mark, break_ms, chunk in _SSML_TOKEN.findall(ssml):
+            if mark:
+                position = len(audio) // FRAME_LENGTH * FRAME_SECONDS
+                timepoints.append(SimpleNamespace(mark_name=mark, time_seconds=position + self.mark_jitter))
+            elif break_ms:
+                audio.extend(make_frames(round(int(break_ms) / 1000 / FRAME_SECONDS), SILENCE))
+            elif chunk.strip():
+                speak(unescape(chunk.strip()))
+        return bytes(audio), timepoints
+
+    async def synthesize_speech(self, request=None, *, input=None, voice=None, audio_config=None, **kwargs):
+        if request is not None:
+            input, voice, audio_config = request.input, request.voice, request.audio_config
+        self.requests.append(SimpleNamespace(input=input, voice=voice, audio_config=audio_config))
+
+        if self._streams:
+            await self._streams.acquire()
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            audio, timepoints = self._render(getattr(input, 'text', None) or None,
+                                             getattr(input, 'ssml', None) or None,
+                                             getattr(audio_config, 'speaking_rate', 1.0))
+        finally:
+            self.inflight -= 1
+            if self._streams:
+                self._streams.release()
+        return SimpleNamespace(audio_content=audio, timepoints=timepoints)
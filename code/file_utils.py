@@ -0,0 +1,38 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+@contextmanager
+def atomic_output(path: Path, mode: str = 'w', encoding: str = 'utf-8') -> Iterator[IO]:
+    """
+    Open a file for streaming output that replaces path only once the block
+    completes: readers only ever see the old file or the complete new one.
+    Writes go to a hidden temp file in the same directory, which is fsynced
+    and renamed over path, or removed if the block raises.
+    """
+    try:
+        file_mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        file_mode = 0o644
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        # mkstemp creates files readable only by the owner; keep the usual permissions
+        os.fchmod(fd, file_mode)
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as out:
+            yield out
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+def write_file_atomic(path: Path, data: bytes) -> None:
+    """Write data to path so that readers only ever see the old file or the complete new one"""
+    with atomic_output(path, 'wb') as out:
+        out.write(data)
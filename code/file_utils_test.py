@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from file_utils import atomic_output, write_file_atomic
+
+class TestAtomicWrites(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.path = self.dir / 'audio.mp3'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_write_leaves_no_temp_file(self):
+        write_file_atomic(self.path, b'first')
+        write_file_atomic(self.path, b'second')
+        self.assertEqual(self.path.read_bytes(), b'second')
+        self.assertEqual(os.listdir(self.dir), ['audio.mp3'])
+
+    def test_final_name_appears_only_after_rename(self):
+        seen = []
+        real_replace = os.replace
+
+        def replace(source, target):
+            # The complete data is in the temp file, and nothing is under the final name yet
+            seen.append((Path(source).read_bytes(), Path(target).exists()))
+            real_replace(source, target)
+
+        with mock.patch('file_utils.os.replace', side_effect=replace):
+            write_file_atomic(self.path, b'mp3 data')
+        self.assertEqual(seen, [(b'mp3 data', False)])
+        self.assertEqual(self.path.read_bytes(), b'mp3 data')
+
+    def test_failed_write_keeps_old_file(self):
+        self.path.write_bytes(b'old')
+        with self.assertRaises(RuntimeError):
+            with atomic_output(self.path, 'wb') as out:
+                out.write(b'partial')
+                raise RuntimeError('disk full')
+        self.assertEqual(self.path.read_bytes(), b'old')
+        self.assertEqual(os.listdir(self.dir), ['audio.mp3'])
+
+    def test_keeps_permissions(self):
+        self.path.write_bytes(b'old')
+        self.path.chmod(0o640)
+        write_file_atomic(self.path, b'new')
+        self.assertEqual(self.path.stat().st_mode & 0o777, 0o640)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,16 +2,75 @@
 import argparse
 import sys
 import os
-from typing import Set
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
 import random
-from parse import DialogueParseError, parse_dialogues
-from text_utils import read_word_list, extract_words_with_trie, extract_dialogue_words_with_trie
-from trie import build_trie_from_words
+from parse import DialogueParseError
+from session import get_session
+from text_utils import extract_dialogue_words_with_trie
 
 def find_unknown_words(known_words: Set[str], dialogue_words: Set[str]) -> Set[str]:
     """Find all words in dialogue_words that aren't in known_words."""
     return dialogue_words - known_words
 
+class WordListIndex:
+    """
+    Several known-word lists over shared word IDs. Each word has a bitmask of
+    the lists containing it, and each list is a bitset over word IDs, so a set
+    of dialogue words is checked against every list with one integer AND per
+    list instead of one set lookup per word per list.
+    """
+    def __init__(self):
+        self.names: List[str] = []
+        self.word_ids: Dict[str, int] = {}
+        self.masks: List[int] = []  # word ID -> bitmask of lists
+        self.list_bits: List[int] = []  # list index -> bitset of word IDs
+
+    def word_id(self, word: str) -> int:
+        """ID of word, assigning a new one to words not seen before"""
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = self.word_ids[word] = len(self.masks)
+            self.masks.append(0)
+        return word_id
+
+    def add_list(self, name: str, words: Iterable[str]) -> None:
+        bit = 1 << len(self.names)
+        bits = 0
+        for word in words:
+            word_id = self.word_id(word)
+            self.masks[word_id] |= bit
+            bits |= 1 << word_id
+        self.names.append(name)
+        self.list_bits.append(bits)
+
+    def mask(self, word: str) -> int:
+        """Bitmask of the lists containing word (bit i is list i)"""
+        word_id = self.word_ids.get(word)
+        return 0 if word_id is None else self.masks[word_id]
+
+    def bitset(self, words: Iterable[str]) -> int:
+        """Bitset of the IDs of words; words in no list have no ID and are left out"""
+        word_ids = self.word_ids
+        bits = 0
+        for word in words:
+            word_id = word_ids.get(word)
+            if word_id is not None:
+                bits |= 1 << word_id
+        return bits
+
+    def unknown_counts(self, words: Set[str]) -> List[int]:
+        """Number of words missing from each list"""
+        bits = self.bitset(words)
+        # Words in no list at all are missing from every one
+        outside = sum(1 for word in words if word not in self.word_ids)
+        return [(bits & ~list_bits).bit_count() + outside for list_bits in self.list_bits]
+
+    def unknown_in_any(self, words: Iterable[str]) -> List[str]:
+        """Words missing from at least one list"""
+        full = (1 << len(self.names)) - 1
+        return [word for word in words if self.mask(word) != full]
+
 def get_default_vocabulary_path() -> str:
     """Get the default path for vocabulary relative to this script."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,10 +80,17 @@ def main():
     parser = argparse.ArgumentParser(description='Find words in dialogues that aren\'t in the provided word list')
     parser.add_argument('--vocabulary',
                         help='File containing vocabulary for word segmentation (default: ../words/10K.txt)')
-    parser.add_argument('--wordlist', required=True,
-                        help='File containing known words to check against')
+    parser.add_argument('--wordlist', required=True, nargs='+',
+                        help='Files containing known words to check against; with several, print a table of '
+                             'unknown words by list with per-list counts')
     parser.add_argument('--dialogue', required=True,
                         help='YAML file containing dialogues')
+    parser.add_argument('--gloss', nargs='?', const='', metavar='FILE',
+                        help='Add pinyin and gloss columns from a hanzi,pinyin,gloss word list '
+                             '(default: ../words/10k-expl.txt)')
+    parser.add_argument('--suggest', type=int, metavar='DISTANCE',
+                        help='Add a column of up to 5 words from the first word list within this edit '
+                             'distance of each unknown word longer than it, nearest and most frequent first')
     parser.add_argument('--random-order', action='store_true',
                         help='Output words in random order')
     args = parser.parse_args()
@@ -35,25 +101,41 @@ def main():
 
     # Read vocabulary for trie
     try:
-        vocabulary = read_word_list(args.vocabulary)
-        word_trie = build_trie_from_words(vocabulary)
+        word_trie = get_session().trie(args.vocabulary)
     except Exception as e:
         print(f"Error processing vocabulary file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Read word list to check against
+    # Read word lists to check against
+    index = WordListIndex()
     try:
-        known_word_list = read_word_list(args.wordlist)
-        known_words = set(known_word_list)
+        for path in args.wordlist:
+            index.add_list(Path(path).stem, get_session().word_list(path))
     except Exception as e:
         print(f"Error processing word list: {e}", file=sys.stderr)
         sys.exit(1)
 
+    pinyin_index = None
+    if args.gloss is not None:
+        from pinyin_index import get_default_pinyin_path
+        try:
+            pinyin_index = get_session().pinyin_index(args.gloss or get_default_pinyin_path())
+        except Exception as e:
+            print(f"Error processing gloss file: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    def annotate(word: str) -> List[str]:
+        # Empty columns for words the gloss file lacks
+        columns = []
+        if pinyin_index is not None:
+            columns.extend(pinyin_index.lookup(word) or ('', ''))
+        if suggestions is not None:
+            columns.append(' '.join(match for match, _ in suggestions.get(word, [])))
+        return columns
+
     # Read and parse dialogues
     try:
-        with open(args.dialogue, 'r', encoding='utf-8') as f:
-            yaml_text = f.read()
-        dialogues = parse_dialogues(yaml_text)
+        dialogues = get_session().dialogues(args.dialogue)
     except FileNotFoundError:
         print(f"Dialogue file not found: {args.dialogue}", file=sys.stderr)
         sys.exit(1)
@@ -64,20 +146,33 @@ def main():
         print(f"Error reading dialogue file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Extract words from dialogues using vocabulary trie and find ones not in wordlist
+    # Segment the dialogues once and check the words against every list
     dialogue_words = extract_dialogue_words_with_trie(dialogues, word_trie)
-    unknown_words = find_unknown_words(known_words, dialogue_words)
-
-    # Convert to list for output
-    word_list = list(unknown_words)
+    word_list = index.unknown_in_any(dialogue_words)
     if args.random_order:
         random.shuffle(word_list)
     else:
         word_list.sort()
 
-    # Print results
+    suggestions = None
+    if args.suggest is not None:
+        # One walk of the known-word trie for all unknown words. Words no longer
+        # than the distance would match any word of their length, so skip them.
+        suggestions = get_session().trie(args.wordlist[0]).fuzzy_search_many(
+            [word for word in word_list if len(word) > args.suggest], args.suggest, limit=5)
+
+    if len(index.names) == 1:
+        for word in word_list:
+            print('\t'.join([word, *annotate(word)]))
+        return
+
+    # Words x lists table: '-' where the list lacks the word
+    extra = (['pinyin', 'gloss'] if args.gloss is not None else []) + (['suggestions'] if args.suggest is not None else [])
+    print('\t'.join(['word', *index.names, *extra]))
     for word in word_list:
-        print(word)
+        mask = index.mask(word)
+        print('\t'.join([word, *('+' if mask >> i & 1 else '-' for i in range(len(index.names))), *annotate(word)]))
+    print('\t'.join(['unknown', *map(str, index.unknown_counts(dialogue_words))]))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
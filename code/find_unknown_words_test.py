@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from find_unknown_words import WordListIndex
+from text_utils import read_word_list
+
+class TestWordListIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = WordListIndex()
+        self.index.add_list('100', ['你', '好', '我'])
+        self.index.add_list('500', ['你', '好', '我', '老师', '学生'])
+
+    def test_masks(self):
+        self.assertEqual(self.index.mask('你'), 0b11)
+        self.assertEqual(self.index.mask('老师'), 0b10)
+        self.assertEqual(self.index.mask('飞机'), 0)
+
+    def test_unknown_counts(self):
+        words = {'你', '老师', '飞机'}
+        self.assertEqual(self.index.unknown_counts(words), [2, 1])
+        # Same answer as checking each list with sets
+        for name, known in (('100', {'你', '好', '我'}), ('500', {'你', '好', '我', '老师', '学生'})):
+            self.assertEqual(self.index.unknown_counts(words)[self.index.names.index(name)], len(words - known))
+
+    def test_unknown_in_any(self):
+        self.assertEqual(sorted(self.index.unknown_in_any({'你', '老师', '飞机'})), ['老师', '飞机'])
+
+    def test_lookups_do_not_grow_the_index(self):
+        size = len(self.index.word_ids)
+        self.assertEqual(self.index.unknown_counts({'飞机', '火车', '你'}), [2, 2])
+        self.assertEqual(self.index.bitset(['飞机']), 0)
+        self.assertEqual(len(self.index.word_ids), size)
+        self.assertEqual(len(self.index.masks), size)
+
+class TestReadWordList(unittest.TestCase):
+    def read(self, content: str):
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as f:
+            f.write(content)
+        try:
+            return read_word_list(f.name)
+        finally:
+            os.unlink(f.name)
+
+    def test_one_word_per_line(self):
+        self.assertEqual(self.read("的\n\n我们。\n 老师 \n"), ['的', '我们', '老师'])
+
+    def test_comma_separated(self):
+        # Like words/500.txt: a single line, with ASCII or full-width commas
+        self.assertEqual(self.read("的,我,你，老师, 学生,\n"), ['的', '我', '你', '老师', '学生'])
+
+if __name__ == '__main__':
+    unittest.main()
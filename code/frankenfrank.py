@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import argparse
+import importlib
+import shlex
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Subcommand -> ('module:function', help). Modules are only imported when their
+# command runs, so `frankenfrank --help` never loads PyYAML, numpy or the Google client.
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    'tts': ('tts:cli', 'Generate normal and slow TTS audio for dialogue files'),
+    'brief': ('brief:main', 'Print Chinese lines from dialogues'),
+    'unknown-words': ('find_unknown_words:main', "Find words in dialogues that aren't in a word list"),
+    'unique-words': ('print_unique_words:main', 'Extract words from dialogues using a word list'),
+    'word-stats': ('word_stats:main', 'Word frequency, document frequency and n-gram counts'),
+    'complete': ('complete_words:main', 'Most frequent vocabulary words starting with a prefix'),
+    'pinyin': ('pinyin_index:main', 'Look up vocabulary words by pinyin, with glosses'),
+    'discover-words': ('discover_words:main', 'Rank likely words missing from the vocabulary'),
+    'generate': ('generate_dialogues:main', 'Generate dialogues with an LLM from a prompt template and word list'),
+    'build': ('build:cli', 'Build the dialogue files listed in www/index.yaml and publish them'),
+    'check-pinyin': ('check_pinyin:main', "Report dialogue lines whose pinyin doesn't match their hanzi"),
+    'validate': ('validate_dialogues:main', 'Check dialogue files and report all problems at once'),
+    'convert': ('convert_dialogues:main', 'Convert dialogue files from old YAML to new JSON format'),
+    'import-book': ('import_book:main', 'Import dialogues from a book text such as Chinese_Every_Day.txt'),
+    'dedupe': ('dedupe_dialogues:main', 'Find near-duplicate dialogues and drop them before TTS'),
+    'drop-audio': ('drop_a_as:main', 'Remove audio attributes from dialogue JSON'),
+    'postprocess': ('audio_postprocess:main', 'Trim silence and normalize loudness of generated MP3s'),
+    'tts-pool-bench': ('tts_pool_bench:main', 'Measure TTS throughput with several client channels'),
+    'stretch-bench': ('stretch_bench:main', 'Compare locally time-stretched slow audio with API slow audio'),
+    'import-bench': ('import_bench:main', 'Measure import time of each command'),
+}
+
+def run_command(command: str, argv: List[str]) -> None:
+    """Run a subcommand's entry function as if its script were started with argv"""
+    module_name, function_name = COMMANDS[command][0].split(':')
+    function = getattr(importlib.import_module(module_name), function_name)
+    saved_argv = sys.argv
+    sys.argv = [f"frankenfrank {command}", *argv]
+    try:
+        function()
+    finally:
+        sys.argv = saved_argv
+
+def commands_help() -> str:
+    return '\n'.join(f"  {name:<15} {help}" for name, (_, help) in COMMANDS.items())
+
+def run_line(line: str, show_time: bool = False) -> int:
+    """
+    Run one 'command args...' line of a REPL session or batch script and
+    return its exit status. Errors are reported instead of ending the session.
+    """
+    try:
+        argv = shlex.split(line, comments=True)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not argv:
+        return 0
+    command, *rest = argv
+
+    if command == 'help':
+        print(f"commands:\n{commands_help()}\n  {'cache':<15} Show files loaded in this session\n"
+              f"  {'quit':<15} Leave the REPL")
+        return 0
+    if command == 'cache':
+        from session import get_session
+        for cache_line in get_session().describe():
+            print(cache_line)
+        return 0
+    if command not in COMMANDS:
+        print(f"Unknown command: {command} (try 'help')", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    try:
+        run_command(command, rest)
+        status = 0
+    except SystemExit as e:
+        # Commands exit through sys.exit() and argparse errors
+        if e.code is None or isinstance(e.code, int):
+            status = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except Exception as e:
+        print(f"Error in {command}: {e}", file=sys.stderr)
+        status = 1
+    sys.stdout.flush()
+    if show_time:
+        print(f"[{command}: {time.perf_counter() - started:.3f}s]", file=sys.stderr)
+    return status
+
+def run_batch(lines: Iterable[str], show_time: bool = False, keep_going: bool = False) -> int:
+    """Run script lines in order, stopping at the first failure unless keep_going"""
+    failures = 0
+    for number, line in enumerate(lines, 1):
+        status = run_line(line, show_time)
+        if status:
+            print(f"Line {number} failed with status {status}: {line.strip()}", file=sys.stderr)
+            if not keep_going:
+                return status
+            failures += 1
+    return 1 if failures else 0
+
+def repl(show_time: bool = False) -> None:
+    try:
+        import readline  # noqa: F401 (line editing and history for input())
+    except ImportError:
+        pass
+    print("frankenfrank REPL: files stay loaded between commands. Type 'help' or 'quit'.")
+    while True:
+        try:
+            line = input('frankenfrank> ')
+        except EOFError:
+            print()
+            return
+        except KeyboardInterrupt:
+            print()
+            continue
+        if line.strip() in ('quit', 'exit'):
+            return
+        try:
+            run_line(line, show_time)
+        except KeyboardInterrupt:
+            print("Interrupted", file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='frankenfrank',
+        description='Dialogue, vocabulary and audio tools. Run "frankenfrank <command> --help" for command options. '
+                    'With --repl or --batch, many commands run in one process and share loaded word lists, '
+                    'tries and dialogue files.',
+        epilog=f"commands:\n{commands_help()}",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('command', nargs='?', choices=COMMANDS, metavar='command',
+                        help='One of the commands listed below')
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help='Arguments for the command')
+    parser.add_argument('--repl', action='store_true',
+                        help='Read commands interactively')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Run commands from FILE, one per line ('-' for stdin, '#' starts a comment)")
+    parser.add_argument('--keep-going', action='store_true',
+                        help='With --batch, run the remaining lines after a command fails')
+    parser.add_argument('--time', action='store_true',
+                        help='Print how long each command took in --repl and --batch modes')
+    args = parser.parse_args(argv)
+
+    if args.repl or args.batch:
+        if args.command or (args.repl and args.batch):
+            parser.error('--repl and --batch take no command and exclude each other')
+        if args.repl:
+            repl(args.time)
+            return
+        if args.batch == '-':
+            lines = sys.stdin
+        else:
+            try:
+                with open(args.batch, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                print(f"Batch file not found: {args.batch}", file=sys.stderr)
+                sys.exit(1)
+        sys.exit(run_batch(lines, args.time, args.keep_going))
+
+    if not args.command:
+        parser.error('a command, --repl or --batch is required')
+    run_command(args.command, args.args)
+
+if __name__ == '__main__':
+    main()
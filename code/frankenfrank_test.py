@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from pathlib import Path
+from parse import Dialogue, DialogueLine, save_dialogues
+from frankenfrank import run_batch, run_line
+from session import get_session
+
+class TestFrankenfrank(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.dialogues = self.dir / "d.json"
+        save_dialogues([Dialogue(title="T", lines=[DialogueLine(chinese="你好我们", speaker="A")])],
+                       self.dialogues)
+        self.words = self.dir / "words.txt"
+        self.words.write_text("你好\n我们\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_script(self, lines, **kwargs):
+        out, err = StringIO(), StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = run_batch(lines, **kwargs)
+        return status, out.getvalue(), err.getvalue()
+
+    def test_batch_shares_session(self):
+        misses = get_session().misses
+        command = f"unique-words -d '{self.dialogues}' -w '{self.words}'"
+        status, out, _ = self.run_script([command, "# comment", "", command])
+        self.assertEqual(status, 0)
+        self.assertEqual(out, "你好\n我们\n" * 2)
+        # The word list, trie and dialogue file were loaded by the first command only
+        self.assertEqual(get_session().misses - misses, 3)
+
+    def test_batch_stops_at_failure(self):
+        lines = [f"brief -d '{self.dir / 'missing.json'}'", f"brief -d '{self.dialogues}'"]
+        status, out, err = self.run_script(lines)
+        self.assertEqual(status, 1)
+        self.assertEqual(out, "")
+        self.assertIn("Line 1 failed", err)
+
+        status, out, _ = self.run_script(lines, keep_going=True)
+        self.assertEqual(status, 1)
+        self.assertIn("A: 你好我们", out)
+
+    def test_usage_errors_do_not_exit(self):
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            self.assertEqual(run_line("brief"), 2)
+            self.assertEqual(run_line("nonsense"), 1)
+            self.assertEqual(run_line("help"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, TextIO
+
+from parse import Dialogue, DialogueParseError, parse_dialogues
+from text_utils import WORD_SEPARATOR_RE
+from rate_limit import AsyncRateLimiter, RPSLimiter
+
+# The JSON inside a ```json ... ``` fence of a reply
+FENCE_RE = re.compile(r'```(?:json)?\s*\n(.*?)```', re.DOTALL)
+# Statuses worth retrying; other HTTP errors (bad request, auth) won't get better
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class GenerationRequest(NamedTuple):
+    id: str
+    prompt: str
+    words: List[str]
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'prompt': self.prompt, 'words': self.words}
+
+class BackendError(Exception):
+    """A failed completion request; retryable errors are worth sending again"""
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+def read_words(path: str) -> List[str]:
+    """Words of a word list in file order, without repeats"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(dict.fromkeys(word for word in WORD_SEPARATOR_RE.split(f.read()) if word))
+
+def expand_template(template: str, words: List[str]) -> str:
+    """The template with {words} replaced by the words, or with the words appended as a last line"""
+    text = ', '.join(words)
+    if '{words}' in template:
+        return template.replace('{words}', text)
+    return f"{template.rstrip()}\n\n{text}\n"
+
+def build_requests(template_path: str, words: List[str], chunk_size: int, first_chunk: int = 0,
+                   chunks: Optional[int] = None) -> List[GenerationRequest]:
+    """One request per chunk of chunk_size words, with ids like 'make-dialogues-0003'"""
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template = f.read()
+    stem = Path(template_path).stem
+    starts = range(first_chunk * chunk_size, len(words), chunk_size)
+    if chunks is not None:
+        starts = starts[:chunks]
+    return [
+        GenerationRequest(f"{stem}-{start // chunk_size:04d}", expand_template(template, chunk), chunk)
+        for start in starts
+        for chunk in [words[start:start + chunk_size]]
+    ]
+
+def write_requests(requests: Iterable[GenerationRequest], output: TextIO) -> None:
+    for request in requests:
+        output.write(json.dumps(request.to_dict(), ensure_ascii=False) + '\n')
+
+def read_requests(path: str) -> List[GenerationRequest]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [GenerationRequest(**json.loads(line)) for line in f if line.strip()]
+
+def extract_dialogues(reply: str) -> List[Dialogue]:
+    """
+    Dialogues in a model reply: the JSON in its first code fence, or the
+    whole reply. Raises whatever parse_dialogues raises for invalid JSON or
+    dialogues, and DialogueParseError for an empty list.
+    """
+    match = FENCE_RE.search(reply)
+    dialogues = parse_dialogues(match.group(1) if match else reply)
+    if not dialogues:
+        raise DialogueParseError("Reply contains no dialogues")
+    return dialogues
+
+def is_invalid_reply_error(error: Exception) -> bool:
+    """True for errors extract_dialogues raises on a reply that isn't valid dialogue JSON/YAML"""
+    if isinstance(error, (DialogueParseError, ValueError)):
+        return True
+    # parse imports PyYAML only for replies that aren't JSON, so a YAML error implies it is loaded
+    yaml = sys.modules.get('yaml')
+    return yaml is not None and isinstance(error, yaml.YAMLError)
+
+class HTTPBackend:
+    """
+    An OpenAI-compatible chat completions endpoint. Requests run in worker
+    threads with urllib, so no HTTP client library is needed; max_workers
+    caps how many can be in flight, so it should be at least the
+    generator's concurrency.
+    """
+    def __init__(self, url: str, model: str, api_key: Optional[str] = None, timeout: float = 600.0,
+                 max_workers: int = 16):
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+
+    def _post(self, prompt: str) -> str:
+        import urllib.error
+        import urllib.request
+        body = json.dumps({'model': self.model, 'messages': [{'role': 'user', 'content': prompt}]}).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(self.url, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                reply = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise BackendError(f"HTTP {e.code} from {self.url}", retryable=e.code in RETRYABLE_STATUSES) from e
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise BackendError(f"Cannot reach {self.url}: {e}") from e
+        except ValueError as e:
+            raise BackendError(f"Malformed reply from {self.url}: {e}") from e
+        try:
+            return reply['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError) as e:
+            raise BackendError(f"Reply from {self.url} has no message content") from e
+
+    async def complete(self, prompt: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._post, prompt)
+
+class GenerationStats:
+    def __init__(self):
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.invalid_replies = 0
+        self.dialogues = 0
+        self.latencies: List[float] = []
+
+    def summary(self, elapsed: float) -> str:
+        latencies = sorted(self.latencies)
+        median = latencies[len(latencies) // 2] if latencies else 0.0
+        return (f"{self.succeeded}/{self.requests} requests succeeded, {self.failed} failed, "
+                f"{self.retries} retries ({self.invalid_replies} invalid replies); {self.dialogues} dialogues; "
+                f"{elapsed:.1f}s, {self.requests / elapsed if elapsed else 0:.2f} requests/s, "
+                f"median latency {median:.2f}s")
+
+class DialogueGenerator:
+    """
+    Sends generation requests to a backend concurrently, at most concurrency
+    at a time and max_rps per second (the TTS rate limiter). Failed requests
+    and replies that don't parse as dialogues are retried up to attempts
+    times with jittered exponential backoff; valid dialogues are appended to
+    the output as JSON Lines as soon as their reply arrives.
+    """
+    def __init__(self, backend, max_rps: int = 2, concurrency: int = 4, attempts: int = 4, backoff: float = 1.0):
+        self.backend = backend
+        self.rate_limiter = RPSLimiter(max_rps)
+        self.concurrency = asyncio.Semaphore(concurrency)
+        self.attempts = attempts
+        self.backoff = backoff
+        self.stats = GenerationStats()
+
+    async def generate(self, request: GenerationRequest) -> List[Dialogue]:
+        for attempt in range(1, self.attempts + 1):
+            try:
+                async with self.concurrency:
+                    async with AsyncRateLimiter(self.rate_limiter):
+                        started = time.monotonic()
+                        reply = await self.backend.complete(request.prompt)
+                        self.stats.latencies.append(time.monotonic() - started)
+                return extract_dialogues(reply)
+            except BackendError as e:
+                if not e.retryable or attempt == self.attempts:
+                    raise
+            except Exception as e:
+                # Invalid JSON or dialogue structure; a new sample usually parses.
+                # Anything else is a bug or backend failure that retrying won't fix.
+                if not is_invalid_reply_error(e):
+                    raise
+                self.stats.invalid_replies += 1
+                if attempt == self.attempts:
+                    raise DialogueParseError(f"Invalid reply: {e}") from e
+            self.stats.retries += 1
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+    async def run(self, requests: List[GenerationRequest], output: TextIO,
+                  failed_output: Optional[TextIO] = None) -> GenerationStats:
+        async def run_one(request: GenerationRequest) -> None:
+            self.stats.requests += 1
+            try:
+                dialogues = await self.generate(request)
+            except Exception as e:
+                self.stats.failed += 1
+                print(f"Request {request.id} failed: {e}", file=sys.stderr)
+                if failed_output is not None:
+                    write_requests([request], failed_output)
+                    failed_output.flush()
+                return
+            self.stats.succeeded += 1
+            self.stats.dialogues += len(dialogues)
+            for dialogue in dialogues:
+                output.write(json.dumps(dialogue.to_dict(), ensure_ascii=False) + '\n')
+            output.flush()
+
+        await asyncio.gather(*(run_one(request) for request in requests))
+        return self.stats
+
+def get_default_words_path() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "..", "words", "10K.txt")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate dialogues with an LLM: expand a prompt template over chunks of a word list, send the '
+                    'requests concurrently with retries, and append the valid dialogues to a JSON Lines file')
+    parser.add_argument('-t', '--template', help='Prompt template, e.g. prompts/make-dialogues-frank-rehash-from-'
+                                                 'word-list.md; {words} marks where the words go (default: the end)')
+    parser.add_argument('-w', '--words', help='Word list to chunk (default: ../words/10K.txt)')
+    parser.add_argument('--chunk-size', type=int, default=40, help='Words per request (default: 40)')
+    parser.add_argument('--first-chunk', type=int, default=0, help='Index of the first chunk to use (default: 0)')
+    parser.add_argument('--chunks', type=int, help='Number of chunks to use (default: all)')
+    parser.add_argument('--write-requests', metavar='FILE', help='Only write the requests as JSON Lines to FILE')
+    parser.add_argument('--from-requests', metavar='FILE',
+                        help='Send requests written by --write-requests (or --failed) instead of a template')
+    parser.add_argument('-o', '--output', help='JSON Lines file to append generated dialogues to; it reads like any '
+                             'dialogue file, and tts.py keeps it JSON Lines when it adds the audio names')
+    parser.add_argument('--failed', metavar='FILE', help='Append requests that failed every attempt to FILE')
+    parser.add_argument('--url', default=os.getenv('LLM_API_URL', 'https://api.openai.com/v1/chat/completions'),
+                        help='Chat completions endpoint (default: $LLM_API_URL or the OpenAI API)')
+    parser.add_argument('--model', default=os.getenv('LLM_MODEL', 'gpt-4o'),
+                        help='Model name (default: $LLM_MODEL or gpt-4o)')
+    parser.add_argument('--stub', action='store_true',
+                        help='Send requests to a local stub server (llm_stub.py) started in this process')
+    parser.add_argument('--stub-latency', type=float, default=0.5, help='Stub seconds per request (default: 0.5)')
+    parser.add_argument('--stub-failure-rate', type=float, default=0.1,
+                        help='Share of stub requests that fail (default: 0.1)')
+    parser.add_argument('--max-rps', type=int, default=2, help='Maximum requests per second (default: 2)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum requests in flight (default: 4)')
+    parser.add_argument('--attempts', type=int, default=4, help='Attempts per request (default: 4)')
+    args = parser.parse_args()
+
+    if bool(args.template) == bool(args.from_requests):
+        parser.error('give either --template or --from-requests')
+    if not args.write_requests and not args.output:
+        parser.error('--output is required unless --write-requests is given')
+
+    try:
+        if args.from_requests:
+            requests = read_requests(args.from_requests)
+        else:
+            words = read_words(args.words or get_default_words_path())
+            requests = build_requests(args.template, words, args.chunk_size, args.first_chunk, args.chunks)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, TypeError) as e:
+        print(f"Error reading requests: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.write_requests:
+        with open(args.write_requests, 'w', encoding='utf-8') as f:
+            write_requests(requests, f)
+        print(f"{len(requests)} requests written to {args.write_requests}", file=sys.stderr)
+        return
+
+    stub = None
+    if args.stub:
+        from llm_stub import StubLLMServer
+        stub = StubLLMServer(latency=args.stub_latency, failure_rate=args.stub_failure_rate).start()
+        backend = HTTPBackend(stub.url, args.model, max_workers=args.concurrency)
+    else:
+        backend = HTTPBackend(args.url, args.model, os.getenv('LLM_API_KEY') or os.getenv('OPENAI_API_KEY'),
+                              max_workers=args.concurrency)
+
+    started = time.monotonic()
+    try:
+        with open(args.output, 'a', encoding='utf-8') as output, \
+                open(args.failed or os.devnull, 'a', encoding='utf-8') as failed_output:
+            generator = DialogueGenerator(backend, args.max_rps, args.concurrency, args.attempts)
+            stats = asyncio.run(generator.run(requests, output, failed_output))
+    finally:
+        if stub is not None:
+            stub.stop()
+    print(stats.summary(time.monotonic() - started), file=sys.stderr)
+    if stub is not None:
+        print(f"Stub: {stub.requests} requests, {stub.failures} failures, at most {stub.max_inflight} at once",
+              file=sys.stderr)
+    if stats.failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import fake_tts
+from dialogue_file import DialogueFile
+from generate_dialogues import (BackendError, DialogueGenerator, GenerationRequest, HTTPBackend, build_requests,
+                                expand_template, extract_dialogues, read_requests, read_words, write_requests)
+from llm_stub import StubLLMServer
+from parse import DialogueParseError, load_dialogue_dicts_any_format, parse_dialogues
+from tts import DialogueTTSGenerator, GenerationConfig
+from validate_dialogues import DialogueValidator
+
+VALID = '```json\n[{"title": "T", "words": ["你好"], "lines": [{"s": "A", "c": "你好！"}]}]\n```'
+
+class ScriptedBackend:
+    """Backend that answers with the next scripted reply, raising it if it is an exception"""
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    async def complete(self, prompt):
+        self.prompts.append(prompt)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+def run(generator, requests):
+    output, failed = io.StringIO(), io.StringIO()
+    stats = asyncio.run(generator.run(requests, output, failed))
+    return stats, [json.loads(line) for line in output.getvalue().splitlines()], failed.getvalue()
+
+class TestRequests(unittest.TestCase):
+    def test_read_words(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+            f.write('的,我,你,\n是\n我\n')
+        try:
+            self.assertEqual(read_words(f.name), ['的', '我', '你', '是'])
+        finally:
+            os.unlink(f.name)
+
+    def test_expand_template(self):
+        self.assertEqual(expand_template('Use: {words}.', ['我', '你']), 'Use: 我, 你.')
+        self.assertEqual(expand_template('Words follow\n', ['我', '你']), 'Words follow\n\n我, 你\n')
+
+    def test_build_and_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            template = os.path.join(directory, 'make.md')
+            with open(template, 'w', encoding='utf-8') as f:
+                f.write('{words}')
+            requests = build_requests(template, list('abcdefg'), 3, first_chunk=1)
+            self.assertEqual(requests, [GenerationRequest('make-0001', 'd, e, f', ['d', 'e', 'f']),
+                                        GenerationRequest('make-0002', 'g', ['g'])])
+            path = os.path.join(directory, 'requests.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                write_requests(requests, f)
+            self.assertEqual(read_requests(path), requests)
+
+    def test_extract_dialogues(self):
+        self.assertEqual([d.title for d in extract_dialogues('Here you go:\n' + VALID)], ['T'])
+        self.assertEqual(len(extract_dialogues('[{"lines": [{"c": "好"}]}]')), 1)
+        with self.assertRaises(DialogueParseError):
+            extract_dialogues('```json\n[]\n```')
+
+class TestDialogueGenerator(unittest.TestCase):
+    def test_retries_then_streams_dialogues(self):
+        backend = ScriptedBackend([BackendError('HTTP 429'), '```json\n[{"title": "Broken"}]\n```', VALID])
+        generator = DialogueGenerator(backend, max_rps=100, attempts=3, backoff=0)
+        stats, dialogues, failed = run(generator, [GenerationRequest('r-0000', 'prompt', ['你好'])])
+        self.assertEqual(dialogues, [{'title': 'T', 'lines': [{'c': '你好！', 's': 'A'}]}])
+        self.assertEqual((stats.succeeded, stats.failed, stats.retries, stats.invalid_replies), (1, 0, 2, 1))
+        self.assertEqual(failed, '')
+
+    def test_failures_are_recorded(self):
+        backend = ScriptedBackend([BackendError('HTTP 401', retryable=False), 'not json', 'still not json'])
+        generator = DialogueGenerator(backend, max_rps=100, concurrency=1, attempts=2, backoff=0)
+        requests = [GenerationRequest('r-0000', 'a', []), GenerationRequest('r-0001', 'b', [])]
+        stats, dialogues, failed = run(generator, requests)
+        self.assertEqual(dialogues, [])
+        self.assertEqual((stats.succeeded, stats.failed, stats.retries), (0, 2, 1))
+        self.assertEqual([json.loads(line)['id'] for line in failed.splitlines()], ['r-0000', 'r-0001'])
+
+    def test_other_errors_are_not_retried(self):
+        backend = ScriptedBackend([TypeError('bug in backend'), VALID])
+        generator = DialogueGenerator(backend, max_rps=100, attempts=3, backoff=0)
+        stats, dialogues, failed = run(generator, [GenerationRequest('r-0000', 'prompt', [])])
+        self.assertEqual(len(backend.prompts), 1)
+        self.assertEqual((stats.failed, stats.retries, stats.invalid_replies), (1, 0, 0))
+        self.assertEqual(json.loads(failed)['id'], 'r-0000')
+
+    def test_output_is_readable_by_dialogue_tools(self):
+        backend = ScriptedBackend([VALID, VALID.replace('"T"', '"U"')])
+        generator = DialogueGenerator(backend, max_rps=100, concurrency=1, backoff=0)
+        output = io.StringIO()
+        asyncio.run(generator.run([GenerationRequest('r-0000', 'a', []), GenerationRequest('r-0001', 'b', [])],
+                                  output))
+        # The JSON Lines output goes straight into tts.py, dedupe, validate and the DialogueFile readers
+        self.assertEqual([d.title for d in parse_dialogues(output.getvalue())], ['T', 'U'])
+        self.assertEqual([d.title for d in parse_dialogues(output.getvalue().splitlines()[0])], ['T'])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'gen.jsonl'
+            path.write_text(output.getvalue(), encoding='utf-8')
+            self.assertEqual([d['title'] for d in load_dialogue_dicts_any_format(path)], ['T', 'U'])
+            self.assertEqual(DialogueValidator().validate_file(str(path)), [])
+            self.assertEqual([d.title for d in DialogueFile(path)], ['T', 'U'])
+
+            tts = DialogueTTSGenerator(Path(tmpdir) / 'audio',
+                                       config=GenerationConfig(force_normal=False, force_slow=False, max_rps=1000),
+                                       client=fake_tts.FakeTextToSpeechClient(), texttospeech=fake_tts.texttospeech)
+            async def process():
+                try:
+                    return await tts.process_files([path])
+                finally:
+                    await tts.close()
+
+            self.assertEqual(asyncio.run(process()), [])
+            # Still JSON Lines with the audio names, so the generator can keep appending to it
+            with path.open('a', encoding='utf-8') as f:
+                f.write(output.getvalue().splitlines()[1] + '\n')
+            dialogues = list(DialogueFile(path))
+            self.assertEqual([d.title for d in dialogues], ['T', 'U', 'U'])
+            self.assertTrue(dialogues[0].lines[0].audio and dialogues[1].lines[0].audio)
+            self.assertIsNone(dialogues[2].lines[0].audio)
+
+    def test_stub_server(self):
+        stub = StubLLMServer(failure_rate=0.3, seed=1).start()
+        try:
+            generator = DialogueGenerator(HTTPBackend(stub.url, 'stub'), max_rps=100, concurrency=4, attempts=6,
+                                          backoff=0)
+            requests = [GenerationRequest(f"r-{i:04d}", f"Make a dialogue\n\n我, 你, 好, {i}", []) for i in range(8)]
+            stats, dialogues, _ = run(generator, requests)
+        finally:
+            stub.stop()
+        self.assertEqual(stats.succeeded, 8)
+        self.assertEqual(len(dialogues), 8)
+        self.assertEqual(stub.requests, 8 + stats.retries)
+        self.assertGreater(stub.failures, 0)
+        self.assertEqual(dialogues[0]['lines'][0]['c'][:2], '我你')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+from frankenfrank import COMMANDS
+
+# Modules that are slow to import and only needed by some code paths
+HEAVY_MODULES = ('yaml', 'google', 'grpc', 'numpy')
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+def measure_imports(module: str) -> Dict[str, int]:
+    """
+    Import module in a fresh interpreter with -X importtime and return the
+    cumulative import time in microseconds of every module it loaded.
+    Modules loaded at interpreter startup (by site) are left out.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        if match.group(4) == 'site' and not match.group(3):
+            times.clear()
+        else:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+def heavy_imports(times: Dict[str, int]) -> List[str]:
+    """Heavy top-level packages among the imported modules"""
+    return sorted({name.split('.')[0] for name in times} & set(HEAVY_MODULES))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the import time of each frankenfrank command with python -X importtime')
+    parser.add_argument('-r', '--runs', type=int, default=5,
+                        help='Fresh interpreters per module; the median is reported (default: 5)')
+    args = parser.parse_args()
+
+    print(f"{'module':<22} {'import ms':>10}  heavy imports")
+    for module in sorted({entry.split(':')[0] for entry, _ in COMMANDS.values()}):
+        try:
+            runs = [measure_imports(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            # e.g. numpy isn't installed for the audio tools
+            print(f"{module:<22} {'-':>10}  {str(e).splitlines()[-1]}")
+            continue
+        median_ms = statistics.median(run[module] for run in runs) / 1000
+        heavy = heavy_imports(runs[0])
+        print(f"{module:<22} {median_ms:>10.1f}  {', '.join(heavy) or '-'}")
+
+if __name__ == '__main__':
+    main()
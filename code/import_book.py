@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from file_utils import atomic_output
+from parse import Dialogue, DialogueLine, write_json_list
+from text_utils import clean_text, is_only_punctuation_or_whitespace
+
+PART_RE = re.compile(r'^Часть\s+(\d+)\s*$')
+DIALOGUE_RE = re.compile(r'^Разговор\s+(\d+)\s*$')
+NOTES_RE = re.compile(r'^Примечани[ея]\s*:?\s*$')
+HANZI_RE = re.compile(r'[㐀-䶿一-鿿]')
+CYRILLIC_RE = re.compile(r'[Ѐ-ӿ]')
+LATIN_RE = re.compile(r'[A-Za-zÜü]')
+# A syllable followed by its tone number: hao3, nü3, benr3
+NUMBERED_SYLLABLE_RE = re.compile(r'([A-Za-zÜü]+)([1-5])')
+# A trailing parenthetical comment: "Хочу хлеба (mian4 – лицо)"
+COMMENT_RE = re.compile(r'^(.*?)\s*\(([^()]*)\)\s*([?!.]*)\s*$')
+# The literal gloss after a heading's translation: "За покупками: «покупать вещи»"
+GLOSS_RE = re.compile(r'[\s:]*[«(].*$')
+# The pinyin term a note is about: "Bu4 – слово четвертого тона", "ji3sui4 le? – говорится"
+NOTE_TERM_RE = re.compile(r'^([A-Za-zÜü0-9\- ]+?)[?!.,:]?\s*(?:–|-|произносится)')
+
+TONE_MARKS = {
+    'a': 'āáǎà', 'e': 'ēéěè', 'i': 'īíǐì', 'o': 'ōóǒò', 'u': 'ūúǔù', 'ü': 'ǖǘǚǜ',
+    'A': 'ĀÁǍÀ', 'E': 'ĒÉĚÈ', 'I': 'ĪÍǏÌ', 'O': 'ŌÓǑÒ', 'U': 'ŪÚǓÙ', 'Ü': 'ǕǗǙǛ',
+}
+
+def _mark_syllable(match: re.Match) -> str:
+    syllable, tone = match.group(1), int(match.group(2))
+    if tone == 5:
+        return syllable
+    lower = syllable.lower()
+    # Standard placement: a or e take the mark, o in "ou", otherwise the last vowel
+    if 'a' in lower:
+        index = lower.index('a')
+    elif 'e' in lower:
+        index = lower.index('e')
+    elif 'ou' in lower:
+        index = lower.index('o')
+    else:
+        vowels = [i for i, char in enumerate(lower) if char in 'iouü']
+        if not vowels:
+            return match.group(0)
+        index = vowels[-1]
+    return syllable[:index] + TONE_MARKS[syllable[index]][tone - 1] + syllable[index + 1:]
+
+def numbered_to_tone_marks(text: str) -> str:
+    """Convert numbered pinyin ("Ni3 hao3") to tone marks ("Nǐ hǎo"); other text is left alone"""
+    return NUMBERED_SYLLABLE_RE.sub(_mark_syllable, text)
+
+def classify_line(text: str) -> str:
+    """
+    Kind of a stripped book line: 'blank', 'part', 'dialogue', 'notes', 'hanzi'
+    (Chinese only), 'pinyin' (Latin only), 'russian' (any Cyrillic) or 'other'
+    """
+    if is_only_punctuation_or_whitespace(text):
+        # Empty lines and rules such as "-----"
+        return 'blank'
+    if PART_RE.match(text):
+        return 'part'
+    if DIALOGUE_RE.match(text):
+        return 'dialogue'
+    if NOTES_RE.match(text):
+        return 'notes'
+    if CYRILLIC_RE.search(text):
+        # Translations and notes may quote hanzi and pinyin
+        return 'russian'
+    has_latin = LATIN_RE.search(text) is not None
+    if HANZI_RE.search(text):
+        return 'other' if has_latin else 'hanzi'
+    return 'pinyin' if has_latin else 'other'
+
+def split_translation(text: str) -> Tuple[str, Optional[str]]:
+    """Split a translation line into the translation and its trailing parenthetical comment"""
+    match = COMMENT_RE.match(text)
+    if not match or not match.group(1):
+        return text, None
+    return match.group(1) + match.group(3), numbered_to_tone_marks(match.group(2))
+
+class SkippedLine(NamedTuple):
+    """A book line the importer could not place; line_number is 1-based"""
+    line_number: int
+    text: str
+    reason: str
+
+    def __str__(self) -> str:
+        return f"line {self.line_number}: {self.reason}: {self.text}"
+
+class BookImporter:
+    """
+    Turns the lines of an Ilya Frank style book (Chinese_Every_Day.txt) into
+    dialogues in a single pass, as a state machine:
+
+      front matter -> "Разговор N" -> [heading] -> hanzi / pinyin / translation
+      lines -> ["Примечания:" notes] -> hanzi-only recap -> next "Разговор"
+
+    The book doesn't name speakers, so lines alternate between the given
+    speakers. Notes go into the description of the line whose pinyin they
+    quote, or of the first line. Each dialogue is returned by feed() as soon
+    as the next one starts; lines that fit nowhere are collected in skipped.
+    """
+    def __init__(self, speakers: Sequence[str] = ('A', 'B')):
+        self.speakers = list(speakers)
+        self.skipped: List[SkippedLine] = []
+        self.state = 'front'
+        self.part = 0
+        self.number = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.heading: Optional[str] = None
+        self.heading_chinese: Optional[str] = None
+        self.lines: List[DialogueLine] = []
+        self.numbered_pinyin: List[str] = []
+        self.notes: List[str] = []
+        self.recap_index = 0
+        self.recap_rest = ''
+        self.blank_before = False
+        # Index of the first line without pinyin, and of the line whose translation comes next
+        self.next_pinyin = 0
+        self.next_translation: Optional[int] = None
+
+    def _skip(self, line_number: int, text: str, reason: str) -> None:
+        self.skipped.append(SkippedLine(line_number, text, reason))
+
+    def feed(self, line_number: int, raw: str) -> Optional[Dialogue]:
+        """Process one line of the book; returns a dialogue when this line completes one"""
+        text = raw.strip().lstrip('﻿')
+        kind = classify_line(text)
+        if kind == 'blank':
+            self.blank_before = True
+            return None
+
+        finished = None
+        if kind in ('part', 'dialogue'):
+            finished = self.finish()
+            if kind == 'part':
+                self.part = int(PART_RE.match(text).group(1))
+                self.state = 'between'
+            else:
+                self.number = int(DIALOGUE_RE.match(text).group(1))
+                self.state = 'dialogue'
+        elif self.state == 'front':
+            # Title page and prefaces
+            pass
+        elif self.state == 'between':
+            self._skip(line_number, text, 'outside any dialogue')
+        elif kind == 'notes':
+            if self.state != 'dialogue':
+                self._skip(line_number, text, 'notes outside a dialogue')
+            self.state = 'notes'
+        elif self.state == 'dialogue':
+            self._dialogue_line(line_number, text, kind)
+        elif self.state == 'notes':
+            if kind == 'hanzi':
+                self.state = 'recap'
+                self._recap_line(line_number, text)
+            else:
+                self.notes.append(text)
+        else:
+            self._recap_line(line_number, text)
+
+        self.blank_before = False
+        return finished
+
+    def _dialogue_line(self, line_number: int, text: str, kind: str) -> None:
+        if kind == 'russian' and self.next_pinyin < len(self.lines):
+            pinyin, comment = split_translation(text)
+            if classify_line(pinyin) == 'pinyin':
+                # Pinyin with a comment: "Ni3 chu1qu ma (chu1 – выходить)?"
+                self._set_pinyin(pinyin, comment)
+                return
+
+        if kind == 'hanzi':
+            if self.blank_before and len(self.lines) == 1 and self.heading is None:
+                # A single line set off by blank lines is the dialogue's heading
+                self._make_heading()
+            elif self.blank_before and self._starts_recap(text):
+                self.state = 'recap'
+                self._recap_line(line_number, text)
+                return
+            self.lines.append(DialogueLine(chinese=text))
+            self.numbered_pinyin.append('')
+        elif kind == 'pinyin' and self.next_pinyin < len(self.lines):
+            self._set_pinyin(text, None)
+        elif kind == 'russian' and self.next_translation is not None:
+            line = self.lines[self.next_translation]
+            line.translation, comment = split_translation(text)
+            if comment:
+                line.description = f"{line.description} {comment}" if line.description else comment
+            self.next_translation = None
+        else:
+            self._skip(line_number, text, f"unexpected {kind} line in dialogue")
+
+    def _set_pinyin(self, pinyin: str, comment: Optional[str]) -> None:
+        # Usually the line just read, but a few places list several hanzi lines before their pinyin
+        line = self.lines[self.next_pinyin]
+        line.pronunciation = numbered_to_tone_marks(pinyin)
+        line.description = comment
+        self.numbered_pinyin[self.next_pinyin] = pinyin.lower()
+        self.next_translation = self.next_pinyin
+        self.next_pinyin += 1
+
+    def _make_heading(self) -> None:
+        line = self.lines.pop()
+        self.numbered_pinyin.pop()
+        self.next_pinyin = 0
+        self.next_translation = None
+        self.heading = GLOSS_RE.sub('', line.translation or '') or line.chinese
+        self.heading_chinese = line.chinese
+
+    def _recap_texts(self) -> List[str]:
+        texts = [clean_text(line.chinese) for line in self.lines]
+        if self.heading_chinese is not None:
+            texts.insert(0, clean_text(self.heading_chinese))
+        return texts
+
+    def _starts_recap(self, text: str) -> bool:
+        return bool(self.lines) and clean_text(text) in self._recap_texts()[:2]
+
+    def _recap_line(self, line_number: int, text: str) -> None:
+        if classify_line(text) != 'hanzi':
+            self._skip(line_number, text, 'unexpected line in hanzi recap')
+            return
+        # Recaps may leave out the heading, run two lines together or split one,
+        # so look for the text as the rest of a line or as consecutive lines
+        expected = self._recap_texts()
+        wanted = clean_text(text)
+        if self.recap_rest:
+            if self.recap_rest.startswith(wanted):
+                self.recap_rest = self.recap_rest[len(wanted):]
+                return
+            self.recap_rest = ''
+        for start in range(self.recap_index, len(expected)):
+            if wanted and expected[start].startswith(wanted) and expected[start] != wanted:
+                self.recap_index = start + 1
+                self.recap_rest = expected[start][len(wanted):]
+                return
+            joined = ''
+            for end in range(start, len(expected)):
+                joined += expected[end]
+                if joined == wanted:
+                    self.recap_index = end + 1
+                    return
+                if not wanted.startswith(joined):
+                    break
+        self._skip(line_number, text, 'recap line not in the dialogue')
+
+    def _attach_notes(self) -> None:
+        for note in self.notes:
+            target = self.lines[0]
+            match = NOTE_TERM_RE.match(note)
+            if match:
+                term = match.group(1).strip().lower()
+                term_re = re.compile(r'(?<![a-zü])' + re.escape(term) + r'(?![a-zü0-9])')
+                for line, pinyin in zip(self.lines, self.numbered_pinyin):
+                    if term and term_re.search(pinyin):
+                        target = line
+                        break
+            note = numbered_to_tone_marks(note)
+            target.description = f"{target.description} {note}" if target.description else note
+
+    def finish(self) -> Optional[Dialogue]:
+        """Complete the current dialogue at the end of the book or when the next one starts"""
+        if self.state not in ('dialogue', 'notes', 'recap') or not self.lines:
+            self._reset()
+            return None
+        self._attach_notes()
+        for i, line in enumerate(self.lines):
+            line.speaker = self.speakers[i % len(self.speakers)]
+        title = f"{self.part}-{self.number}"
+        if self.heading:
+            title += f" - {self.heading}"
+        dialogue = Dialogue(lines=self.lines, title=title)
+        self._reset()
+        return dialogue
+
+def iter_book_dialogues(lines: Iterable[str], importer: Optional[BookImporter] = None) -> Iterator[Dialogue]:
+    """Dialogues from the lines of a book, yielded as each one is complete"""
+    importer = importer or BookImporter()
+    for line_number, line in enumerate(lines, 1):
+        dialogue = importer.feed(line_number, line)
+        if dialogue is not None:
+            yield dialogue
+    dialogue = importer.finish()
+    if dialogue is not None:
+        yield dialogue
+
+def import_file(input_path: str, output_path: Optional[str], speakers: Sequence[str] = ('A', 'B'),
+                indent: Optional[int] = 2) -> Tuple[int, List[SkippedLine]]:
+    """
+    Import one book into a dialogue JSON file, written atomically to output_path
+    or to stdout if it is None. Returns the number of dialogues and the skipped
+    lines. Module-level so it can run in a process pool.
+    """
+    importer = BookImporter(speakers)
+    with open(input_path, 'r', encoding='utf-8') as f:
+        dialogues = (dialogue.to_dict() for dialogue in iter_book_dialogues(f, importer))
+        if output_path is None:
+            count = write_json_list(dialogues, sys.stdout, indent, ensure_ascii=False)
+        else:
+            with atomic_output(Path(output_path)) as out:
+                count = write_json_list(dialogues, out, indent, ensure_ascii=False)
+    return count, importer.skipped
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Import dialogues from a book text (hanzi, pinyin and translation lines with notes, '
+                    'like dialogues/Chinese_Every_Day.txt) into the dialogue JSON format')
+    parser.add_argument('input', nargs='+', help='Book text files')
+    parser.add_argument('-o', '--output', help='Output JSON file for a single input (default: stdout)')
+    parser.add_argument('--output-dir', help='Write each input to <name>.json in this directory')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of books to import in parallel with --output-dir (default: 1)')
+    parser.add_argument('--speakers', default='A,B',
+                        help='Comma-separated speakers that lines alternate between (default: A,B)')
+    parser.add_argument('--indent', type=int, default=2, help='JSON indentation (default: 2)')
+    args = parser.parse_args()
+
+    if len(args.input) > 1 and not args.output_dir:
+        parser.error('--output-dir is required with several input files')
+    if args.output and args.output_dir:
+        parser.error('--output and --output-dir exclude each other')
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        outputs = [os.path.join(args.output_dir, Path(path).stem + '.json') for path in args.input]
+    else:
+        outputs = [args.output]
+    speakers = args.speakers.split(',')
+
+    failed = 0
+
+    def report(path: str, count: int, skipped: List[SkippedLine]) -> None:
+        for line in skipped:
+            print(f"{path}: {line}", file=sys.stderr)
+        print(f"{path}: {count} dialogues, {len(skipped)} lines not imported", file=sys.stderr)
+
+    def report_error(path: str, error: Exception) -> None:
+        if isinstance(error, FileNotFoundError):
+            print(f"Error: Input file not found: {path}", file=sys.stderr)
+        else:
+            print(f"Error importing {path}: {error}", file=sys.stderr)
+
+    if args.jobs > 1 and len(args.input) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {
+                pool.submit(import_file, path, output, speakers, args.indent): path
+                for path, output in zip(args.input, outputs)
+            }
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    failed += 1
+                    report_error(futures[future], future.exception())
+                else:
+                    report(futures[future], *future.result())
+    else:
+        for path, output in zip(args.input, outputs):
+            try:
+                report(path, *import_file(path, output, speakers, args.indent))
+            except (OSError, UnicodeDecodeError) as e:
+                failed += 1
+                report_error(path, e)
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import unittest
+from import_book import BookImporter, classify_line, iter_book_dialogues, numbered_to_tone_marks, split_translation
+
+BOOK = """Повседневный китайский язык
+
+Предисловие
+Дорогие друзья!
+
+
+Часть 1
+
+
+Разговор 1
+
+
+你好！
+Ni3 hao3!
+Здравствуй! («ты хороший»)
+你好！
+Ni3 hao3!
+你饿吗？
+Ni3 e4 ma?
+Ты голоден ли?
+
+
+Примечания:
+e4– быть голодным /глагол/
+
+
+你好！
+你好！
+你饿吗？
+
+
+Разговор 2
+
+
+买东西
+Mai3 dong1xi
+За покупками: «покупать вещи»
+
+
+要不要汤?
+不要。
+Yao4-bu2-yao4 tang1?
+Хочешь суп?
+Bu2 yao4.
+Не хочу.
+Ni3 chu1qu ma (chu1 – выходить)?
+Лишняя строка
+
+
+要不要汤？
+不要。
+"""
+
+class TestHelpers(unittest.TestCase):
+    def test_tone_marks(self):
+        self.assertEqual(numbered_to_tone_marks('Ni3 hao3!'), 'Nǐ hǎo!')
+        self.assertEqual(numbered_to_tone_marks('Zhei4-ge ren2 hen3 re4qing.'), 'Zhèi-ge rén hěn rèqing.')
+        self.assertEqual(numbered_to_tone_marks('nü3 dou1 gui4 bi3ji4benr3'), 'nǚ dōu guì bǐjìběnr')
+        self.assertEqual(numbered_to_tone_marks('ma5, 3 книги'), 'ma, 3 книги')
+
+    def test_classify_line(self):
+        self.assertEqual(classify_line(''), 'blank')
+        self.assertEqual(classify_line('-----'), 'blank')
+        self.assertEqual(classify_line('Часть 3'), 'part')
+        self.assertEqual(classify_line('Разговор 12'), 'dialogue')
+        self.assertEqual(classify_line('Примечания:'), 'notes')
+        self.assertEqual(classify_line('你好！'), 'hanzi')
+        self.assertEqual(classify_line('Ni3 hao3!'), 'pinyin')
+        self.assertEqual(classify_line('Ладно! (会hui4 – мочь)'), 'russian')
+
+    def test_split_translation(self):
+        self.assertEqual(split_translation('Хочу хлеба (mian4 – лицо)'), ('Хочу хлеба', 'miàn – лицо'))
+        self.assertEqual(split_translation('Он здесь (zai4 – находиться)?'), ('Он здесь?', 'zài – находиться'))
+        self.assertEqual(split_translation('(только комментарий)'), ('(только комментарий)', None))
+
+class TestBookImporter(unittest.TestCase):
+    def setUp(self):
+        self.importer = BookImporter()
+        self.dialogues = list(iter_book_dialogues(BOOK.splitlines(), self.importer))
+
+    def test_dialogues(self):
+        self.assertEqual([d.title for d in self.dialogues], ['1-1', '1-2 - За покупками'])
+        first = self.dialogues[0]
+        self.assertEqual([line.chinese for line in first.lines], ['你好！', '你好！', '你饿吗？'])
+        self.assertEqual([line.speaker for line in first.lines], ['A', 'B', 'A'])
+        self.assertEqual(first.lines[0].to_dict(), {
+            'c': '你好！', 's': 'A', 'p': 'Nǐ hǎo!', 't': 'Здравствуй!', 'd': '«ты хороший»'})
+        self.assertIsNone(first.lines[1].translation)
+        # The note quotes e4, so it belongs to the line with that pinyin
+        self.assertEqual(first.lines[2].description, 'è– быть голодным /глагол/')
+
+    def test_hanzi_listed_before_pinyin(self):
+        lines = self.dialogues[1].lines
+        self.assertEqual([(line.chinese, line.translation) for line in lines],
+                         [('要不要汤?', 'Хочешь суп?'), ('不要。', 'Не хочу.')])
+
+    def test_skipped_lines(self):
+        self.assertEqual([(line.line_number, line.reason) for line in self.importer.skipped], [
+            (46, 'unexpected russian line in dialogue'),
+            (47, 'unexpected russian line in dialogue'),
+        ])
+
+    def test_recap_mismatch_is_reported(self):
+        importer = BookImporter()
+        list(iter_book_dialogues(['Разговор 1', '你好！', 'Ni3 hao3!', 'Привет', '好！', 'Hao3!', '',
+                                  '你好！', '再见！'], importer))
+        self.assertEqual([(line.line_number, line.reason) for line in importer.skipped],
+                         [(9, 'recap line not in the dialogue')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from frankenfrank import COMMANDS
+from import_bench import heavy_imports, measure_imports
+
+# Commands whose whole purpose needs numpy, so importing it up front is fine
+NUMPY_COMMANDS = ('audio_postprocess', 'stretch_bench', 'dedupe_dialogues')
+
+# Generous limit so slow machines pass; importing the Google client or PyYAML
+# at module level costs several times this much
+IMPORT_BUDGET_MS = 300
+
+class TestImportTime(unittest.TestCase):
+    def test_commands_import_no_heavy_modules(self):
+        for entry, _ in COMMANDS.values():
+            module = entry.split(':')[0]
+            if module in NUMPY_COMMANDS:
+                continue
+            with self.subTest(module=module):
+                times = measure_imports(module)
+                self.assertEqual(heavy_imports(times), [])
+                self.assertLess(times[module] / 1000, IMPORT_BUDGET_MS)
+
+    def test_entry_point_imports_no_commands(self):
+        times = measure_imports('frankenfrank')
+        command_modules = {entry.split(':')[0] for entry, _ in COMMANDS.values()}
+        self.assertEqual(command_modules & set(times), set())
+
+    def test_parse_defers_yaml(self):
+        self.assertNotIn('yaml', measure_imports('parse'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+def stub_dialogue(words: List[str], rng: random.Random) -> dict:
+    """A short dialogue in the generation prompt's format that uses the given words"""
+    lines = []
+    for i in range(0, max(len(words), 1), 2):
+        chunk = words[i:i + 2] or ['你好']
+        lines.append({
+            's': 'AB'[len(lines) % 2],
+            'c': ''.join(chunk) + rng.choice('。！？'),
+            't': ' / '.join(chunk),
+        })
+    return {'words': words, 'title': f"Stub {rng.randrange(10000)}", 'lines': lines}
+
+def prompt_words(prompt: str) -> List[str]:
+    """Words of the last non-empty prompt line, where generate_dialogues puts the chunk"""
+    last = next((line for line in reversed(prompt.splitlines()) if line.strip()), '')
+    return [word.strip() for word in last.split(',') if word.strip()]
+
+class StubLLMServer:
+    """
+    Local stand-in for an OpenAI-compatible chat completions endpoint, for
+    testing generate_dialogues.py offline. Each request sleeps for latency
+    seconds and then answers with a fenced JSON dialogue made from the
+    prompt's words. A failure_rate share of requests fail instead: with a
+    429, a 500, or a reply that isn't valid dialogue JSON, in equal parts.
+    """
+    def __init__(self, port: int = 0, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                status, reply = stub.respond(body)
+                data = json.dumps(reply, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def respond(self, body: dict):
+        """(status, JSON reply) for one chat completions request"""
+        with self.lock:
+            self.requests += 1
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+            roll = self.rng.random()
+            rng = random.Random(self.rng.random())
+        try:
+            time.sleep(self.latency)
+            prompt = body.get('messages', [{}])[-1].get('content', '')
+            if roll < self.failure_rate:
+                with self.lock:
+                    self.failures += 1
+                kind = int(roll / self.failure_rate * 3)
+                if kind == 0:
+                    return 429, {'error': {'message': 'Rate limit exceeded'}}
+                if kind == 1:
+                    return 500, {'error': {'message': 'Internal error'}}
+                content = '```json\n[{"title": "Broken", "lines": [{"s": "A", "c": "我去年开始看"红楼梦"！"}]}]\n```'
+            else:
+                dialogue = stub_dialogue(prompt_words(prompt), rng)
+                content = '```json\n' + json.dumps([dialogue], ensure_ascii=False, indent=2) + '\n```'
+            return 200, {'choices': [{'message': {'role': 'assistant', 'content': content}}]}
+        finally:
+            with self.lock:
+                self.inflight -= 1
+
+    def start(self) -> 'StubLLMServer':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stub of an LLM chat completions endpoint')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds per request (default: 0.5)')
+    parser.add_argument('--failure-rate', type=float, default=0.1,
+                        help='Share of requests that fail with 429, 500 or invalid JSON (default: 0.1)')
+    args = parser.parse_args()
+
+    stub = StubLLMServer(args.port, args.latency, args.failure_rate)
+    print(f"Serving {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{stub.requests} requests, {stub.failures} failures, at most {stub.max_inflight} at once")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+from typing import Iterator, List, NamedTuple, Sequence
+
+# Layer III bitrates in kbps by bitrate index, for MPEG-1 and for MPEG-2/2.5
+_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+# Sample rates by version bits (0b11 = MPEG-1, 0b10 = MPEG-2, 0b00 = MPEG-2.5)
+_SAMPLE_RATES = {
+    0b11: (44100, 48000, 32000),
+    0b10: (22050, 24000, 16000),
+    0b00: (11025, 12000, 8000),
+}
+
+class Mp3Frame(NamedTuple):
+    offset: int
+    length: int
+    samples: int
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+class Mp3FormatError(Exception):
+    """Raised when data doesn't contain MPEG Layer III frames"""
+    pass
+
+def _parse_header(data: bytes, offset: int):
+    """Return (length, samples, sample_rate) for a Layer III header at offset, or None"""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0b11
+    layer = (b1 >> 1) & 0b11
+    if version == 0b01 or layer != 0b01:
+        return None
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0b11
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (b2 >> 1) & 1
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 0b11:
+        bitrate = _BITRATES_V1[bitrate_index] * 1000
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+    bitrate = _BITRATES_V2[bitrate_index] * 1000
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+def _skip_id3v2(data: bytes) -> int:
+    """Return the offset just past a leading ID3v2 tag, or 0"""
+    if len(data) >= 10 and data[:3] == b'ID3':
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return 10 + size
+    return 0
+
+def iter_frames(data: bytes) -> Iterator[Mp3Frame]:
+    """
+    Yield the Layer III frames in an MP3 byte string. A leading ID3v2 tag is
+    skipped, and garbage between frames is skipped by searching for the next sync word.
+    """
+    offset = _skip_id3v2(data)
+    while offset < len(data):
+        header = _parse_header(data, offset)
+        if header is None:
+            offset = data.find(b'\xff', offset + 1)
+            if offset < 0:
+                return
+            continue
+        length, samples, sample_rate = header
+        if offset + length > len(data):
+            # Truncated final frame
+            return
+        yield Mp3Frame(offset, length, samples, sample_rate)
+        offset += length
+
+def mp3_duration(data: bytes) -> float:
+    """Total duration in seconds"""
+    return sum(frame.duration for frame in iter_frames(data))
+
+def split_mp3(data: bytes, cut_times: Sequence[float]) -> List[bytes]:
+    """
+    Split MP3 data at the given times (seconds, ascending), returning
+    len(cut_times) + 1 pieces. Each cut lands on the frame boundary nearest
+    to its time.
+
+    Cutting Layer III at frame boundaries without re-encoding can lose the bit
+    reservoir for the first frame of a piece, so cuts should fall in silence.
+    """
+    frames = list(iter_frames(data))
+    if not frames:
+        raise Mp3FormatError("No MPEG Layer III frames found")
+
+    # Start time of every frame, plus the end of the last one
+    starts = [0.0]
+    for frame in frames:
+        starts.append(starts[-1] + frame.duration)
+
+    pieces = []
+    piece_start = 0
+    frame_index = 0
+    for cut in cut_times:
+        # Advance to the frame boundary nearest to the cut
+        while frame_index < len(frames) and starts[frame_index + 1] - cut <= cut - starts[frame_index]:
+            frame_index += 1
+        boundary = frames[frame_index].offset if frame_index < len(frames) else len(data)
+        pieces.append(data[piece_start:boundary])
+        piece_start = boundary
+    pieces.append(data[piece_start:frames[-1].offset + frames[-1].length])
+    return pieces
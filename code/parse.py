@@ -1,9 +1,9 @@
 from pathlib import Path
 
-import yaml
 import json
+import random
 from dataclasses import dataclass
-from typing import Dict, List, Union, TextIO, Any
+from typing import Dict, List, Union, TextIO, Any, Iterable, Iterator, Optional, Tuple
 
 class DialogueParseError(Exception):
     """Raised when there's an error parsing dialogues"""
@@ -101,6 +101,83 @@ def parse_dialogue_from_dict(dialogue_dict: dict) -> Dialogue:
         title=dialogue_dict.get('title')
     )
 
+def _load_yaml(text: str) -> Any:
+    # PyYAML is imported only when needed, which keeps JSON-only commands fast to start
+    import yaml
+    # The libyaml-based loader is several times faster when PyYAML was built with it
+    return yaml.load(text, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+def _load_json_lines(text: str) -> Optional[List[Any]]:
+    """Values of JSON Lines text (one JSON value per line), or None if it isn't JSON Lines"""
+    try:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError:
+        return None
+
+def is_json_lines(text: str) -> bool:
+    """True for JSON Lines dialogue text (one object per line) rather than a JSON/YAML list"""
+    return text.lstrip().startswith('{')
+
+def load_yaml_or_json(text: str) -> Any:
+    """
+    Parse YAML/JSON text. JSON files are valid YAML, but the json module
+    parses them far faster, so it is tried first when the text looks like JSON.
+
+    JSON Lines with one dialogue object per line, as generate_dialogues.py
+    writes, load as the list of those dialogues; so does a lone dialogue
+    object (a dict with a 'lines' list), which is a one-line JSON Lines file.
+
+    Raises:
+        yaml.YAMLError: If YAML parsing fails
+    """
+    stripped = text.lstrip()
+    if stripped.startswith(('[', '{')):
+        try:
+            content = json.loads(text)
+        except ValueError:
+            content = _load_json_lines(text) if is_json_lines(text) else None
+        if isinstance(content, dict) and isinstance(content.get('lines'), list):
+            return [content]
+        if content is not None:
+            return content
+    return _load_yaml(text)
+
+def load_dialogue_dicts(yaml_text: str) -> List[dict]:
+    """
+    Load the raw top-level list of dialogue dicts from YAML/JSON text
+    without validating or converting the individual dialogues.
+
+    Raises:
+        yaml.YAMLError: If YAML parsing fails
+        DialogueParseError: If the top-level structure is not a list
+    """
+    content = load_yaml_or_json(yaml_text)
+
+    # Handle empty YAML case
+    if content is None:
+        return []
+
+    # Validate top-level structure is a list
+    if not isinstance(content, list):
+        raise DialogueParseError(f"Invalid YAML structure. Expected list of dialogues, got {type(content)}")
+
+    return content
+
+def load_dialogue_dicts_any_format(path: Union[str, Path]) -> List[dict]:
+    """
+    Dialogue dicts of a file in the current list format or in the old
+    title -> lines mapping that generated batches (gptout/*.json) still use
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = load_yaml_or_json(f.read())
+    if content is None:
+        return []
+    if isinstance(content, dict):
+        return [{'title': title, 'lines': lines} for title, lines in content.items()]
+    if not isinstance(content, list):
+        raise DialogueParseError(f"Expected list of dialogues, got {type(content).__name__}")
+    return content
+
 def parse_dialogues(yaml_text: str) -> List[Dialogue]:
     """
     Parse dialogues from YAML/JSON text. Expects a list of dialogue objects,
@@ -116,25 +193,38 @@ def parse_dialogues(yaml_text: str) -> List[Dialogue]:
         yaml.YAMLError: If YAML parsing fails
         DialogueParseError: If dialogue structure or content is invalid
     """
-    content = yaml.safe_load(yaml_text)
+    content = load_dialogue_dicts(yaml_text)
+    return [dialogue for _, dialogue in iter_selected_dialogues(content, range(len(content)))]
 
-    # Handle empty YAML case
-    if content is None:
-        return []
-
-    # Validate top-level structure is a list
-    if not isinstance(content, list):
-        raise DialogueParseError(f"Invalid YAML structure. Expected list of dialogues, got {type(content)}")
+def iter_selected_dialogues(dialogue_dicts: List[dict], indices: Iterable[int]) -> Iterator[Tuple[int, Dialogue]]:
+    """
+    Parse only the dialogues at the given indices, yielding (index, dialogue)
+    pairs in the order the indices are given.
 
-    # Parse all dialogues
-    results = []
-    for i, dialogue_dict in enumerate(content):
+    Raises:
+        IndexError: If an index is out of range
+        DialogueParseError: If a selected dialogue is invalid
+    """
+    for i in indices:
         try:
-            results.append(parse_dialogue_from_dict(dialogue_dict))
+            yield i, parse_dialogue_from_dict(dialogue_dicts[i])
         except DialogueParseError as e:
             raise DialogueParseError(f"Error in dialogue {i}: {str(e)}")
 
-    return results
+def sample_dialogue_indices(count: int, k: int, start: int = 0, stop: Optional[int] = None,
+                            seed: Optional[int] = None) -> List[int]:
+    """
+    Randomly choose k distinct dialogue indices from range(start, stop).
+
+    stop defaults to count and is clamped to it. If fewer than k indices are
+    available, all of them are returned in order. The same seed always gives
+    the same selection for the same range.
+    """
+    stop = count if stop is None else min(stop, count)
+    population = range(start, stop)
+    if k >= len(population):
+        return list(population)
+    return random.Random(seed).sample(population, k)
 
 def save_dialogues(dialogues: List[Dialogue], output: Union[str, Path, TextIO], format: str = 'json', **kwargs) -> None:
     """
@@ -143,15 +233,15 @@ def save_dialogues(dialogues: List[Dialogue], output: Union[str, Path, TextIO],
     Args:
         dialogues: List of Dialogue objects to save
         output: Filename (str or Path) or file-like object to write to
-        format: Output format ('json' or 'yaml')
+        format: Output format ('json', 'jsonl' for one dialogue per line, or 'yaml')
         **kwargs: Additional arguments passed to json.dumps or yaml.dump
 
     Raises:
-        ValueError: If format is not 'json' or 'yaml'
+        ValueError: If format is not 'json', 'jsonl' or 'yaml'
         IOError: If there's an error writing to the file
     """
-    if format not in ('json', 'yaml'):
-        raise ValueError("Format must be 'json' or 'yaml'")
+    if format not in ('json', 'jsonl', 'yaml'):
+        raise ValueError("Format must be 'json', 'jsonl' or 'yaml'")
 
     # Convert dialogues to list of dicts
     data = [dialogue.to_dict() for dialogue in dialogues]
@@ -162,7 +252,12 @@ def save_dialogues(dialogues: List[Dialogue], output: Union[str, Path, TextIO],
         kwargs.setdefault('indent', 2)
         kwargs.setdefault('allow_nan', False)
         output_text = json.dumps(data, **kwargs)
+    elif format == 'jsonl':
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('allow_nan', False)
+        output_text = ''.join(json.dumps(dialogue, **kwargs) + '\n' for dialogue in data)
     else:  # yaml
+        import yaml
         kwargs.setdefault('allow_unicode', True)
         kwargs.setdefault('sort_keys', False)
         output_text = yaml.dump(data, **kwargs)
@@ -176,4 +271,25 @@ def save_dialogues(dialogues: List[Dialogue], output: Union[str, Path, TextIO],
     else:
         output.write(output_text)
         if not output_text.endswith('\n'):
-            output.write('\n')
\ No newline at end of file
+            output.write('\n')
+def write_json_list(items: Iterable[Any], output: TextIO, indent: Optional[int] = 2, **kwargs) -> int:
+    """
+    Write items to output as a JSON list one item at a time, so the whole list
+    is never held in memory. The text is the same as json.dumps(list(items),
+    indent=indent, **kwargs) followed by a newline. Returns the number of items.
+    """
+    count = 0
+    for item in items:
+        text = json.dumps(item, indent=indent, **kwargs)
+        if indent is None:
+            output.write(('[' if count == 0 else ', ') + text)
+        else:
+            prefix = ' ' * indent
+            output.write(('[\n' if count == 0 else ',\n') + prefix + text.replace('\n', '\n' + prefix))
+        count += 1
+
+    if count == 0:
+        output.write('[]\n')
+    else:
+        output.write(']\n' if indent is None else '\n]\n')
+    return count
@@ -8,6 +8,10 @@ from parse import (
     parse_dialogues,
     parse_dialogue_from_dict,
     parse_dialogue_line_from_dict,
+    load_dialogue_dicts,
+    load_yaml_or_json,
+    iter_selected_dialogues,
+    sample_dialogue_indices,
     save_dialogues,
     DialogueParseError
 )
@@ -172,6 +176,55 @@ class TestDialogueParsing(unittest.TestCase):
             parse_dialogues(invalid_yaml)
         self.assertTrue("Missing required field" in str(context.exception))
 
+    def test_iter_selected_dialogues(self):
+        """Test parsing only selected dialogues with their original indices"""
+        dialogue_dicts = load_dialogue_dicts(self.valid_yaml)
+        selected = list(iter_selected_dialogues(dialogue_dicts, [1, 0]))
+        self.assertEqual([index for index, _ in selected], [1, 0])
+        self.assertEqual(selected[0][1].title, "You look very happy!")
+        self.assertEqual(selected[1][1].title, "Что ты думаешь?")
+
+    def test_iter_selected_dialogues_duplicates_keep_index(self):
+        """Test that identical dialogues are reported under their own indices"""
+        dialogue_dicts = [{"lines": [{"c": "你好"}]}] * 3
+        indices = [index for index, _ in iter_selected_dialogues(dialogue_dicts, [2, 1])]
+        self.assertEqual(indices, [2, 1])
+
+    def test_iter_selected_dialogues_skips_unselected_invalid(self):
+        """Test that invalid dialogues outside the selection are not parsed"""
+        dialogue_dicts = [{"lines": [{"c": "你好"}]}, "not an object"]
+        self.assertEqual(len(list(iter_selected_dialogues(dialogue_dicts, [0]))), 1)
+        with self.assertRaises(DialogueParseError) as context:
+            list(iter_selected_dialogues(dialogue_dicts, [1]))
+        self.assertTrue("Error in dialogue 1" in str(context.exception))
+
+    def test_sample_dialogue_indices(self):
+        """Test seeded sampling within a range"""
+        first = sample_dialogue_indices(100, 5, start=10, stop=50, seed=42)
+        second = sample_dialogue_indices(100, 5, start=10, stop=50, seed=42)
+        self.assertEqual(first, second)
+        self.assertEqual(len(set(first)), 5)
+        self.assertTrue(all(10 <= i < 50 for i in first))
+
+    def test_sample_dialogue_indices_fewer_available(self):
+        """Test that asking for more than available returns the whole range"""
+        self.assertEqual(sample_dialogue_indices(5, 10, start=2), [2, 3, 4])
+        self.assertTrue(set(sample_dialogue_indices(5, 3, start=1, stop=20)) <= {1, 2, 3, 4})
+
+    def test_parse_dialogues_flow_yaml_not_json(self):
+        """Test that flow-style YAML which isn't valid JSON still parses"""
+        dialogues = parse_dialogues("[{lines: [{c: 你好, s: A}]}]")
+        self.assertEqual(dialogues[0].lines[0].chinese, "你好")
+        self.assertEqual(dialogues[0].lines[0].speaker, "A")
+
+    def test_parse_dialogues_json_lines(self):
+        """Test that JSON Lines (one dialogue per line, as generate_dialogues.py writes) parses"""
+        text = '{"title": "One", "lines": [{"c": "你好", "s": "A"}]}\n\n{"title": "Two", "lines": []}\n'
+        self.assertEqual([d.title for d in parse_dialogues(text)], ["One", "Two"])
+        # A single line is one dialogue, not an old-format title -> lines mapping
+        self.assertEqual([d.title for d in parse_dialogues(text.splitlines()[0])], ["One"])
+        self.assertEqual(load_yaml_or_json('{"问候": [{"c": "你好"}]}'), {"问候": [{"c": "你好"}]})
+
     # New tests for serialization functionality
     def test_save_dialogues_json(self):
         """Test saving dialogues to JSON"""
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import argparse
+import heapq
+import os
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from session import get_session
+
+INITIALS = ['', 'b', 'p', 'm', 'f', 'd', 't', 'n', 'l', 'g', 'k', 'h', 'j', 'q', 'x',
+            'zh', 'ch', 'sh', 'r', 'z', 'c', 's', 'y', 'w']
+FINALS = ['a', 'o', 'e', 'ai', 'ei', 'ao', 'ou', 'an', 'en', 'ang', 'eng', 'ong',
+          'i', 'ia', 'ie', 'iao', 'iu', 'ian', 'in', 'iang', 'ing', 'iong',
+          'u', 'ua', 'uo', 'uai', 'ui', 'uan', 'un', 'uang', 'ue', 'v', 've', 'van', 'vn']
+# Every spelling the initials and finals make, which is a superset of real
+# pinyin; good enough to split "zhidao" into "zhi dao". Without an initial
+# only finals starting with a, o or e are written; er stands alone and 'r'
+# covers erhua ("zher").
+SYLLABLES = frozenset(
+    initial + final for initial in INITIALS for final in FINALS if initial or final[0] in 'aoe'
+) | {'er', 'r'}
+SORTED_SYLLABLES = sorted(SYLLABLES)
+LONGEST_SYLLABLE = max(map(len, SYLLABLES))
+# Apostrophes, spaces, hyphens and tone numbers separate syllables
+SEPARATOR_RE = re.compile(r"[\s'’\-0-9]+")
+
+def normalize_pinyin(text: str) -> str:
+    """Lowercase toneless pinyin: tone marks dropped, ü (or u:) written as v"""
+    text = unicodedata.normalize('NFD', text.lower()).replace('ü', 'v').replace('u:', 'v')
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+def _is_syllable_prefix(chunk: str) -> bool:
+    index = bisect_left(SORTED_SYLLABLES, chunk)
+    return index < len(SORTED_SYLLABLES) and SORTED_SYLLABLES[index].startswith(chunk)
+
+def _split_chunk(chunk: str, partial: bool, strict: bool, first: bool = True) -> Optional[List[str]]:
+    # Longest syllable first, backing off when the rest doesn't split. Strictly,
+    # only the first syllable may start with a vowel: "keneng" is "ke neng",
+    # since "ken eng" would be written "ken'eng".
+    if not chunk:
+        return []
+    if strict and not first and chunk[0] in 'aoe':
+        return None
+    if partial and len(chunk) < LONGEST_SYLLABLE and _is_syllable_prefix(chunk):
+        return [chunk]
+    for length in range(min(len(chunk), LONGEST_SYLLABLE), 0, -1):
+        if chunk[:length] in SYLLABLES:
+            rest = _split_chunk(chunk[length:], partial, strict, False)
+            if rest is not None:
+                return [chunk[:length], *rest]
+    return None
+
+def split_syllables(text: str, partial: bool = False) -> Optional[List[str]]:
+    """
+    Toneless syllables of pinyin with or without tones ("zhīdào", "zhi1dao4",
+    "zhi dao"), or None if it isn't pinyin. With partial, the last syllable
+    may be unfinished ("zhid" -> ["zhi", "d"]).
+    """
+    chunks = [chunk for chunk in SEPARATOR_RE.split(normalize_pinyin(text)) if chunk]
+    syllables: List[str] = []
+    for i, chunk in enumerate(chunks):
+        last = partial and i == len(chunks) - 1
+        split = _split_chunk(chunk, last, True)
+        if split is None:
+            # Apostrophes left out before a vowel: "dier", "xian" for "xi'an"
+            split = _split_chunk(chunk, last, False)
+        if split is None:
+            return None
+        syllables.extend(split)
+    return syllables
+
+class PinyinEntry(NamedTuple):
+    word: str
+    pinyin: str  # as in the file: toneless, syllables run together
+    gloss: str
+    rank: int  # line in the file, most frequent first
+
+class PinyinIndex:
+    """
+    Pinyin -> words and hanzi -> (pinyin, gloss) lookups over one word list.
+
+    Entries are kept in one list sorted by their syllables joined with spaces
+    ("zhi dao"), so every query is a binary search for the first match and a
+    scan over the adjacent keys that share its prefix. Matches are returned
+    by rank. Tones in queries are accepted and ignored, since the word list
+    has toneless pinyin.
+    """
+    def __init__(self, entries: Iterable[PinyinEntry]):
+        self.entries = list(entries)
+        self.by_word: Dict[str, PinyinEntry] = {}
+        keyed = []
+        for entry in self.entries:
+            # The first (most frequent) reading of a word wins
+            self.by_word.setdefault(entry.word, entry)
+            syllables = split_syllables(entry.pinyin)
+            keyed.append((' '.join(syllables) if syllables else normalize_pinyin(entry.pinyin), entry.rank))
+        keyed.sort()
+        self.keys = [key for key, _ in keyed]
+        self.ranks = [rank for _, rank in keyed]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, word: str) -> Optional[Tuple[str, str]]:
+        """(pinyin, gloss) of word, or None if it isn't in the list"""
+        entry = self.by_word.get(word)
+        return None if entry is None else (entry.pinyin, entry.gloss)
+
+    def search(self, query: str, mode: str = 'prefix', limit: Optional[int] = None) -> List[PinyinEntry]:
+        """
+        Entries whose pinyin matches query, most frequent first. mode is
+        'prefix' (the last syllable may be unfinished: "zhid" finds 知道),
+        'syllable' (whole syllables from the start: "zhi" finds 知道 but
+        not 中) or 'exact'.
+        """
+        if mode not in ('prefix', 'syllable', 'exact'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        syllables = split_syllables(query, partial=mode == 'prefix')
+        if not syllables:
+            return []
+        key = ' '.join(syllables)
+        keys, ranks = self.keys, self.ranks
+        matched = []
+        for i in range(bisect_left(keys, key), len(keys)):
+            candidate = keys[i]
+            if not candidate.startswith(key):
+                break
+            rest = candidate[len(key):]
+            if mode == 'prefix' or not rest or (mode == 'syllable' and rest[0] == ' '):
+                matched.append(ranks[i])
+        ranks = heapq.nsmallest(limit, matched) if limit is not None else sorted(matched)
+        return [self.entries[rank] for rank in ranks]
+
+def read_pinyin_entries(path: str) -> List[PinyinEntry]:
+    """Entries of a 'hanzi,pinyin,gloss' file such as ../words/10k-expl.txt; glosses may contain commas"""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split(',', 2)
+            if len(fields) != 3:
+                raise ValueError(f"{path}:{line_number}: expected hanzi,pinyin,gloss")
+            word, pinyin, gloss = (field.strip() for field in fields)
+            entries.append(PinyinEntry(word, pinyin, gloss, len(entries)))
+    return entries
+
+def load_pinyin_index(path: str) -> PinyinIndex:
+    return PinyinIndex(read_pinyin_entries(path))
+
+def get_default_pinyin_path() -> str:
+    """Get the default path for the explained word list relative to this script."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "..", "words", "10k-expl.txt")
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up vocabulary words by pinyin, with or without tones')
+    parser.add_argument('queries', nargs='+', help='Pinyin such as "zhidao", "zhi dao" or "zhī dào"')
+    parser.add_argument('--file', help='hanzi,pinyin,gloss word list (default: ../words/10k-expl.txt)')
+    parser.add_argument('--mode', choices=['prefix', 'syllable', 'exact'], default='prefix',
+                        help='prefix: the last syllable may be unfinished; syllable: whole syllables '
+                             'from the start of the word; exact: the whole word (default: prefix)')
+    parser.add_argument('-k', type=int, default=10, help='Matches to print per query (default: 10)')
+    args = parser.parse_args()
+
+    try:
+        index = get_session().pinyin_index(args.file or get_default_pinyin_path())
+    except Exception as e:
+        print(f"Error processing pinyin file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for query in args.queries:
+        for entry in index.search(query, args.mode, args.k):
+            print(f"{query}\t{entry.word}\t{entry.pinyin}\t{entry.gloss}")
+
+if __name__ == '__main__':
+    main()
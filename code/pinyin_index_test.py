@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from pinyin_index import PinyinEntry, PinyinIndex, load_pinyin_index, split_syllables
+
+WORDS = ['知道,zhidao,to know', '只,zhi,only', '中,zhong,middle', '可能,keneng,maybe',
+         '这儿,zher,here', '只是,zhishi,merely, only', '知,zhi,to know (literary)']
+
+class TestSplitSyllables(unittest.TestCase):
+    def test_tones_and_separators(self):
+        for text in ['zhidao', 'zhi dao', 'zhīdào', 'Zhi1dao4', "zhi'dao", 'zhi-dao']:
+            self.assertEqual(split_syllables(text), ['zhi', 'dao'], text)
+        self.assertEqual(split_syllables('nǚ'), ['nv'])
+        self.assertEqual(split_syllables('lu:4'), ['lv'])
+
+    def test_ambiguous_splits(self):
+        # Later syllables start with a consonant unless an apostrophe says otherwise
+        self.assertEqual(split_syllables('keneng'), ['ke', 'neng'])
+        self.assertEqual(split_syllables("ken'eng"), ['ken', 'eng'])
+        self.assertEqual(split_syllables('juede'), ['jue', 'de'])
+        self.assertEqual(split_syllables('zher'), ['zhe', 'r'])
+
+    def test_partial(self):
+        self.assertEqual(split_syllables('zhid', partial=True), ['zhi', 'd'])
+        self.assertIsNone(split_syllables('zhid'))
+        self.assertIsNone(split_syllables('hello'))
+
+class TestPinyinIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = PinyinIndex(PinyinEntry(*line.split(',', 2), rank)
+                                 for rank, line in enumerate(WORDS))
+
+    def words(self, query, mode='prefix', limit=None):
+        return [entry.word for entry in self.index.search(query, mode, limit)]
+
+    def test_prefix(self):
+        self.assertEqual(self.words('zhid'), ['知道'])
+        self.assertEqual(self.words('zh'), ['知道', '只', '中', '这儿', '只是', '知'])
+        self.assertEqual(self.words('zh', limit=2), ['知道', '只'])
+        self.assertEqual(self.words('zhī'), ['知道', '只', '只是', '知'])
+
+    def test_syllable_and_exact(self):
+        self.assertEqual(self.words('zhi', 'syllable'), ['知道', '只', '只是', '知'])
+        self.assertEqual(self.words('zhi4', 'exact'), ['只', '知'])
+        self.assertEqual(self.words('zhe', 'syllable'), ['这儿'])
+        self.assertEqual(self.words('zhid', 'syllable'), [])
+        with self.assertRaises(ValueError):
+            self.index.search('zhi', 'fuzzy')
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup('只是'), ('zhishi', 'merely, only'))
+        self.assertIsNone(self.index.lookup('不'))
+
+    def test_load(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+            f.write('\n'.join(WORDS) + '\n\n')
+        try:
+            index = load_pinyin_index(f.name)
+            self.assertEqual(len(index), len(WORDS))
+            self.assertEqual(index.lookup('知'), ('zhi', 'to know (literary)'))
+        finally:
+            os.unlink(f.name)
+
+if __name__ == '__main__':
+    unittest.main()
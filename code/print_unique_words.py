@@ -3,9 +3,9 @@ import argparse
 import sys
 import random
 from typing import List
-from parse import Dialogue, DialogueParseError, parse_dialogues
-from trie import build_trie_from_words
-from text_utils import read_word_list, extract_dialogue_words_with_trie
+from parse import Dialogue, DialogueParseError
+from session import get_session
+from text_utils import extract_dialogue_words_with_trie
 
 def main():
     parser = argparse.ArgumentParser(description='Extract words from dialogues using a word list')
@@ -46,17 +46,14 @@ def main():
 
     # Read and parse word list
     try:
-        words = read_word_list(args.words)
-        word_trie = build_trie_from_words(words)
+        word_trie = get_session().trie(args.words)
     except Exception as e:
         print(f"Error processing word list: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Read and parse dialogues
+    # Index the dialogue file; only the selected range is read and parsed below
     try:
-        with open(args.dialogues, 'r', encoding='utf-8') as f:
-            yaml_text = f.read()
-        all_dialogues = parse_dialogues(yaml_text)
+        dialogue_file = get_session().dialogue_file(args.dialogues)
     except FileNotFoundError:
         print(f"Dialogue file not found: {args.dialogues}", file=sys.stderr)
         sys.exit(1)
@@ -67,9 +64,11 @@ def main():
         print(f"Error reading dialogue file: {e}", file=sys.stderr)
         sys.exit(1)
 
+    total = len(dialogue_file)
+
     # Handle out of range start index
-    if args.first_dialogue >= len(all_dialogues):
-        print(f"Error: --first-dialogue ({args.first_dialogue}) exceeds number of dialogues ({len(all_dialogues)})",
+    if args.first_dialogue >= total:
+        print(f"Error: --first-dialogue ({args.first_dialogue}) exceeds number of dialogues ({total})",
               file=sys.stderr)
         sys.exit(1)
 
@@ -77,11 +76,15 @@ def main():
     end_index = None
     if args.dialogue_count is not None:
         end_index = args.first_dialogue + args.dialogue_count
-        if end_index > len(all_dialogues):
+        if end_index > total:
             print(f"Warning: requested {args.dialogue_count} dialogues but only "
-                  f"{len(all_dialogues) - args.first_dialogue} remain after index {args.first_dialogue}",
+                  f"{total - args.first_dialogue} remain after index {args.first_dialogue}",
                   file=sys.stderr)
-    selected_dialogues = all_dialogues[args.first_dialogue:end_index]
+    try:
+        selected_dialogues = dialogue_file[args.first_dialogue:end_index]
+    except DialogueParseError as e:
+        print(f"Error parsing dialogues: {e}", file=sys.stderr)
+        sys.exit(1)
 
     # Extract and print words using the trie for proper word segmentation
     found_words = extract_dialogue_words_with_trie(selected_dialogues, word_trie)
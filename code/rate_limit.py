@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+class RPSLimiter:
+    """Rate limiter for API calls"""
+    def __init__(self, max_rps: int):
+        self.max_rps = max_rps
+        self.semaphore = asyncio.Semaphore(max_rps)
+        self.last_release_time = {}  # Track last release time for each slot
+
+    async def acquire(self):
+        """Acquire a slot while maintaining the RPS limit"""
+        await self.semaphore.acquire()
+        current_time = time.monotonic()
+
+        # Find the oldest slot
+        slot = None
+        oldest_time = float('inf')
+        for i in range(self.max_rps):
+            last_time = self.last_release_time.get(i, 0)
+            if last_time < oldest_time:
+                oldest_time = last_time
+                slot = i
+
+        # If we need to wait to maintain RPS, do so
+        time_since_last = current_time - oldest_time
+        if time_since_last < 1.0:  # Less than a second has passed
+            await asyncio.sleep(1.0 - time_since_last)
+
+        self.last_release_time[slot] = time.monotonic()
+        return slot
+
+    def release(self):
+        """Release a slot"""
+        self.semaphore.release()
+
+class AsyncRateLimiter:
+    """Context manager for rate limiting"""
+    def __init__(self, limiter: RPSLimiter):
+        self.limiter = limiter
+        self.slot = None
+
+    async def __aenter__(self):
+        self.slot = await self.limiter.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.limiter.release()
@@ -0,0 +1,79 @@
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
+
+from dialogue_file import DialogueFile
+from parse import Dialogue
+from text_utils import read_word_list
+from trie import Trie, build_trie_from_words
+
+class Session:
+    """
+    Word lists, tries and dialogue files loaded by commands in this process.
+
+    A standalone command loads each file once anyway; in frankenfrank's
+    --repl and --batch modes every later command reuses what earlier ones
+    loaded. An entry is reloaded when its file's size or mtime changes.
+    """
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Path], Tuple[Tuple[int, int], Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, kind: str, path: Union[str, Path], load: Callable[[Path], Any]) -> Any:
+        path = Path(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Let the loader report missing files the way the command expects
+            return load(path)
+        key = (kind, path.resolve())
+        version = (stat.st_size, stat.st_mtime_ns)
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = load(path)
+        self._entries[key] = (version, value)
+        return value
+
+    def word_list(self, path: Union[str, Path]) -> List[str]:
+        """Words from a word list file, in file order"""
+        return self._get('words', path, lambda p: read_word_list(str(p)))
+
+    def word_set(self, path: Union[str, Path]) -> Set[str]:
+        return self._get('word_set', path, lambda p: set(self.word_list(p)))
+
+    def trie(self, path: Union[str, Path]) -> Trie:
+        """Segmentation trie built from a word list file"""
+        return self._get('trie', path, lambda p: build_trie_from_words(self.word_list(p)))
+
+    def pinyin_index(self, path: Union[str, Path]) -> 'PinyinIndex':
+        """Pinyin and gloss lookups from a hanzi,pinyin,gloss word list"""
+        from pinyin_index import load_pinyin_index
+        return self._get('pinyin_index', path, lambda p: load_pinyin_index(str(p)))
+
+    def dialogue_file(self, path: Union[str, Path]) -> DialogueFile:
+        """Indexed dialogue file that keeps every dialogue it has parsed"""
+        return self._get('dialogue_file', path, lambda p: DialogueFile(p, cache=True))
+
+    def dialogues(self, path: Union[str, Path]) -> List[Dialogue]:
+        """All dialogues in a file"""
+        return list(self.dialogue_file(path))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def describe(self) -> List[str]:
+        """One line per cached file, for the REPL's 'cache' command"""
+        lines = [f"{self.hits} hits, {self.misses} loads"]
+        for (kind, path), _ in sorted(self._entries.items(), key=lambda item: (str(item[0][1]), item[0][0])):
+            lines.append(f"  {kind:<14} {path}")
+        return lines
+
+_session = Session()
+
+def get_session() -> Session:
+    """The session shared by all commands run in this process"""
+    return _session
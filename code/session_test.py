@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from parse import Dialogue, DialogueLine, save_dialogues
+from session import Session
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.words = self.dir / "words.txt"
+        self.words.write_text("你好\n我们\n", encoding="utf-8")
+        self.session = Session()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reuses_loaded_files(self):
+        trie = self.session.trie(self.words)
+        self.assertIs(self.session.trie(str(self.words)), trie)
+        self.assertEqual(self.session.word_set(self.words), {"你好", "我们"})
+        self.assertEqual(self.session.misses, 3)  # words, trie, word_set
+
+    def test_reloads_changed_files(self):
+        self.assertEqual(self.session.word_list(self.words), ["你好", "我们"])
+        self.words.write_text("你好\n我们\n老师\n", encoding="utf-8")
+        self.assertEqual(self.session.word_list(self.words), ["你好", "我们", "老师"])
+
+        # Same size, new mtime
+        self.words.write_text("你好\n我们\n学生\n", encoding="utf-8")
+        stat = os.stat(self.words)
+        os.utime(self.words, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.session.word_list(self.words)[-1], "学生")
+
+    def test_dialogues_are_shared(self):
+        path = self.dir / "d.json"
+        dialogues = [Dialogue(title="T", lines=[DialogueLine(chinese="你好", speaker="A")])]
+        save_dialogues(dialogues, path)
+        self.assertEqual(self.session.dialogues(path), dialogues)
+        self.assertIs(self.session.dialogues(path)[0], self.session.dialogue_file(path)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from mp3_frames import split_mp3
+
+MARK_PREFIX = 'line'
+
+def build_ssml(texts: Sequence[str], gap_ms: int = 300) -> str:
+    """
+    Build one SSML document speaking all texts in order, with a <mark> before
+    each one. Every text is surrounded by half of gap_ms of silence, so cutting
+    at the marks leaves each piece with a little padding on both sides.
+    """
+    half = gap_ms // 2
+    parts = ['<speak>']
+    for i, text in enumerate(texts):
+        parts.append(f'<mark name="{MARK_PREFIX}{i}"/><break time="{half}ms"/>'
+                     f'{escape(text)}<break time="{half}ms"/>')
+    parts.append('</speak>')
+    return ''.join(parts)
+
+def split_batch_audio(audio: bytes, timepoints: Sequence, count: int) -> List[bytes]:
+    """
+    Split the audio of a build_ssml request into one MP3 per text, using the
+    SSML mark timepoints (objects with mark_name and time_seconds) returned with it.
+    """
+    times = {timepoint.mark_name: timepoint.time_seconds for timepoint in timepoints}
+    missing = [i for i in range(count) if f'{MARK_PREFIX}{i}' not in times]
+    if missing:
+        raise ValueError(f"Response is missing timepoints for lines {missing}")
+
+    cut_times = [times[f'{MARK_PREFIX}{i}'] for i in range(count)]
+    if cut_times != sorted(cut_times):
+        raise ValueError("SSML mark timepoints are out of order")
+
+    # The piece before the first mark is empty (or a sliver of leading silence)
+    return split_mp3(audio, cut_times)[1:]
+
+class MicroBatcher:
+    """
+    Collects texts submitted under the same key (e.g. speaker and speed) and
+    synthesizes them together. A batch is sent when it reaches max_items or
+    max_chars, or linger seconds after its first text arrived.
+    """
+    def __init__(self, run_batch: Callable[[Hashable, List[str]], Awaitable[List[bytes]]],
+                 max_items: int, max_chars: int = 4000, linger: float = 0.05):
+        self.run_batch = run_batch
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.linger = linger
+        self._pending: Dict[Hashable, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+    async def submit(self, key: Hashable, text: str) -> bytes:
+        """Queue a text and wait for its share of the batch's audio"""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(key)
+        if pending and sum(len(t) for t, _ in pending) + len(text) > self.max_chars:
+            self._flush(key)
+            pending = None
+        if pending is None:
+            pending = self._pending[key] = []
+            self._timers[key] = loop.call_later(self.linger, self._flush, key)
+
+        future = loop.create_future()
+        pending.append((text, future))
+        if len(pending) >= self.max_items:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        items = self._pending.pop(key, None)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if not items:
+            return
+        task = asyncio.ensure_future(self._run(key, items))
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, items: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            results = await self.run_batch(key, [text for text, _ in items])
+            if len(results) != len(items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(items)} texts")
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
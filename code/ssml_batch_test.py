@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from fake_tts import FakeTextToSpeechClient, SILENCE, frame_fills, make_frames
+from mp3_frames import iter_frames, mp3_duration, split_mp3
+from ssml_batch import MicroBatcher, build_ssml, split_batch_audio
+
+def ssml_request(ssml: str, speaking_rate: float = 0.87) -> SimpleNamespace:
+    return SimpleNamespace(
+        input=SimpleNamespace(ssml=ssml),
+        voice=SimpleNamespace(name='cmn-CN-Wavenet-A'),
+        audio_config=SimpleNamespace(speaking_rate=speaking_rate),
+    )
+
+class TestMp3Frames(unittest.TestCase):
+    def test_iter_frames(self):
+        audio = b'ID3\x03\x00\x00\x00\x00\x00\x02xx' + make_frames(3, 7)
+        frames = list(iter_frames(audio))
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[0].offset, 12)
+        self.assertEqual(frames[0].sample_rate, 24000)
+        self.assertAlmostEqual(mp3_duration(audio), 3 * 0.024)
+
+    def test_split_rounds_to_nearest_frame(self):
+        audio = make_frames(2, 1) + make_frames(2, 2)
+        first, second = split_mp3(audio, [0.048 - 0.011])
+        self.assertEqual(frame_fills(first), [1, 1])
+        self.assertEqual(frame_fills(second), [2, 2])
+
+class TestSsmlBatch(unittest.TestCase):
+    def test_build_ssml_escapes_text(self):
+        ssml = build_ssml(["你好<吗>", "A&B"])
+        self.assertIn('<mark name="line0"/>', ssml)
+        self.assertIn('你好&lt;吗&gt;', ssml)
+        self.assertIn('A&amp;B', ssml)
+
+    def test_split_boundaries_against_fake_server(self):
+        texts = ["你好！", "我很好，谢谢。你呢？", "好", "我们走吧！"]
+        client = FakeTextToSpeechClient()
+        response = asyncio.run(client.synthesize_speech(request=ssml_request(build_ssml(texts))))
+        pieces = split_batch_audio(response.audio_content, response.timepoints, len(texts))
+
+        self.assertEqual(len(pieces), len(texts))
+        self.assertEqual(b''.join(pieces), response.audio_content)
+        for i, piece in enumerate(pieces):
+            fills = frame_fills(piece)
+            # Exactly this line's speech, padded by silence on both sides
+            self.assertEqual(set(fills) - {SILENCE}, {i + 1})
+            self.assertEqual(fills[0], SILENCE)
+            self.assertEqual(fills[-1], SILENCE)
+            self.assertEqual(fills.count(i + 1), frame_fills(response.audio_content).count(i + 1))
+
+    def test_split_missing_timepoint(self):
+        client = FakeTextToSpeechClient()
+        response = asyncio.run(client.synthesize_speech(request=ssml_request(build_ssml(["你好"]))))
+        with self.assertRaises(ValueError):
+            split_batch_audio(response.audio_content, response.timepoints, 2)
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_batches_by_key_and_size(self):
+        batches = []
+
+        async def run_batch(key, texts):
+            batches.append((key, texts))
+            return [f"{key}:{text}".encode() for text in texts]
+
+        async def run():
+            batcher = MicroBatcher(run_batch, max_items=2, linger=0.01)
+            return await asyncio.gather(
+                batcher.submit('A', 'one'),
+                batcher.submit('B', 'two'),
+                batcher.submit('A', 'three'),
+                batcher.submit('A', 'four'),
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [b'A:one', b'B:two', b'A:three', b'A:four'])
+        self.assertIn(('A', ['one', 'three']), batches)
+        self.assertIn(('A', ['four']), batches)
+        self.assertIn(('B', ['two']), batches)
+
+    def test_errors_reach_every_caller(self):
+        async def run_batch(key, texts):
+            raise RuntimeError("quota exceeded")
+
+        async def run():
+            batcher = MicroBatcher(run_batch, max_items=5, linger=0.001)
+            return await asyncio.gather(batcher.submit('A', 'x'), batcher.submit('A', 'y'),
+                                        return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from audio_codec import AudioCodecError, decode_mp3, require_ffmpeg
+from mp3_frames import mp3_duration
+from time_stretch import derive_slow_mp3, ltas_distance, resample_stretch, wsola
+
+# Speaking rates used by tts.py for the normal and slow versions
+NORMAL_RATE = 0.87
+SLOW_RATE = 0.75
+
+def find_pairs(audio_dir: Path) -> List[Tuple[Path, Path]]:
+    """Find (normal, slow) MP3 pairs generated by tts.py"""
+    pairs = []
+    for entry in os.scandir(audio_dir):
+        if entry.name.endswith('.mp3') and not entry.name.endswith('_slow.mp3'):
+            slow_path = audio_dir / entry.name.replace('.mp3', '_slow.mp3')
+            if slow_path.exists():
+                pairs.append((Path(entry.path), slow_path))
+    pairs.sort()
+    return pairs
+
+def compare_pair(normal_mp3: bytes, slow_mp3: bytes, rate: float) -> Dict[str, float]:
+    """Compare a locally stretched slow version with the API's slow version"""
+    normal, sample_rate = decode_mp3(normal_mp3)
+    api_slow, _ = decode_mp3(slow_mp3, sample_rate)
+    stretched = wsola(normal, rate, sample_rate)
+    return {
+        'duration_ratio': len(stretched) / len(api_slow),
+        'wsola_ltas_db': ltas_distance(api_slow, stretched),
+        'resample_ltas_db': ltas_distance(api_slow, resample_stretch(normal, rate)),
+        'normal_ltas_db': ltas_distance(api_slow, normal),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare locally time-stretched slow audio with API-generated slow audio '
+                    '(quality and throughput)')
+    parser.add_argument('-d', '--audio-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                  '..', 'output'),
+                        help='Directory with normal and _slow MP3 files (default: ../output)')
+    parser.add_argument('-n', '--samples', type=int, default=50,
+                        help='Number of random pairs to test (default: 50)')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed for choosing pairs (default: 0)')
+    args = parser.parse_args()
+
+    try:
+        require_ffmpeg()
+    except AudioCodecError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    pairs = find_pairs(Path(args.audio_dir))
+    if not pairs:
+        print(f"No normal/slow MP3 pairs found in {args.audio_dir}", file=sys.stderr)
+        sys.exit(1)
+    pairs = random.Random(args.seed).sample(pairs, min(args.samples, len(pairs)))
+    normals = [normal.read_bytes() for normal, _ in pairs]
+    slows = [slow.read_bytes() for _, slow in pairs]
+    rate = SLOW_RATE / NORMAL_RATE
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # Throughput of the full decode -> stretch -> encode path used by tts.py --local-slow
+            started = time.perf_counter()
+            derived = list(pool.map(derive_slow_mp3, normals, [rate] * len(normals)))
+            elapsed = time.perf_counter() - started
+
+            results = list(pool.map(compare_pair, normals, slows, [rate] * len(normals)))
+    except AudioCodecError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    audio_seconds = sum(mp3_duration(audio) for audio in derived)
+    print(f"Pairs tested:        {len(pairs)}")
+    print(f"Workers:             {args.workers or os.cpu_count()}")
+    print(f"Throughput:          {len(pairs) / elapsed:.1f} files/s, "
+          f"{audio_seconds / elapsed:.1f}x real time")
+    print()
+    print("Distance from API slow audio (long-term average spectrum, dB; lower is closer):")
+    for key, label in (('wsola_ltas_db', 'WSOLA (local slow)'),
+                       ('normal_ltas_db', 'normal, unstretched'),
+                       ('resample_ltas_db', 'naive resampling')):
+        values = [result[key] for result in results]
+        print(f"  {label:<22} mean {statistics.mean(values):6.2f}  median {statistics.median(values):6.2f}")
+    ratios = [result['duration_ratio'] for result in results]
+    print(f"Duration vs API slow: mean {statistics.mean(ratios):.3f}, "
+          f"min {min(ratios):.3f}, max {max(ratios):.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,31 +1,31 @@
 #!/usr/bin/env python3
+import re
 import sys
 import unicodedata
 from typing import Set, List
 from parse import Dialogue
 from trie import Trie, build_trie_from_words
 
+# Word lists have one word per line (10K.txt) or comma-separated words (500.txt)
+WORD_SEPARATOR_RE = re.compile(r'[,，\s]+')
+
 def read_word_list(filename: str) -> List[str]:
     """
-    Read words from a file, one per line, skipping empty lines and removing punctuation/whitespace.
+    Read words from a file, one per line or separated by commas, skipping empty entries and
+    removing punctuation/whitespace.
     Returns a list to maintain original order (useful for some applications).
     For set operations, callers can convert to set as needed.
     """
     try:
         with open(filename, 'r', encoding='utf-8') as f:
-            # Read lines and filter out empty ones after stripping
-            lines = [line.strip() for line in f]
-            # Remove all whitespace and punctuation from each non-empty line
             words = []
-            for line in lines:
-                # Skip completely empty lines
-                if not line:
-                    continue
-                # Remove all whitespace within the line
-                word = clean_text(line)
-                # Only add non-empty results
-                if word:
-                    words.append(word)
+            for line in f:
+                # A line holds one word, or several separated by commas
+                for entry in WORD_SEPARATOR_RE.split(line):
+                    # Remove punctuation; only add non-empty results
+                    word = clean_text(entry)
+                    if word:
+                        words.append(word)
             return words
     except FileNotFoundError:
         print(f"Word list file not found: {filename}", file=sys.stderr)
@@ -51,6 +51,10 @@ def extract_words_with_trie(text: str, word_trie: Trie) -> Set[str]:
     """Extract words from text using the trie to find longest matches."""
     return word_trie.find_longest_substrings(clean_text(text))
 
+def segment_text_with_trie(text: str, word_trie: Trie) -> List[str]:
+    """Split text into an ordered list of words using the trie's longest matches."""
+    return word_trie.segment(clean_text(text))
+
 def extract_dialogue_words_with_trie(dialogues: List[Dialogue], word_trie: Trie) -> Set[str]:
     """Extract all words from dialogues using trie-based segmentation."""
     words = set()
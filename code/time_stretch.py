@@ -0,0 +1,88 @@
+import numpy as np
+
+from audio_codec import decode_mp3, encode_mp3
+
+def wsola(samples: np.ndarray, rate: float, sample_rate: int,
+          frame_ms: float = 30.0, tolerance_ms: float = 8.0) -> np.ndarray:
+    """
+    Change the tempo of mono audio by rate without changing its pitch, using
+    waveform-similarity overlap-add. rate < 1 slows down: the result is
+    len(samples) / rate samples long.
+
+    Each Hann-windowed output frame is taken from near its nominal input
+    position, shifted by up to tolerance_ms to the offset whose waveform best
+    continues the previous frame, which avoids phasing artifacts.
+    """
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    samples = np.asarray(samples, dtype=np.float32)
+    output_length = int(round(len(samples) / rate))
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frame = max(2, int(sample_rate * frame_ms / 1000) // 2 * 2)
+    synthesis_hop = frame // 2
+    analysis_hop = synthesis_hop * rate
+    tolerance = int(sample_rate * tolerance_ms / 1000)
+    window = np.hanning(frame).astype(np.float32)
+
+    frame_count = output_length // synthesis_hop + 1
+    # Pad so every candidate segment lies fully inside the buffer
+    padded = np.pad(samples, (tolerance, frame * 2 + tolerance + int(np.ceil(analysis_hop))))
+    output = np.zeros(frame_count * synthesis_hop + frame, dtype=np.float32)
+    weight = np.zeros_like(output)
+
+    previous = tolerance
+    for k in range(frame_count):
+        nominal = int(round(k * analysis_hop)) + tolerance
+        if k == 0:
+            position = nominal
+        else:
+            continuation = padded[previous + synthesis_hop:previous + synthesis_hop + frame]
+            region = padded[nominal - tolerance:nominal + tolerance + frame]
+            position = nominal - tolerance + int(np.argmax(np.correlate(region, continuation, mode='valid')))
+        start = k * synthesis_hop
+        output[start:start + frame] += padded[position:position + frame] * window
+        weight[start:start + frame] += window
+        previous = position
+
+    output /= np.maximum(weight, 1e-3)
+    return output[:output_length]
+
+def derive_slow_mp3(normal_mp3: bytes, rate: float) -> bytes:
+    """
+    Decode a normal-speed MP3, slow it down by rate with WSOLA and re-encode it.
+    Module-level so it can run in a process pool.
+    """
+    samples, sample_rate = decode_mp3(normal_mp3)
+    return encode_mp3(wsola(samples, rate, sample_rate), sample_rate)
+
+def resample_stretch(samples: np.ndarray, rate: float) -> np.ndarray:
+    """
+    Naive tempo change by linear resampling, which also lowers the pitch.
+    Used as a baseline when judging wsola output.
+    """
+    output_length = int(round(len(samples) / rate))
+    positions = np.linspace(0, len(samples) - 1, output_length)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def ltas_distance(a: np.ndarray, b: np.ndarray, frame: int = 512, hop: int = 256) -> float:
+    """
+    RMS difference in dB between the long-term average spectra of two signals.
+    It doesn't depend on time alignment, so clips of different lengths and
+    prosody can be compared; pitch or timbre changes show up clearly.
+    """
+    def average_spectrum(x: np.ndarray) -> np.ndarray:
+        if len(x) < frame:
+            x = np.pad(x, (0, frame - len(x)))
+        frames = np.lib.stride_tricks.sliding_window_view(x, frame)[::hop]
+        power = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2
+        energy = power.sum(axis=1)
+        # Leave out silence, which differs in length between versions
+        voiced = power[energy > energy.max() * 1e-3]
+        return 10 * np.log10(voiced.mean(axis=0) + 1e-10)
+
+    spectrum_a, spectrum_b = average_spectrum(a), average_spectrum(b)
+    # Compare shapes, not overall level
+    difference = (spectrum_a - spectrum_a.mean()) - (spectrum_b - spectrum_b.mean())
+    return float(np.sqrt(np.mean(difference ** 2)))
@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+    import audio_codec
+    from time_stretch import ltas_distance, resample_stretch, wsola
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 24000
+
+def tone(frequency: float, seconds: float = 1.0) -> 'np.ndarray':
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def peak_frequency(samples: 'np.ndarray') -> float:
+    spectrum = np.abs(np.fft.rfft(samples))
+    return float(np.fft.rfftfreq(len(samples), 1 / SAMPLE_RATE)[np.argmax(spectrum)])
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestTimeStretch(unittest.TestCase):
+    def test_wsola_length(self):
+        samples = tone(220)
+        self.assertEqual(len(wsola(samples, 0.75 / 0.87, SAMPLE_RATE)), round(len(samples) * 0.87 / 0.75))
+        self.assertEqual(len(wsola(samples, 2.0, SAMPLE_RATE)), len(samples) // 2)
+
+    def test_wsola_preserves_pitch(self):
+        stretched = wsola(tone(220), 0.8, SAMPLE_RATE)
+        self.assertAlmostEqual(peak_frequency(stretched), 220, delta=2)
+        # Resampling to the same length lowers the pitch instead
+        self.assertAlmostEqual(peak_frequency(resample_stretch(tone(220), 0.8)), 176, delta=2)
+
+    def test_wsola_empty(self):
+        self.assertEqual(len(wsola(np.zeros(0), 0.8, SAMPLE_RATE)), 0)
+
+    def test_ltas_distance(self):
+        samples = tone(220) + tone(880) * 0.3
+        self.assertAlmostEqual(ltas_distance(samples, samples), 0.0)
+        self.assertLess(ltas_distance(samples, wsola(samples, 0.8, SAMPLE_RATE)),
+                        ltas_distance(samples, resample_stretch(samples, 0.8)))
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestFfmpegCheck(unittest.TestCase):
+    def test_missing_ffmpeg_is_reported_up_front(self):
+        with mock.patch.object(audio_codec, 'FFMPEG', 'no-such-ffmpeg-binary'):
+            with self.assertRaisesRegex(audio_codec.AudioCodecError, 'ffmpeg not found'):
+                audio_codec.require_ffmpeg()
+
+if __name__ == '__main__':
+    unittest.main()
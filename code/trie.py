@@ -1,10 +1,19 @@
-from typing import Dict, List, Optional, Set
+import heapq
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Completions kept at each node unless complete() asks for more
+DEFAULT_TOP_K = 10
 
 class TrieNode:
     def __init__(self):
         self.children: Dict[str, TrieNode] = {}
         self.is_end: bool = False
         self.value: Optional[str] = None
+        # Rank of the word ending here, lower is more frequent
+        self.rank: Optional[int] = None
+        # (rank, word) of the best completions in this subtree, built by Trie.complete
+        self.top: List[Tuple[int, str]] = []
 
     def __repr__(self) -> str:
         return f"TrieNode(value={self.value}, is_end={self.is_end}, children={len(self.children)})"
@@ -13,9 +22,16 @@ class Trie:
     def __init__(self):
         self.root = TrieNode()
         self._size = 0
+        self._inserted = 0
+        # How many completions each node's top list holds; 0 when they need rebuilding
+        self._top_k = 0
 
-    def insert(self, word: str) -> None:
-        """Insert a word into the trie."""
+    def insert(self, word: str, rank: Optional[int] = None) -> None:
+        """
+        Insert a word into the trie. rank orders completions (lower first);
+        by default words rank in the order they were first inserted, which
+        for a frequency-sorted word list like 10K.txt is frequency order.
+        """
         if not word:
             return
 
@@ -29,7 +45,13 @@ class Trie:
         # Only increment size if this is a new word
         if not node.is_end:
             self._size += 1
+            if rank is None:
+                rank = self._inserted
+        if rank is not None:
+            node.rank = rank
+        self._inserted += 1
         node.is_end = True
+        self._top_k = 0
 
     def search(self, word: str) -> bool:
         """Return True if the word is in the trie."""
@@ -48,13 +70,143 @@ class Trie:
         if node is None:
             return results
 
-        def dfs(current_node: TrieNode, current_word: str) -> None:
-            if current_node.is_end:
-                results.append(current_word)
-            for char in sorted(current_node.children.keys()):
-                dfs(current_node.children[char], current_word + char)
+        # Depth-first in sorted order, with the current word kept as a list of characters
+        path = list(prefix)
+        if node.is_end:
+            results.append(prefix)
+        stack = [iter(sorted(node.children.items()))]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    path.pop()
+                continue
+            char, child_node = child
+            path.append(char)
+            if child_node.is_end:
+                results.append(''.join(path))
+            stack.append(iter(sorted(child_node.children.items())))
+        return results
+
+    def complete(self, prefix: str, k: int = DEFAULT_TOP_K) -> List[str]:
+        """
+        The k best-ranked words starting with prefix, best first. Every node
+        keeps its subtree's best completions, so after the first call a lookup
+        costs O(len(prefix) + k) however many words share the prefix.
+        """
+        if k <= 0:
+            return []
+        if self._top_k < k:
+            self._build_top(max(k, DEFAULT_TOP_K))
+        node = self._traverse(prefix)
+        if node is None:
+            return []
+        return [word for _, word in node.top[:k]]
+
+    def _build_top(self, k: int) -> None:
+        """Fill every node's top list bottom-up by merging its children's lists"""
+        def build(node: TrieNode, path: List[str]) -> List[Tuple[int, str]]:
+            lists = []
+            if node.is_end:
+                lists.append([(node.rank, ''.join(path))])
+            for char, child in node.children.items():
+                path.append(char)
+                lists.append(build(child, path))
+                path.pop()
+            node.top = list(islice(heapq.merge(*lists), k))
+            return node.top
 
-        dfs(node, prefix)
+        build(self.root, [])
+        self._top_k = k
+
+    def fuzzy_search(self, word: str, max_distance: int = 1,
+                     limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        (word, distance) of every word within Levenshtein distance
+        max_distance of word, nearest first and then best-ranked.
+        """
+        return self.fuzzy_search_many([word], max_distance, limit)[word]
+
+    def fuzzy_search_many(self, words: Iterable[str], max_distance: int = 1,
+                          limit: Optional[int] = None) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        fuzzy_search for many words in one walk of the trie.
+
+        Each query keeps one edit distance row per node on the current path,
+        and a subtree is skipped once no query's row has a value within
+        max_distance, since the distance only grows below it. Characters that
+        don't occur in a query all give it the same next row, so it is
+        computed once per node, and when one more such character would
+        exhaust the budget only the children that end a word or lead to the
+        query's own characters are visited. Without that, a typo in the first
+        character would visit every child of the root for every query.
+        """
+        queries = list(dict.fromkeys(words))
+        query_chars = [set(query) for query in queries]
+        found: List[List[Tuple[int, int, str]]] = [[] for _ in queries]
+        # Per node: characters of children that end a word, and children by the characters of their children
+        ends: Dict[int, List[str]] = {}
+        parents: Dict[int, Dict[str, List[str]]] = {}
+
+        def step(query: str, previous: List[int], char: Optional[str]) -> List[int]:
+            row = [previous[0] + 1]
+            for j, query_char in enumerate(query):
+                row.append(min(row[j] + 1, previous[j + 1] + 1, previous[j] + (query_char != char)))
+            return row
+
+        def child_chars(node: TrieNode, query: str, other: List[int]) -> Iterable[str]:
+            """Children worth entering after a character not in query"""
+            if min(step(query, other, None)) <= max_distance:
+                return node.children
+            key = id(node)
+            if key not in parents:
+                ends[key] = [char for char, child in node.children.items() if child.is_end]
+                by_grandchild: Dict[str, List[str]] = {}
+                for char, child in node.children.items():
+                    for grandchild_char in child.children:
+                        by_grandchild.setdefault(grandchild_char, []).append(char)
+                parents[key] = by_grandchild
+            chars = set(ends[key]) if other[-1] <= max_distance else set()
+            for query_char in set(query):
+                chars.update(parents[key].get(query_char, ()))
+            return chars
+
+        def visit(node: TrieNode, active: List[Tuple[int, List[int]]], path: List[str]) -> None:
+            children = node.children
+            # Child character -> (query index, row) of the queries that go on into it
+            jobs: Dict[str, List[Tuple[int, List[int]]]] = {}
+            for index, row in active:
+                query, chars = queries[index], query_chars[index]
+                for char in chars:
+                    if char in children:
+                        jobs.setdefault(char, []).append((index, step(query, row, char)))
+                other = step(query, row, None)
+                if min(other) <= max_distance:
+                    for char in child_chars(node, query, other):
+                        if char not in chars:
+                            jobs.setdefault(char, []).append((index, other))
+
+            for char, rows in jobs.items():
+                child = children[char]
+                path.append(char)
+                still_active = []
+                for index, row in rows:
+                    if child.is_end and row[-1] <= max_distance:
+                        found[index].append((row[-1], child.rank, ''.join(path)))
+                    if min(row) <= max_distance:
+                        still_active.append((index, row))
+                if still_active and child.children:
+                    visit(child, still_active, path)
+                path.pop()
+
+        if max_distance >= 0 and queries:
+            visit(self.root, [(index, list(range(len(query) + 1))) for index, query in enumerate(queries)], [])
+
+        results = {}
+        for query, matches in zip(queries, found):
+            matches.sort()
+            results[query] = [(word, distance) for distance, _, word in matches[:limit]]
         return results
 
     def remove(self, word: str) -> bool:
@@ -64,7 +216,9 @@ class Trie:
                 if not node.is_end:
                     return False
                 node.is_end = False
+                node.rank = None
                 self._size -= 1
+                self._top_k = 0
                 return True
 
             char = word[depth]
@@ -100,16 +254,25 @@ class Trie:
         """Remove all words."""
         self.root = TrieNode()
         self._size = 0
+        self._inserted = 0
+        self._top_k = 0
 
     def find_longest_substrings(self, text: str) -> Set[str]:
         """
         Find longest possible substrings that exist in the trie.
         Returns individual characters for parts not found in trie.
         """
+        return set(self.segment(text))
+
+    def segment(self, text: str) -> List[str]:
+        """
+        Split text into greedy longest matches, in order of appearance.
+        Characters not covered by any word come out as single-character tokens.
+        """
         if not text:
-            return set()
+            return []
 
-        results = set()
+        results = []
         pos = 0
         text_len = len(text)
 
@@ -118,7 +281,7 @@ class Trie:
 
             # If current character isn't in trie, add it and move on
             if current_char not in self.root.children:
-                results.add(current_char)
+                results.append(current_char)
                 pos += 1
                 continue
 
@@ -139,11 +302,11 @@ class Trie:
 
             # If we found a match, add it and update position
             if longest_match:
-                results.add(longest_match)
+                results.append(longest_match)
                 pos = longest_match_pos
             else:
                 # No match found, add single character and move on
-                results.add(text[pos])
+                results.append(text[pos])
                 pos += 1
 
         return results
@@ -71,6 +71,52 @@ class TestTrie(unittest.TestCase):
         with_prefix = self.trie.find_all_with_prefix("你好")
         self.assertEqual(set(with_prefix), {"你好", "你好世界"})
 
+    def test_prefix_search_sorted(self):
+        trie = build_trie_from_words(["b", "ab", "a", "abc", "ac"])
+        self.assertEqual(trie.find_all_with_prefix("a"), ["a", "ab", "abc", "ac"])
+        self.assertEqual(trie.get_all_words(), ["a", "ab", "abc", "ac", "b"])
+        self.assertEqual(trie.find_all_with_prefix("x"), [])
+
+    def test_complete_by_rank(self):
+        # Word list order is frequency rank, as in 10K.txt
+        trie = build_trie_from_words(["我", "你", "我们", "你好", "我的", "我家", "我们的"])
+        self.assertEqual(trie.complete("我", 3), ["我", "我们", "我的"])
+        self.assertEqual(trie.complete("我们"), ["我们", "我们的"])
+        self.assertEqual(trie.complete("", 2), ["我", "你"])
+        self.assertEqual(trie.complete("他"), [])
+        self.assertEqual(trie.complete("我", 0), [])
+        # More than the default number of completions
+        self.assertEqual(len(trie.complete("", 20)), 7)
+
+    def test_complete_after_changes(self):
+        trie = build_trie_from_words(["我", "我们"])
+        self.assertEqual(trie.complete("我"), ["我", "我们"])
+        trie.insert("我家", rank=-1)
+        trie.remove("我")
+        self.assertEqual(trie.complete("我"), ["我家", "我们"])
+
+    def test_fuzzy_search(self):
+        trie = build_trie_from_words(["知道", "到", "看到", "直到", "不知道", "知", "中国"])
+        self.assertEqual(trie.fuzzy_search("知道", 0), [("知道", 0)])
+        # Nearest first, then in insertion order
+        self.assertEqual(trie.fuzzy_search("知到"),
+                         [("知道", 1), ("到", 1), ("看到", 1), ("直到", 1), ("知", 1)])
+        self.assertEqual(trie.fuzzy_search("知到", 2, limit=6),
+                         [("知道", 1), ("到", 1), ("看到", 1), ("直到", 1), ("知", 1), ("不知道", 2)])
+        self.assertEqual(trie.fuzzy_search("中果"), [("中国", 1)])
+        self.assertEqual(trie.fuzzy_search("天气"), [])
+        self.assertEqual(trie.fuzzy_search("", 1), [("到", 1), ("知", 1)])
+
+    def test_fuzzy_search_many_matches_single_queries(self):
+        words = ["hello", "help", "hell", "yellow", "world", "word", "sword", "held"]
+        trie = build_trie_from_words(words)
+        queries = ["helo", "wrd", "yelow", "xyz", "helo"]
+        results = trie.fuzzy_search_many(queries, 2)
+        self.assertEqual(sorted(results), ["helo", "wrd", "xyz", "yelow"])
+        for query in queries:
+            self.assertEqual(results[query], trie.fuzzy_search(query, 2))
+        self.assertEqual([word for word, _ in results["wrd"]], ["word", "world", "sword"])
+
     def test_remove(self):
         words = ["你好", "你好世界", "世界"]
         for word in words:
@@ -177,5 +223,16 @@ class TestTrie(unittest.TestCase):
         result = trie.find_longest_substrings("hello🌍world")
         self.assertEqual(result, {"hello", "🌍", "world"})
 
+    def test_segment_preserves_order_and_repeats(self):
+        words = ["你好", "世界", "你"]
+        trie = build_trie_from_words(words)
+
+        result = trie.segment("你好世界你好和你")
+        self.assertEqual(result, ["你好", "世界", "你好", "和", "你"])
+
+        self.assertEqual(trie.segment(""), [])
+        self.assertEqual(set(trie.segment("你好和世界")),
+                         trie.find_longest_substrings("你好和世界"))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -5,186 +5,433 @@ import hashlib
 import logging
 import os
 import shutil
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
 from pathlib import Path
-from typing import List, Optional, Tuple, NamedTuple
-from google.cloud import texttospeech_v1beta1
-from google.auth.exceptions import DefaultCredentialsError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, NamedTuple
 
-from parse import Dialogue, DialogueLine, parse_dialogues, save_dialogues, DialogueParseError
+from parse import Dialogue, DialogueLine, is_json_lines, parse_dialogues, save_dialogues, DialogueParseError
+from tts_metrics import NullMetrics, PipelineMetrics
+from file_utils import write_file_atomic
+from ssml_batch import MicroBatcher, build_ssml, split_batch_audio
+from tts_pool import DISPATCH_MODES, ClientPool, KeepaliveSettings, create_google_clients
+from rate_limit import AsyncRateLimiter, RPSLimiter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Voice used for each dialogue speaker
+SPEAKER_VOICES = {
+    'A': 'cmn-CN-Wavenet-A',
+    'B': 'cmn-CN-Wavenet-B',
+    'C': 'cmn-CN-Wavenet-C',
+    'D': 'cmn-CN-Wavenet-D',
+}
+
 class GenerationConfig(NamedTuple):
     """Configuration for audio generation behavior"""
     force_normal: bool
     force_slow: bool
     max_rps: int
+    # Pack up to this many short same-speaker lines into one SSML request (0 disables)
+    ssml_batch_size: int = 0
+    # Lines longer than this are always synthesized on their own
+    ssml_max_line_chars: int = 40
+    # Derive slow audio from normal audio by local time-stretching instead of the API
+    local_slow: bool = False
+    # Spread requests over this many clients, each with its own connection
+    channels: int = 1
+    dispatch: str = 'least-outstanding'
+    keepalive: KeepaliveSettings = KeepaliveSettings()
+
+    def batches_line(self, text: str) -> bool:
+        """Return True if text should be synthesized as part of an SSML batch"""
+        return self.ssml_batch_size > 1 and len(text) <= self.ssml_max_line_chars
+
+def get_file_hash(text: str, speaker: str) -> str:
+    """
+    Generate a hash for the text and speaker combination.
+    Different speakers will generate different hashes even for the same text.
+    """
+    # Combine speaker and text with a delimiter that can't appear in either
+    content = f"{speaker}\x00{text}"  # Using null byte as delimiter
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def get_audio_paths(output_dir: Path, text: str, speaker: str) -> Tuple[Path, Path]:
+    """Get the expected audio file paths for normal and slow versions"""
+    file_hash = get_file_hash(text, speaker)
+    normal_path = output_dir / f"{file_hash}.mp3"
+    slow_path = output_dir / f"{file_hash}_slow.mp3"
+    return normal_path, slow_path
+
+class GenerationPlan(NamedTuple):
+    """What a generation run would do, computed without calling the API"""
+    lines: int
+    normal: int
+    slow: int
+    characters: int
+    duplicate_requests: int
+    duplicate_characters: int
+    # Requests avoided by packing short lines into SSML batches
+    batched_requests_saved: int = 0
+    # Slow files that would be time-stretched locally instead of synthesized
+    derived_slow: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.normal + self.slow - self.batched_requests_saved
+
+    def estimated_seconds(self, max_rps: int) -> float:
+        """Lower bound on run time: the rate limiter allows max_rps requests per second"""
+        return self.requests / max_rps
+
+def plan_generation(dialogues: Iterable[Dialogue], output_dir: Path, config: GenerationConfig) -> GenerationPlan:
+    """
+    Count the syntheses DialogueTTSGenerator.process_line would make for these dialogues,
+    using the same regeneration rules. Duplicate lines are counted once, as they would
+    be generated once per run.
+    """
+    # One directory listing instead of a stat call per line
+    try:
+        existing = {entry.name for entry in os.scandir(output_dir)}
+    except FileNotFoundError:
+        existing = set()
+
+    lines = 0
+    planned = {}  # filename -> characters billed
+    batchable = {}  # (speaker, speed) -> number of lines that would go into SSML batches
+    derived = set()  # slow filenames that --local-slow would time-stretch
+    duplicate_requests = duplicate_characters = 0
+    for dialogue in dialogues:
+        for line in dialogue.lines:
+            if not line.chinese or not line.speaker:
+                continue
+            lines += 1
+            normal_path, slow_path = get_audio_paths(output_dir, line.chinese, line.speaker)
+            needed = []
+            if config.force_normal or normal_path.name not in existing or not line.audio:
+                needed.append(normal_path.name)
+            if config.force_slow or slow_path.name not in existing or not line.audio_slow:
+                needed.append(slow_path.name)
+            for name in needed:
+                if config.local_slow and name.endswith('_slow.mp3'):
+                    derived.add(name)
+                elif name in planned:
+                    duplicate_requests += 1
+                    duplicate_characters += len(line.chinese)
+                else:
+                    planned[name] = len(line.chinese)
+                    if config.batches_line(line.chinese):
+                        key = (line.speaker, 'slow' if name.endswith('_slow.mp3') else 'normal')
+                        batchable[key] = batchable.get(key, 0) + 1
+
+    slow = sum(1 for name in planned if name.endswith('_slow.mp3'))
+    batched_requests_saved = sum(
+        count - -(-count // config.ssml_batch_size) for count in batchable.values()
+    )
+    return GenerationPlan(
+        lines=lines,
+        normal=len(planned) - slow,
+        slow=slow,
+        characters=sum(planned.values()),
+        duplicate_requests=duplicate_requests,
+        duplicate_characters=duplicate_characters,
+        batched_requests_saved=batched_requests_saved,
+        derived_slow=len(derived),
+    )
 
-class RPSLimiter:
-    """Rate limiter for API calls"""
-    def __init__(self, max_rps: int):
-        self.max_rps = max_rps
-        self.semaphore = asyncio.Semaphore(max_rps)
-        self.last_release_time = {}  # Track last release time for each slot
-
-    async def acquire(self):
-        """Acquire a slot while maintaining the RPS limit"""
-        await self.semaphore.acquire()
-        current_time = time.monotonic()
-
-        # Find the oldest slot
-        slot = None
-        oldest_time = float('inf')
-        for i in range(self.max_rps):
-            last_time = self.last_release_time.get(i, 0)
-            if last_time < oldest_time:
-                oldest_time = last_time
-                slot = i
-
-        # If we need to wait to maintain RPS, do so
-        time_since_last = current_time - oldest_time
-        if time_since_last < 1.0:  # Less than a second has passed
-            await asyncio.sleep(1.0 - time_since_last)
-
-        self.last_release_time[slot] = time.monotonic()
-        return slot
-
-    def release(self):
-        """Release a slot"""
-        self.semaphore.release()
-
-class AsyncRateLimiter:
-    """Context manager for rate limiting"""
-    def __init__(self, limiter: RPSLimiter):
-        self.limiter = limiter
-        self.slot = None
-
-    async def __aenter__(self):
-        self.slot = await self.limiter.acquire()
-        return self
-
-    async def __aexit__(self, exc_type, exc, tb):
-        self.limiter.release()
+def attach_existing_audio(dialogues: Iterable[Dialogue], output_dir: Path) -> int:
+    """
+    Fill in missing audio file names for lines whose audio already exists in
+    output_dir, so only really missing audio is planned or generated.
+    Returns the number of names filled in.
+    """
+    try:
+        existing = {entry.name for entry in os.scandir(output_dir)}
+    except FileNotFoundError:
+        return 0
+
+    attached = 0
+    for dialogue in dialogues:
+        for line in dialogue.lines:
+            if not line.chinese or not line.speaker:
+                continue
+            normal_path, slow_path = get_audio_paths(output_dir, line.chinese, line.speaker)
+            if not line.audio and normal_path.name in existing:
+                line.audio = normal_path.name
+                attached += 1
+            if not line.audio_slow and slow_path.name in existing:
+                line.audio_slow = slow_path.name
+                attached += 1
+    return attached
+
+def print_plan(plan: GenerationPlan, max_rps: int) -> None:
+    """Print a human-readable summary of a generation plan"""
+    seconds = plan.estimated_seconds(max_rps)
+    print(f"Lines with speaker and text: {plan.lines}")
+    print(f"Normal speed syntheses:      {plan.normal}")
+    print(f"Slow speed syntheses:        {plan.slow}")
+    if plan.derived_slow:
+        print(f"Slow files derived locally:  {plan.derived_slow}")
+    print(f"Total API requests:          {plan.requests}")
+    if plan.batched_requests_saved:
+        print(f"Saved by SSML batching:      {plan.batched_requests_saved} requests")
+    print(f"Characters billed:           {plan.characters}")
+    print(f"Estimated time at {max_rps} rps:   {seconds // 60:.0f}m {seconds % 60:.0f}s")
+    print(f"Saved by duplicate lines:    {plan.duplicate_requests} requests, "
+          f"{plan.duplicate_characters} characters")
 
 class DialogueTTSGenerator:
-    def __init__(self, output_dir: Path, batch_size: int = 10, config: Optional[GenerationConfig] = None):
+    """
+    Generates audio for dialogue lines with the Google TTS API. Tests pass a
+    client and texttospeech types module from fake_tts instead of the real ones.
+    """
+    def __init__(self, output_dir: Path, batch_size: int = 10, config: Optional[GenerationConfig] = None,
+                 io_workers: int = 4, metrics: Optional[PipelineMetrics] = None, stretch_workers: Optional[int] = None,
+                 client: Optional[Any] = None, texttospeech: Optional[Any] = None):
         self.config = config or GenerationConfig(
             force_normal=False,
             force_slow=False,
             max_rps=15
         )
 
-        try:
-            self.client = texttospeech_v1beta1.TextToSpeechAsyncClient()
-            logger.info("Using application default credentials")
-        except DefaultCredentialsError as e:
-            creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-            if creds_path and os.path.exists(creds_path):
-                self.client = texttospeech_v1beta1.TextToSpeechAsyncClient()
-                logger.info(f"Using credentials from: {creds_path}")
-            else:
-                raise DefaultCredentialsError(
-                    "No credentials found. Either set up application default credentials "
-                    "or set GOOGLE_APPLICATION_CREDENTIALS environment variable"
-                ) from e
+        # The Google client pulls in grpc and protobuf, so it is only imported
+        # once a generator is actually created (not for --help or --plan)
+        if texttospeech is None:
+            from google.cloud import texttospeech_v1beta1 as texttospeech
+        self.texttospeech = texttospeech
+
+        # Only a pool created here is closed by close(); an injected client is the caller's
+        self._owns_client = client is None
+        if client is not None:
+            self.client = client
+        else:
+            from google.auth.exceptions import DefaultCredentialsError
+            try:
+                self.client = self.create_client_pool()
+                logger.info("Using application default credentials")
+            except DefaultCredentialsError as e:
+                creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+                if creds_path and os.path.exists(creds_path):
+                    self.client = self.create_client_pool()
+                    logger.info(f"Using credentials from: {creds_path}")
+                else:
+                    raise DefaultCredentialsError(
+                        "No credentials found. Either set up application default credentials "
+                        "or set GOOGLE_APPLICATION_CREDENTIALS environment variable"
+                    ) from e
 
         self.output_dir = output_dir
         self.output_dir.mkdir(exist_ok=True, parents=True)
         self.batch_size = batch_size
         self.rate_limiter = RPSLimiter(self.config.max_rps)
 
+        self.metrics = metrics or NullMetrics()
+
+        self.ssml_batcher = None
+        if self.config.ssml_batch_size > 1:
+            self.ssml_batcher = MicroBatcher(self.generate_audio_batch, max_items=self.config.ssml_batch_size)
+            logger.info(f"SSML batching enabled: up to {self.config.ssml_batch_size} lines of at most "
+                        f"{self.config.ssml_max_line_chars} characters per request")
+
+        # All filesystem access happens on this pool so slow disks never block the event loop
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='tts-io')
+
+        # Local slow-audio derivation is CPU-bound, so it runs in worker processes
+        self.stretch_pool = None
+        if self.config.local_slow:
+            # Fail early if numpy or the ffmpeg binary is missing
+            import time_stretch  # noqa: F401
+            from audio_codec import require_ffmpeg
+            require_ffmpeg()
+            from concurrent.futures import ProcessPoolExecutor
+            self.stretch_pool = ProcessPoolExecutor(max_workers=stretch_workers)
+            logger.info("Slow audio will be derived locally from normal audio by time-stretching")
+
+        # Audio files generated (or being generated) in this run, keyed by path.
+        # Shared across all input files so a line that appears in several files
+        # is only synthesized once, even with force regeneration.
+        self._generated: Dict[Path, asyncio.Task] = {}
+
         logger.info(f"Rate limiting enabled: maximum {self.config.max_rps} requests per second")
+        if self.config.channels > 1:
+            logger.info(f"Using {self.config.channels} API channels with {self.config.dispatch} dispatch")
 
         self.speaker_voices = {
-            'A': texttospeech_v1beta1.VoiceSelectionParams(
-                language_code='cmn-CN',
-                name='cmn-CN-Wavenet-A',
-            ),
-            'B': texttospeech_v1beta1.VoiceSelectionParams(
-                language_code='cmn-CN',
-                name='cmn-CN-Wavenet-B',
-            ),
-            'C': texttospeech_v1beta1.VoiceSelectionParams(
-                language_code='cmn-CN',
-                name='cmn-CN-Wavenet-C',
-            ),
-            'D': texttospeech_v1beta1.VoiceSelectionParams(
+            speaker: texttospeech.VoiceSelectionParams(
                 language_code='cmn-CN',
-                name='cmn-CN-Wavenet-D',
-            ),
+                name=voice_name,
+            )
+            for speaker, voice_name in SPEAKER_VOICES.items()
         }
 
         self.audio_configs = {
-            'normal': texttospeech_v1beta1.AudioConfig(
-                audio_encoding=texttospeech_v1beta1.AudioEncoding.MP3,
+            'normal': texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3,
                 speaking_rate=0.87,
                 pitch=0.0
             ),
-            'slow': texttospeech_v1beta1.AudioConfig(
-                audio_encoding=texttospeech_v1beta1.AudioEncoding.MP3,
+            'slow': texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3,
                 speaking_rate=0.75,
                 pitch=0.0
             )
         }
 
+    def create_client_pool(self) -> ClientPool:
+        """One client per configured channel, behind a single synthesize_speech"""
+        clients = create_google_clients(self.config.channels, self.config.keepalive)
+        return ClientPool(clients, self.config.dispatch)
+
     def get_file_hash(self, text: str, speaker: str) -> str:
         """
         Generate a hash for the text and speaker combination.
         Different speakers will generate different hashes even for the same text.
         """
-        # Combine speaker and text with a delimiter that can't appear in either
-        content = f"{speaker}\x00{text}"  # Using null byte as delimiter
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return get_file_hash(text, speaker)
 
     def get_audio_paths(self, text: str, speaker: str) -> Tuple[Path, Path]:
         """Get the expected audio file paths for normal and slow versions"""
-        file_hash = self.get_file_hash(text, speaker)
-        normal_path = self.output_dir / f"{file_hash}.mp3"
-        slow_path = self.output_dir / f"{file_hash}_slow.mp3"
-        return normal_path, slow_path
+        return get_audio_paths(self.output_dir, text, speaker)
 
-    async def generate_audio_for_line(self, text: str, speaker: str, speed: str = 'normal') -> Tuple[str, bytes]:
-        """Generate audio for a single line of dialogue with rate limiting"""
-        synthesis_input = texttospeech_v1beta1.SynthesisInput(text=text)
+    async def synthesize(self, speaker: str, speed: str, **request: Any):
+        """Send one rate-limited synthesize_speech request, recording metrics"""
+        self.metrics.request_queued()
+        wait_started = time.monotonic()
+        async with AsyncRateLimiter(self.rate_limiter):
+            self.metrics.request_started()
+            request_started = time.monotonic()
+            self.metrics.observe_rate_limit_wait(request_started - wait_started)
+            try:
+                response = await self.client.synthesize_speech(**request)
+            except Exception:
+                self.metrics.request_failed(speed)
+                raise
+            finally:
+                self.metrics.request_finished()
+            self.metrics.observe_request(speed, speaker, time.monotonic() - request_started)
+        return response
+
+    def get_voice(self, speaker: str) -> Any:
         voice = self.speaker_voices.get(speaker)
         if not voice:
             raise ValueError(f"No voice defined for speaker {speaker}")
+        return voice
 
-        async with AsyncRateLimiter(self.rate_limiter):
-            response = await self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=self.audio_configs[speed]
-            )
+    async def generate_audio_for_line(self, text: str, speaker: str, speed: str = 'normal') -> Tuple[str, bytes]:
+        """Generate audio for a single line of dialogue with rate limiting"""
+        synthesis_input = self.texttospeech.SynthesisInput(text=text)
+        voice = self.get_voice(speaker)
+
+        response = await self.synthesize(
+            speaker, speed,
+            input=synthesis_input,
+            voice=voice,
+            audio_config=self.audio_configs[speed]
+        )
 
         file_hash = self.get_file_hash(text, speaker)
         filename = f"{file_hash}_slow.mp3" if speed == 'slow' else f"{file_hash}.mp3"
         return filename, response.audio_content
 
+    async def generate_audio_batch(self, key: Tuple[str, str], texts: List[str]) -> List[bytes]:
+        """
+        Synthesize several lines of one speaker at one speed in a single SSML request
+        and split the result into one MP3 per line at the SSML mark timepoints.
+        """
+        speaker, speed = key
+        if len(texts) == 1:
+            _, audio_content = await self.generate_audio_for_line(texts[0], speaker, speed)
+            return [audio_content]
+
+        request = self.texttospeech.SynthesizeSpeechRequest(
+            input=self.texttospeech.SynthesisInput(ssml=build_ssml(texts)),
+            voice=self.get_voice(speaker),
+            audio_config=self.audio_configs[speed],
+            enable_time_pointing=[self.texttospeech.SynthesizeSpeechRequest.TimepointType.SSML_MARK]
+        )
+        logger.info(f"Synthesizing {len(texts)} {speed} speed lines for speaker {speaker} in one SSML request")
+        response = await self.synthesize(speaker, speed, request=request)
+        return split_batch_audio(response.audio_content, response.timepoints, len(texts))
+
+    async def run_io(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking filesystem call on the I/O thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, func, *args)
+
+    async def close(self) -> None:
+        """Shut down the I/O thread pool, any stretch worker processes and the API channels"""
+        self.io_executor.shutdown(wait=True)
+        if self.stretch_pool is not None:
+            self.stretch_pool.shutdown(wait=True)
+        if self._owns_client:
+            await self.client.close()
+
+    async def derive_slow_audio(self, text: str, speaker: str) -> bytes:
+        """
+        Time-stretch the line's normal speed audio to the slow speaking rate
+        in a worker process. process_line makes sure the normal file exists first.
+        """
+        from time_stretch import derive_slow_mp3
+
+        normal_path, _ = self.get_audio_paths(text, speaker)
+        if normal_path in self._generated:
+            await asyncio.shield(self._generated[normal_path])
+        normal_audio = await self.run_io(normal_path.read_bytes)
+        rate = self.audio_configs['slow'].speaking_rate / self.audio_configs['normal'].speaking_rate
+        return await asyncio.get_running_loop().run_in_executor(
+            self.stretch_pool, derive_slow_mp3, normal_audio, rate
+        )
+
+    async def generate_audio_file(self, path: Path, text: str, speaker: str, speed: str) -> str:
+        """
+        Generate audio into path, returning its filename. Concurrent and repeated
+        requests for the same path within a run share a single API call.
+        """
+        task = self._generated.get(path)
+        if task is None:
+            async def generate() -> str:
+                if speed == 'slow' and self.stretch_pool is not None:
+                    filename = path.name
+                    audio_content = await self.derive_slow_audio(text, speaker)
+                elif self.ssml_batcher and self.config.batches_line(text):
+                    filename = path.name
+                    audio_content = await self.ssml_batcher.submit((speaker, speed), text)
+                else:
+                    filename, audio_content = await self.generate_audio_for_line(text, speaker, speed)
+                await self.run_io(write_file_atomic, path, audio_content)
+                self.metrics.bytes_written(len(audio_content))
+                return filename
+
+            task = asyncio.ensure_future(generate())
+            self._generated[path] = task
+        return await asyncio.shield(task)
+
     async def process_line(self, line: DialogueLine) -> DialogueLine:
         """Process a single dialogue line, generating both normal and slow versions"""
         if not line.chinese or not line.speaker:
             return line
 
         normal_path, slow_path = self.get_audio_paths(line.chinese, line.speaker)
+        normal_exists = await self.run_io(normal_path.exists)
+        slow_exists = await self.run_io(slow_path.exists)
 
         # Handle normal speed version
         should_generate_normal = (
                 self.config.force_normal or
-                not normal_path.exists() or
+                not normal_exists or
                 not line.audio
         )
 
         if should_generate_normal:
-            action = "Regenerating" if normal_path.exists() else "Generating"
-            logger.info(f"{action} normal speed audio for speaker {line.speaker}: {line.chinese[:20]}...")
-            filename, audio_content = await self.generate_audio_for_line(line.chinese, line.speaker, 'normal')
-            with open(normal_path, "wb") as out:
-                out.write(audio_content)
-            line.audio = filename
+            self.metrics.cache_miss('normal')
+            if normal_path not in self._generated:
+                action = "Regenerating" if normal_exists else "Generating"
+                logger.info(f"{action} normal speed audio for speaker {line.speaker}: {line.chinese[:20]}...")
+            line.audio = await self.generate_audio_file(normal_path, line.chinese, line.speaker, 'normal')
         else:
+            self.metrics.cache_hit('normal')
             logger.debug(f"Skipping normal speed audio for speaker {line.speaker}: {line.chinese[:20]}...")
             if not line.audio:
                 line.audio = normal_path.name
@@ -192,18 +439,18 @@ class DialogueTTSGenerator:
         # Handle slow speed version
         should_generate_slow = (
                 self.config.force_slow or
-                not slow_path.exists() or
+                not slow_exists or
                 not line.audio_slow
         )
 
         if should_generate_slow:
-            action = "Regenerating" if slow_path.exists() else "Generating"
-            logger.info(f"{action} slow speed audio for speaker {line.speaker}: {line.chinese[:20]}...")
-            filename, audio_content = await self.generate_audio_for_line(line.chinese, line.speaker, 'slow')
-            with open(slow_path, "wb") as out:
-                out.write(audio_content)
-            line.audio_slow = filename
+            self.metrics.cache_miss('slow')
+            if slow_path not in self._generated:
+                action = "Regenerating" if slow_exists else "Generating"
+                logger.info(f"{action} slow speed audio for speaker {line.speaker}: {line.chinese[:20]}...")
+            line.audio_slow = await self.generate_audio_file(slow_path, line.chinese, line.speaker, 'slow')
         else:
+            self.metrics.cache_hit('slow')
             logger.debug(f"Skipping slow speed audio for speaker {line.speaker}: {line.chinese[:20]}...")
             if not line.audio_slow:
                 line.audio_slow = slow_path.name
@@ -268,53 +515,182 @@ class DialogueTTSGenerator:
 
         return result_dialogues
 
-async def main(args: argparse.Namespace):
-    try:
-        input_path = Path(args.input_file)
-        output_dir = Path(args.audio_output_dir)
+    async def process_file(self, input_path: Path) -> bool:
+        """
+        Generate audio for every line of a dialogue file and save the file in place,
+        keeping a backup of the original. Returns False if the file couldn't be processed.
+        """
         backup_path = input_path.with_suffix(f'.bak{input_path.suffix}')
 
+        # Read and parse dialogues using the shared parsing code
+        try:
+            content = await self.run_io(input_path.read_text, 'utf-8')
+            dialogues = parse_dialogues(content)
+            if not dialogues:
+                logger.error(f"No dialogues found in {input_path}")
+                return False
+        except (FileNotFoundError, DialogueParseError) as e:
+            logger.error(f"Error reading dialogues from {input_path}: {e}")
+            return False
+
         # Create backup of original file
         logger.info(f"Creating backup of original file at {backup_path}")
-        shutil.copy2(input_path, backup_path)
+        await self.run_io(shutil.copy2, input_path, backup_path)
+
+        logger.info(f"Starting audio generation from {input_path}")
+
+        # Process dialogues and generate audio
+        updated_dialogues = await self.process_dialogues(dialogues)
+
+        # Save updated dialogues using shared saving code
+        logger.info(f"Saving updated dialogues to {input_path}...")
+        output = StringIO()
+        # JSON Lines input (from generate_dialogues.py) stays JSON Lines, so later runs can append to it
+        save_dialogues(updated_dialogues, output, format='jsonl' if is_json_lines(content) else 'json')
+        await self.run_io(write_file_atomic, input_path, output.getvalue().encode('utf-8'))
+
+        logger.info(f"Original file backed up to: {backup_path}")
+        logger.info(f"Updated file saved in-place at: {input_path}")
+        return True
+
+    async def process_files(self, input_paths: List[Path]) -> List[Path]:
+        """
+        Process several dialogue files concurrently, sharing the client and rate limiter.
+        Each file is saved as soon as its own lines are done. Returns the files that failed.
+        """
+        results = await asyncio.gather(
+            *(self.process_file(path) for path in input_paths),
+            return_exceptions=True
+        )
+
+        failed = []
+        for path, result in zip(input_paths, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing {path}: {result}")
+                failed.append(path)
+            elif not result:
+                failed.append(path)
+        return failed
+
+def read_manifest(manifest_path: Path) -> List[Path]:
+    """
+    Read dialogue file paths from a manifest like www/index.yaml: a list of
+    entries with a 'path' relative to the manifest's directory.
+    """
+    import yaml
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = yaml.safe_load(f) or []
+    if not isinstance(entries, list):
+        raise ValueError(f"Expected a list of entries in {manifest_path}, got {type(entries)}")
+
+    paths = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or 'path' not in entry:
+            raise ValueError(f"Entry {i} in {manifest_path} has no 'path'")
+        paths.append(manifest_path.parent / entry['path'])
+    return paths
+
+def collect_input_paths(input_files: List[str], manifest: Optional[str] = None) -> List[Path]:
+    """
+    Paths given with --input-file followed by those listed in the manifest.
+    Files listed twice (e.g. by path and through a symlinked manifest) are processed once.
+    """
+    input_paths = [Path(path) for path in input_files]
+    if manifest:
+        input_paths.extend(read_manifest(Path(manifest)))
+
+    unique_paths = []
+    seen = set()
+    for path in input_paths:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique_paths.append(path)
+    return unique_paths
+
+def write_metrics(metrics: PipelineMetrics, args: argparse.Namespace) -> None:
+    """Write collected metrics to --metrics-file and/or log a summary"""
+    if args.metrics_file:
+        with open(args.metrics_file, 'w', encoding='utf-8') as f:
+            if args.metrics_file.endswith('.json'):
+                metrics.write_json(f)
+            else:
+                metrics.write_prometheus(f)
+        logger.info(f"Metrics written to {args.metrics_file}")
+    if args.metrics_summary:
+        for line in metrics.summary_lines():
+            logger.info(line)
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        unique_paths = collect_input_paths(args.input_file or [], args.manifest)
+
+        output_dir = Path(args.audio_output_dir)
 
         config = GenerationConfig(
             force_normal=args.force_normal,
             force_slow=args.force_slow,
-            max_rps=args.max_rps
+            max_rps=args.max_rps,
+            ssml_batch_size=args.ssml_batch,
+            ssml_max_line_chars=args.ssml_max_line_chars,
+            local_slow=args.local_slow,
+            channels=args.channels,
+            dispatch=args.dispatch,
+            keepalive=KeepaliveSettings(args.keepalive_ms, args.keepalive_timeout_ms)
         )
 
+        if args.plan:
+            dialogues = []
+            for path in unique_paths:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        dialogues.extend(parse_dialogues(f.read()))
+                except (FileNotFoundError, DialogueParseError) as e:
+                    logger.error(f"Error reading dialogues from {path}: {e}")
+            print_plan(plan_generation(dialogues, output_dir, config), config.max_rps)
+            return 0
+
+        metrics = PipelineMetrics() if args.metrics_file or args.metrics_summary else NullMetrics()
+
         generator = DialogueTTSGenerator(
             output_dir=output_dir,
             batch_size=args.batch_size,
-            config=config
+            config=config,
+            io_workers=args.io_workers,
+            metrics=metrics,
+            stretch_workers=args.stretch_workers
         )
 
-        # Read and parse dialogues using the shared parsing code
-        try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            dialogues = parse_dialogues(content)
-            if not dialogues:
-                logger.error("No dialogues found in file")
-                return
-        except (FileNotFoundError, DialogueParseError) as e:
-            logger.error(f"Error reading dialogues: {e}")
-            return
-
-        logger.info(f"Starting audio generation from {input_path}")
         logger.info(f"Audio files will be saved to {output_dir}")
 
-        # Process dialogues and generate audio
-        updated_dialogues = await generator.process_dialogues(dialogues)
-
-        # Save updated dialogues using shared saving code
-        logger.info("Saving updated dialogues...")
-        save_dialogues(updated_dialogues, input_path, format='json')
-
-        logger.info(f"Successfully processed all dialogue lines")
-        logger.info(f"Original file backed up to: {backup_path}")
-        logger.info(f"Updated file saved in-place at: {input_path}")
+        metrics.start_loop_monitor()
+        try:
+            failed = await generator.process_files(unique_paths)
+        finally:
+            await metrics.stop_loop_monitor()
+            await generator.close()
+            write_metrics(metrics, args)
+            if args.metrics_summary or config.channels > 1:
+                for line in generator.client.summary_lines():
+                    logger.info(line)
+        if failed:
+            logger.error(f"Failed to process {len(failed)} of {len(unique_paths)} files: "
+                         f"{', '.join(str(path) for path in failed)}")
+        else:
+            logger.info(f"Successfully processed all dialogue lines in {len(unique_paths)} files")
+
+        if args.postprocess_dir:
+            # Lazy import: needs numpy and ffmpeg, which plain generation doesn't
+            from audio_postprocess import PostprocessSettings, postprocess_directory
+            counts = await asyncio.get_running_loop().run_in_executor(
+                None, postprocess_directory, output_dir, Path(args.postprocess_dir), PostprocessSettings(),
+                args.stretch_workers
+            )
+            logger.info(f"Post-processed {counts['processed']} new audio files into {args.postprocess_dir}, "
+                        f"{counts['failed']} failed")
+            if counts['failed']:
+                return 1
+        return 0
 
     except Exception as e:
         logger.error(f"Error processing dialogues: {e}")
@@ -322,13 +698,19 @@ async def main(args: argparse.Namespace):
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description='Generate normal and slow TTS audio for dialogue files'
+        description='Generate normal and slow TTS audio for dialogue files. '
+                    'Several files are processed concurrently with one shared API client pool and rate limit.'
     )
 
     parser.add_argument(
         '-i', '--input-file',
-        required=True,
-        help='Input file containing dialogues'
+        action='append',
+        help='Input file containing dialogues (can be given several times)'
+    )
+
+    parser.add_argument(
+        '-m', '--manifest',
+        help='YAML manifest listing dialogue files to process, like www/index.yaml'
     )
 
     parser.add_argument(
@@ -363,8 +745,118 @@ def parse_args() -> argparse.Namespace:
         help='Maximum requests per second to the API (default: 18)'
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        '--channels',
+        type=int,
+        default=1,
+        help='Number of API clients, each with its own connection. One connection allows only a limited '
+             'number of concurrent requests, so raise this along with --max-rps and --batch-size (default: 1)'
+    )
+
+    parser.add_argument(
+        '--dispatch',
+        choices=DISPATCH_MODES,
+        default='least-outstanding',
+        help='How requests are spread over --channels: in turn, or to the channel with the fewest '
+             'open requests (default: least-outstanding)'
+    )
+
+    parser.add_argument(
+        '--keepalive-ms',
+        type=int,
+        default=0,
+        help='Send HTTP/2 keepalive pings on each channel after this many milliseconds without activity, '
+             'so idle connections are not dropped between files (default: 0, gRPC default of no pings)'
+    )
+
+    parser.add_argument(
+        '--keepalive-timeout-ms',
+        type=int,
+        default=20000,
+        help='Close a channel whose keepalive ping is not answered within this many milliseconds '
+             '(default: 20000)'
+    )
+
+    parser.add_argument(
+        '--ssml-batch',
+        type=int,
+        default=0,
+        help='Synthesize up to this many short lines of the same speaker in one SSML request '
+             'and split the audio at <mark> timepoints (default: 0, disabled). '
+             'Intonation can differ slightly from lines synthesized on their own'
+    )
+
+    parser.add_argument(
+        '--ssml-max-line-chars',
+        type=int,
+        default=40,
+        help='Only lines up to this many characters are batched with --ssml-batch (default: 40)'
+    )
+
+    parser.add_argument(
+        '--local-slow',
+        action='store_true',
+        help='Derive slow audio from normal audio with pitch-preserving time-stretching '
+             'instead of a second API call (requires numpy and ffmpeg)'
+    )
+
+    parser.add_argument(
+        '--stretch-workers',
+        type=int,
+        help='Number of worker processes for --local-slow (default: number of CPUs)'
+    )
+
+    parser.add_argument(
+        '--postprocess-dir',
+        help='After generation, trim silence and normalize loudness of new audio files into this directory '
+             '(see audio_postprocess.py; requires numpy and ffmpeg, uses --stretch-workers processes)'
+    )
+
+    parser.add_argument(
+        '--io-workers',
+        type=int,
+        default=4,
+        help='Number of threads for file reads and writes (default: 4)'
+    )
+
+    parser.add_argument(
+        '--metrics-file',
+        help='Write request latency, rate limiter wait, queue depth, event-loop lag, bytes written '
+             'and cache hit metrics to this file (JSON if it ends in .json, Prometheus text otherwise)'
+    )
+
+    parser.add_argument(
+        '--metrics-summary',
+        action='store_true',
+        help='Log a summary of the collected metrics at the end of the run'
+    )
+
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Only report how many requests, characters and how much time a run would take; '
+             'no API client is created and no files are changed'
+    )
+
+    args = parser.parse_args()
+    if not args.input_file and not args.manifest:
+        parser.error('at least one of --input-file or --manifest is required')
+    if args.channels < 1:
+        parser.error('--channels must be at least 1')
+    if args.postprocess_dir and not args.plan:
+        # Fail before any synthesis if numpy or the ffmpeg binary is missing
+        try:
+            from audio_codec import AudioCodecError, require_ffmpeg
+        except ImportError as e:
+            parser.error(f'--postprocess-dir needs numpy: {e}')
+        try:
+            require_ffmpeg()
+        except AudioCodecError as e:
+            parser.error(str(e))
+    return args
+
+def cli():
+    sys.exit(asyncio.run(main(parse_args())))
 
 if __name__ == "__main__":
-    args = parse_args()
-    asyncio.run(main(args))
\ No newline at end of file
+    cli()
\ No newline at end of file
@@ -0,0 +1,244 @@
+import asyncio
+import bisect
+import json
+import math
+import time
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+
+# Upper bounds in seconds, Prometheus style; the last bucket catches everything
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and max"""
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper bound of the bucket containing it, capped at max"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {('+Inf' if math.isinf(b) else str(b)): c for b, c in zip(self.buckets, self.counts)},
+        }
+
+class PipelineMetrics:
+    """
+    Counters, gauges and histograms for a TTS generation run.
+
+    Use NullMetrics when metrics are disabled; every recording method is
+    then a no-op so the generator can call them unconditionally.
+    """
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[str, int] = {}
+        self.gauge_max: Dict[str, int] = {}
+        self.started = time.monotonic()
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def _histogram(self, name: str, labels: Labels = ()) -> Histogram:
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def _increment(self, name: str, amount: float = 1, labels: Labels = ()) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def _adjust_gauge(self, name: str, delta: int) -> None:
+        value = self.gauges.get(name, 0) + delta
+        self.gauges[name] = value
+        if value > self.gauge_max.get(name, 0):
+            self.gauge_max[name] = value
+
+    def observe_request(self, speed: str, speaker: str, seconds: float) -> None:
+        """Record the latency of one synthesize_speech call"""
+        self._histogram('tts_request_seconds', (('speed', speed), ('speaker', speaker))).observe(seconds)
+
+    def observe_rate_limit_wait(self, seconds: float) -> None:
+        """Record how long a request waited for the rate limiter"""
+        self._histogram('tts_rate_limit_wait_seconds').observe(seconds)
+
+    def observe_loop_lag(self, seconds: float) -> None:
+        """Record how late the event loop woke a sleeping task"""
+        self._histogram('tts_event_loop_lag_seconds').observe(seconds)
+
+    def request_queued(self) -> None:
+        self._adjust_gauge('tts_queued_requests', 1)
+
+    def request_started(self) -> None:
+        self._adjust_gauge('tts_queued_requests', -1)
+        self._adjust_gauge('tts_inflight_requests', 1)
+
+    def request_finished(self) -> None:
+        self._adjust_gauge('tts_inflight_requests', -1)
+
+    def request_failed(self, speed: str) -> None:
+        self._increment('tts_request_errors_total', labels=(('speed', speed),))
+
+    def bytes_written(self, count: int) -> None:
+        self._increment('tts_bytes_written_total', count)
+
+    def cache_hit(self, speed: str) -> None:
+        """An existing audio file was reused"""
+        self._increment('tts_cache_hits_total', labels=(('speed', speed),))
+
+    def cache_miss(self, speed: str) -> None:
+        """Audio had to be (re)generated"""
+        self._increment('tts_cache_misses_total', labels=(('speed', speed),))
+
+    def start_loop_monitor(self, interval: float = 0.05) -> None:
+        """Start sampling event-loop lag on the running loop"""
+        async def monitor():
+            loop = asyncio.get_running_loop()
+            while True:
+                expected = loop.time() + interval
+                await asyncio.sleep(interval)
+                self.observe_loop_lag(max(0.0, loop.time() - expected))
+
+        self._lag_task = asyncio.ensure_future(monitor())
+
+    async def stop_loop_monitor(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    def _counter_total(self, name: str) -> float:
+        return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def cache_hit_ratio(self) -> float:
+        hits = self._counter_total('tts_cache_hits_total')
+        total = hits + self._counter_total('tts_cache_misses_total')
+        return hits / total if total else 0.0
+
+    def to_dict(self) -> dict:
+        """All metrics as a JSON-serializable dict"""
+        return {
+            'elapsed_seconds': time.monotonic() - self.started,
+            'cache_hit_ratio': self.cache_hit_ratio(),
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            'gauges': {name: {'value': value, 'max': self.gauge_max.get(name, 0)}
+                       for name, value in sorted(self.gauges.items())},
+            'histograms': [
+                {'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ],
+        }
+
+    def write_json(self, output: TextIO) -> None:
+        json.dump(self.to_dict(), output, indent=2)
+        output.write('\n')
+
+    def write_prometheus(self, output: TextIO) -> None:
+        """Write metrics in the Prometheus text exposition format"""
+        def format_labels(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        for (name, labels), value in sorted(self.counters.items()):
+            output.write(f"{name}{format_labels(labels)} {value}\n")
+        for name, value in sorted(self.gauges.items()):
+            output.write(f"{name} {value}\n")
+            output.write(f"{name}_max {self.gauge_max.get(name, 0)}\n")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                le = '+Inf' if math.isinf(bound) else str(bound)
+                output.write(f"{name}_bucket{format_labels(labels, (('le', le),))} {cumulative}\n")
+            output.write(f"{name}_sum{format_labels(labels)} {histogram.sum}\n")
+            output.write(f"{name}_count{format_labels(labels)} {histogram.count}\n")
+        output.write(f"tts_cache_hit_ratio {self.cache_hit_ratio()}\n")
+
+    def summary_lines(self) -> List[str]:
+        """Short human-readable summary for the end of a run"""
+        lines = [f"Elapsed: {time.monotonic() - self.started:.1f}s, "
+                 f"cache hit ratio: {self.cache_hit_ratio():.1%}, "
+                 f"bytes written: {self._counter_total('tts_bytes_written_total'):.0f}"]
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            label_text = ' '.join(f"{k}={v}" for k, v in labels)
+            lines.append(f"{name} {label_text}".rstrip() +
+                         f": n={histogram.count} mean={histogram.mean() * 1000:.1f}ms "
+                         f"p50={histogram.quantile(0.5) * 1000:.1f}ms "
+                         f"p99={histogram.quantile(0.99) * 1000:.1f}ms "
+                         f"max={histogram.max * 1000:.1f}ms")
+        for name in sorted(self.gauge_max):
+            lines.append(f"{name}: max={self.gauge_max[name]}")
+        return lines
+
+class NullMetrics(PipelineMetrics):
+    """Metrics sink that records nothing"""
+    def observe_request(self, speed: str, speaker: str, seconds: float) -> None:
+        pass
+
+    def observe_rate_limit_wait(self, seconds: float) -> None:
+        pass
+
+    def observe_loop_lag(self, seconds: float) -> None:
+        pass
+
+    def request_queued(self) -> None:
+        pass
+
+    def request_started(self) -> None:
+        pass
+
+    def request_finished(self) -> None:
+        pass
+
+    def request_failed(self, speed: str) -> None:
+        pass
+
+    def bytes_written(self, count: int) -> None:
+        pass
+
+    def cache_hit(self, speed: str) -> None:
+        pass
+
+    def cache_miss(self, speed: str) -> None:
+        pass
+
+    def start_loop_monitor(self, interval: float = 0.05) -> None:
+        pass
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import unittest
+from io import StringIO
+from tts_metrics import Histogram, NullMetrics, PipelineMetrics
+
+class TestHistogram(unittest.TestCase):
+    def test_observe_and_quantiles(self):
+        histogram = Histogram(buckets=(0.1, 1.0, float('inf')))
+        for value in (0.05, 0.05, 0.5, 3.0):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.6)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        # The open-ended bucket reports the largest value seen
+        self.assertEqual(histogram.quantile(1.0), 3.0)
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        self.assertEqual(histogram.mean(), 0.0)
+
+class TestPipelineMetrics(unittest.TestCase):
+    def test_cache_hit_ratio(self):
+        metrics = PipelineMetrics()
+        metrics.cache_hit('normal')
+        metrics.cache_hit('slow')
+        metrics.cache_hit('slow')
+        metrics.cache_miss('normal')
+        self.assertEqual(metrics.cache_hit_ratio(), 0.75)
+
+    def test_queue_gauges_track_max(self):
+        metrics = PipelineMetrics()
+        metrics.request_queued()
+        metrics.request_queued()
+        metrics.request_started()
+        metrics.request_finished()
+        metrics.request_started()
+        metrics.request_finished()
+        self.assertEqual(metrics.gauges['tts_queued_requests'], 0)
+        self.assertEqual(metrics.gauge_max['tts_queued_requests'], 2)
+        self.assertEqual(metrics.gauge_max['tts_inflight_requests'], 1)
+
+    def test_prometheus_output(self):
+        metrics = PipelineMetrics()
+        metrics.observe_request('slow', 'A', 0.3)
+        metrics.bytes_written(100)
+        output = StringIO()
+        metrics.write_prometheus(output)
+        text = output.getvalue()
+        self.assertIn('tts_bytes_written_total 100\n', text)
+        self.assertIn('tts_request_seconds_bucket{speed="slow",speaker="A",le="0.25"} 0\n', text)
+        self.assertIn('tts_request_seconds_bucket{speed="slow",speaker="A",le="0.5"} 1\n', text)
+        self.assertIn('tts_request_seconds_count{speed="slow",speaker="A"} 1\n', text)
+
+    def test_json_output(self):
+        metrics = PipelineMetrics()
+        metrics.observe_rate_limit_wait(0.02)
+        output = StringIO()
+        metrics.write_json(output)
+        data = json.loads(output.getvalue())
+        self.assertEqual(data['histograms'][0]['name'], 'tts_rate_limit_wait_seconds')
+        self.assertEqual(data['histograms'][0]['count'], 1)
+
+    def test_loop_monitor_records_lag(self):
+        metrics = PipelineMetrics()
+
+        async def run():
+            metrics.start_loop_monitor(interval=0.001)
+            await asyncio.sleep(0.02)
+            await metrics.stop_loop_monitor()
+
+        asyncio.run(run())
+        self.assertGreater(metrics.histograms[('tts_event_loop_lag_seconds', ())].count, 0)
+
+    def test_null_metrics_records_nothing(self):
+        metrics = NullMetrics()
+        metrics.observe_request('normal', 'A', 1.0)
+        metrics.cache_hit('normal')
+        metrics.request_queued()
+        self.assertEqual(metrics.histograms, {})
+        self.assertEqual(metrics.counters, {})
+        self.assertEqual(metrics.gauges, {})
+
+if __name__ == '__main__':
+    unittest.main()
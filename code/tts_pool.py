@@ -0,0 +1,152 @@
+import time
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from tts_metrics import Histogram
+
+DISPATCH_MODES = ('round-robin', 'least-outstanding')
+
+# Host and port of the Text-to-Speech API
+TTS_HOST = 'texttospeech.googleapis.com:443'
+
+class KeepaliveSettings(NamedTuple):
+    """HTTP/2 keepalive pings of each pool channel; time_ms 0 keeps gRPC's default (no pings)"""
+    time_ms: int = 0
+    timeout_ms: int = 20000
+    # Also ping while no request is open, so idle channels are ready for the next file
+    permit_without_calls: bool = True
+
+    def channel_options(self) -> List[Tuple[str, int]]:
+        if not self.time_ms:
+            return []
+        return [
+            ('grpc.keepalive_time_ms', self.time_ms),
+            ('grpc.keepalive_timeout_ms', self.timeout_ms),
+            ('grpc.keepalive_permit_without_calls', int(self.permit_without_calls)),
+            ('grpc.http2.max_pings_without_data', 0),
+        ]
+
+def channel_options(keepalive: Optional[KeepaliveSettings] = None) -> List[Tuple[str, int]]:
+    """
+    gRPC options for one pool channel. gRPC shares connections between
+    channels with identical options through a global subchannel pool, so
+    each channel gets a local pool and with it a connection of its own.
+    The unlimited message sizes are what the client library sets on the
+    channels it creates itself.
+    """
+    return [
+        ('grpc.use_local_subchannel_pool', 1),
+        ('grpc.max_send_message_length', -1),
+        ('grpc.max_receive_message_length', -1),
+        *(keepalive or KeepaliveSettings()).channel_options(),
+    ]
+
+def create_google_clients(count: int, keepalive: Optional[KeepaliveSettings] = None) -> List[Any]:
+    """
+    count TextToSpeechAsyncClients, each on its own gRPC channel and HTTP/2
+    connection. A single channel without keepalive pings is the library's
+    stock client.
+    """
+    # Imported here for the same reason as in DialogueTTSGenerator: grpc is slow to import
+    from google.cloud import texttospeech_v1beta1
+    from google.cloud.texttospeech_v1beta1.services.text_to_speech.transports import (
+        TextToSpeechGrpcAsyncIOTransport,
+    )
+
+    if count == 1 and not (keepalive and keepalive.time_ms):
+        return [texttospeech_v1beta1.TextToSpeechAsyncClient()]
+    clients = []
+    for _ in range(count):
+        channel = TextToSpeechGrpcAsyncIOTransport.create_channel(TTS_HOST, options=channel_options(keepalive))
+        transport = TextToSpeechGrpcAsyncIOTransport(host=TTS_HOST, channel=channel)
+        clients.append(texttospeech_v1beta1.TextToSpeechAsyncClient(transport=transport))
+    return clients
+
+class ChannelStats:
+    """Requests, failures, open requests and latency of one pool client"""
+    def __init__(self, index: int):
+        self.index = index
+        self.inflight = 0
+        self.max_inflight = 0
+        self.requests = 0
+        self.failures = 0
+        self.latency = Histogram()
+
+    def to_dict(self) -> dict:
+        return {
+            'channel': self.index,
+            'requests': self.requests,
+            'failures': self.failures,
+            'inflight': self.inflight,
+            'max_inflight': self.max_inflight,
+            'latency': self.latency.to_dict(),
+        }
+
+class ClientPool:
+    """
+    Several TTS clients behind the synthesize_speech method of one.
+
+    One client is one gRPC channel, and with it one HTTP/2 connection whose
+    concurrent stream limit caps how many requests are open at once, however
+    high --max-rps is. The pool spreads requests over its clients either in
+    turn ('round-robin') or to the client with the fewest open requests
+    ('least-outstanding', ties broken in turn), which steers around a
+    connection that has become slow.
+    """
+    def __init__(self, clients: Sequence[Any], dispatch: str = 'least-outstanding'):
+        if not clients:
+            raise ValueError("A client pool needs at least one client")
+        if dispatch not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode: {dispatch}")
+        self.clients = list(clients)
+        self.dispatch = dispatch
+        self.stats = [ChannelStats(i) for i in range(len(self.clients))]
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def pick(self) -> int:
+        """Index of the client for the next request"""
+        count = len(self.clients)
+        start = self._next
+        self._next = (start + 1) % count
+        if self.dispatch == 'round-robin':
+            return start
+        return min(((start + i) % count for i in range(count)), key=lambda index: self.stats[index].inflight)
+
+    async def synthesize_speech(self, *args: Any, **kwargs: Any) -> Any:
+        index = self.pick()
+        stats = self.stats[index]
+        stats.requests += 1
+        stats.inflight += 1
+        stats.max_inflight = max(stats.max_inflight, stats.inflight)
+        started = time.monotonic()
+        try:
+            return await self.clients[index].synthesize_speech(*args, **kwargs)
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            stats.inflight -= 1
+            stats.latency.observe(time.monotonic() - started)
+
+    async def close(self) -> None:
+        """Close the gRPC channel of each client that has one"""
+        for client in self.clients:
+            transport = getattr(client, 'transport', None)
+            if transport is not None:
+                await transport.close()
+
+    def to_dict(self) -> dict:
+        return {'dispatch': self.dispatch, 'channels': [stats.to_dict() for stats in self.stats]}
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"Client pool: {len(self.clients)} channels, {self.dispatch} dispatch"]
+        for stats in self.stats:
+            lines.append(
+                f"  channel {stats.index}: {stats.requests} requests, {stats.failures} failed, "
+                f"{stats.inflight} in flight (max {stats.max_inflight}), "
+                f"latency p50 {stats.latency.quantile(0.5):.3f}s p90 {stats.latency.quantile(0.9):.3f}s "
+                f"max {stats.latency.max:.3f}s"
+            )
+        return lines
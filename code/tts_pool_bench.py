@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from fake_tts import FakeTextToSpeechClient
+from tts_pool import DISPATCH_MODES, ClientPool
+
+def parse_counts(text: str) -> List[int]:
+    counts = [int(part) for part in text.split(',') if part.strip()]
+    if not counts or min(counts) < 1:
+        raise argparse.ArgumentTypeError(f"expected positive comma-separated numbers, got {text!r}")
+    return counts
+
+async def run_pool(pool: ClientPool, requests: int, concurrency: int) -> Dict[str, float]:
+    """Send requests through pool, at most concurrency at once; throughput and client-side latency"""
+    gate = asyncio.Semaphore(concurrency)
+    request = SimpleNamespace(
+        input=SimpleNamespace(text='你好，我们走吧！'),
+        voice=SimpleNamespace(name='cmn-CN-Wavenet-A'),
+        audio_config=SimpleNamespace(speaking_rate=0.87),
+    )
+    latencies = []
+
+    async def one() -> None:
+        async with gate:
+            started = time.perf_counter()
+            await pool.synthesize_speech(request=request)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': requests / elapsed,
+        'p50': statistics.median(latencies),
+        'p90': latencies[int(0.9 * (len(latencies) - 1))],
+        'max_inflight': max(stats.max_inflight for stats in pool.stats),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure TTS request throughput with several client channels against the local fake '
+                    'server, which allows a limited number of concurrent requests per connection')
+    parser.add_argument('-n', '--requests', type=int, default=400, help='Requests per run (default: 400)')
+    parser.add_argument('--channels', type=parse_counts, default=[1, 2, 4],
+                        help='Comma-separated channel counts to compare (default: 1,2,4)')
+    parser.add_argument('--concurrency', type=parse_counts, default=[8, 32, 128],
+                        help='Comma-separated numbers of requests open at once (default: 8,32,128)')
+    parser.add_argument('--dispatch', choices=DISPATCH_MODES, action='append',
+                        help='Dispatch mode to measure; can be given twice (default: both)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Seconds the fake server takes per request (default: 0.05)')
+    parser.add_argument('--streams', type=int, default=16,
+                        help='Concurrent requests the fake server allows per connection (default: 16)')
+    parser.add_argument('--slow-channel', type=float, default=1.0,
+                        help="Multiply the first channel's latency by this, like a degraded connection (default: 1)")
+    args = parser.parse_args()
+
+    if args.requests < 1:
+        print("Error: --requests must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{args.requests} requests per run, {args.latency * 1000:.0f} ms latency, "
+          f"{args.streams} streams per connection")
+    print(f"{'dispatch':<18} {'channels':>8} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'max/channel':>11}")
+    for dispatch in args.dispatch or DISPATCH_MODES:
+        for channels in args.channels:
+            for concurrency in args.concurrency:
+                clients = [FakeTextToSpeechClient(latency=args.latency * (args.slow_channel if i == 0 else 1),
+                                                  max_concurrent=args.streams)
+                           for i in range(channels)]
+                result = asyncio.run(run_pool(ClientPool(clients, dispatch), args.requests, concurrency))
+                print(f"{dispatch:<18} {channels:>8} {concurrency:>11} {result['rps']:>8.0f} "
+                      f"{result['p50'] * 1000:>8.1f} {result['p90'] * 1000:>8.1f} {result['max_inflight']:>11}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from fake_tts import FakeTextToSpeechClient
+from tts_pool import ClientPool, KeepaliveSettings, channel_options
+
+def text_request(text: str = '你好') -> SimpleNamespace:
+    return SimpleNamespace(
+        input=SimpleNamespace(text=text),
+        voice=SimpleNamespace(name='cmn-CN-Wavenet-A'),
+        audio_config=SimpleNamespace(speaking_rate=0.87),
+    )
+
+class FailingClient:
+    async def synthesize_speech(self, **kwargs):
+        raise RuntimeError('unavailable')
+
+async def send(pool: ClientPool, count: int):
+    return await asyncio.gather(*(pool.synthesize_speech(request=text_request()) for _ in range(count)))
+
+class TestClientPool(unittest.TestCase):
+    def test_round_robin_takes_turns(self):
+        clients = [FakeTextToSpeechClient() for _ in range(3)]
+        pool = ClientPool(clients, 'round-robin')
+        self.assertEqual([pool.pick() for _ in range(5)], [0, 1, 2, 0, 1])
+
+    def test_least_outstanding_avoids_busy_client(self):
+        pool = ClientPool([FakeTextToSpeechClient() for _ in range(3)], 'least-outstanding')
+        pool.stats[0].inflight = 2
+        pool.stats[1].inflight = 1
+        self.assertEqual(pool.pick(), 2)
+        pool.stats[2].inflight = 3
+        self.assertEqual(pool.pick(), 1)
+
+    def test_least_outstanding_spreads_idle_load(self):
+        pool = ClientPool([FakeTextToSpeechClient() for _ in range(3)], 'least-outstanding')
+        self.assertEqual([pool.pick() for _ in range(3)], [0, 1, 2])
+
+    def test_requests_are_spread_over_connections(self):
+        clients = [FakeTextToSpeechClient(latency=0.01, max_concurrent=4) for _ in range(2)]
+        pool = ClientPool(clients)
+        responses = asyncio.run(send(pool, 16))
+
+        self.assertEqual(len(responses), 16)
+        self.assertTrue(all(response.audio_content for response in responses))
+        self.assertEqual([len(client.requests) for client in clients], [8, 8])
+        # Both connections were saturated at once
+        self.assertEqual([client.max_inflight for client in clients], [4, 4])
+        self.assertEqual([stats.requests for stats in pool.stats], [8, 8])
+        self.assertEqual([stats.inflight for stats in pool.stats], [0, 0])
+        self.assertEqual([stats.latency.count for stats in pool.stats], [8, 8])
+
+    def test_failures_are_counted_per_channel(self):
+        pool = ClientPool([FakeTextToSpeechClient(), FailingClient()], 'round-robin')
+        asyncio.run(pool.synthesize_speech(request=text_request()))
+        with self.assertRaises(RuntimeError):
+            asyncio.run(pool.synthesize_speech(request=text_request()))
+
+        self.assertEqual([stats.failures for stats in pool.stats], [0, 1])
+        self.assertEqual([stats.inflight for stats in pool.stats], [0, 0])
+        self.assertEqual(pool.to_dict()['channels'][1]['requests'], 1)
+        self.assertEqual(len(pool.summary_lines()), 3)
+
+    def test_close_closes_each_transport(self):
+        class Transport:
+            closed = False
+
+            async def close(self):
+                self.closed = True
+
+        clients = [FakeTextToSpeechClient(), FakeTextToSpeechClient()]
+        for client in clients:
+            client.transport = Transport()
+        # Clients without a gRPC transport (like the fake) are skipped
+        pool = ClientPool([*clients, FakeTextToSpeechClient()])
+        asyncio.run(pool.close())
+        self.assertEqual([client.transport.closed for client in clients], [True, True])
+
+    def test_invalid_pools(self):
+        with self.assertRaises(ValueError):
+            ClientPool([])
+        with self.assertRaises(ValueError):
+            ClientPool([FakeTextToSpeechClient()], 'random')
+
+class TestChannelOptions(unittest.TestCase):
+    def test_each_channel_gets_its_own_connection(self):
+        self.assertEqual(channel_options(), [
+            ('grpc.use_local_subchannel_pool', 1),
+            ('grpc.max_send_message_length', -1),
+            ('grpc.max_receive_message_length', -1),
+        ])
+
+    def test_keepalive(self):
+        options = dict(channel_options(KeepaliveSettings(30000, 5000)))
+        self.assertEqual(options['grpc.keepalive_time_ms'], 30000)
+        self.assertEqual(options['grpc.keepalive_timeout_ms'], 5000)
+        self.assertEqual(options['grpc.keepalive_permit_without_calls'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,262 @@
+import asyncio
+import functools
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import fake_tts
+import tts
+from fake_tts import SILENCE, FakeTextToSpeechClient, frame_fills
+from parse import parse_dialogues
+from tts import (DialogueTTSGenerator, GenerationConfig, collect_input_paths, get_audio_paths, main, parse_args,
+                 plan_generation, read_manifest)
+
+def dialogue(title: str, *lines) -> dict:
+    return {'title': title, 'lines': [{'s': speaker, 'c': text} for speaker, text in lines]}
+
+class FailingTextClient(FakeTextToSpeechClient):
+    """Fake client that fails every request for one text"""
+    def __init__(self, failing_text: str):
+        super().__init__()
+        self.failing_text = failing_text
+
+    async def synthesize_speech(self, request=None, *, input=None, **kwargs):
+        if getattr(input, 'text', None) == self.failing_text:
+            raise RuntimeError('synthesis failed')
+        return await super().synthesize_speech(request, input=input, **kwargs)
+
+class TtsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name)
+        self.audio_dir = self.dir / 'audio'
+        logging.disable(logging.INFO)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        self.tmpdir.cleanup()
+
+    def write_dialogues(self, name: str, *dialogues: dict) -> Path:
+        path = self.dir / name
+        path.write_text(json.dumps(list(dialogues), ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def generator(self, client=None, **config) -> DialogueTTSGenerator:
+        return DialogueTTSGenerator(
+            self.audio_dir,
+            config=GenerationConfig(force_normal=False, force_slow=False, max_rps=1000, **config),
+            client=client or FakeTextToSpeechClient(),
+            texttospeech=fake_tts.texttospeech,
+        )
+
+    def process_files(self, generator: DialogueTTSGenerator, paths):
+        async def run():
+            try:
+                return await generator.process_files(paths)
+            finally:
+                await generator.close()
+
+        return asyncio.run(run())
+
+class TestProcessFiles(TtsTestCase):
+    def test_shared_line_is_synthesized_once(self):
+        first = self.write_dialogues('first.json', dialogue('One', ('A', '你好！'), ('B', '我们走吧。')))
+        second = self.write_dialogues('second.json', dialogue('Two', ('A', '你好！'), ('B', '再见。')))
+        generator = self.generator()
+
+        self.assertEqual(self.process_files(generator, [first, second]), [])
+
+        texts = [request.input.text for request in generator.client.requests]
+        # One normal and one slow request per distinct line
+        self.assertEqual(sorted(texts), sorted(['你好！', '我们走吧。', '再见。'] * 2))
+        normal_path, slow_path = get_audio_paths(self.audio_dir, '你好！', 'A')
+        for path in (first, second):
+            line = json.loads(path.read_text(encoding='utf-8'))[0]['lines'][0]
+            self.assertEqual((line['a'], line['as']), (normal_path.name, slow_path.name))
+        self.assertTrue(normal_path.exists() and slow_path.exists())
+
+    def test_failing_file_does_not_cancel_others(self):
+        good = self.write_dialogues('good.json', dialogue('Good', ('A', '你好！')))
+        bad = self.write_dialogues('bad.json', dialogue('Bad', ('A', '不行。')))
+        missing = self.dir / 'missing.json'
+        generator = self.generator(FailingTextClient('不行。'))
+
+        self.assertEqual(self.process_files(generator, [bad, missing, good]), [bad, missing])
+
+        line = json.loads(good.read_text(encoding='utf-8'))[0]['lines'][0]
+        self.assertEqual(line['a'], get_audio_paths(self.audio_dir, '你好！', 'A')[0].name)
+        self.assertNotIn('a', json.loads(bad.read_text(encoding='utf-8'))[0]['lines'][0])
+
+class TestSsmlBatching(TtsTestCase):
+    def run_dialogue(self, audio_dir: Path, **config):
+        self.audio_dir = audio_dir
+        path = self.write_dialogues(f'{audio_dir.name}.json', dialogue(
+            'Batched', ('A', '你好！'), ('B', '你好。'), ('A', '我们走吧。'), ('A', '好的。')))
+        generator = self.generator(**config)
+        self.assertEqual(self.process_files(generator, [path]), [])
+        return generator.client, json.loads(path.read_text(encoding='utf-8'))[0]['lines']
+
+    def test_batched_lines_match_unbatched_files(self):
+        single_client, single_lines = self.run_dialogue(self.dir / 'single')
+        client, lines = self.run_dialogue(self.dir / 'batched', ssml_batch_size=4)
+
+        # Speaker A's three lines go into one SSML request per speed, B's line on its own
+        ssml_requests = [request for request in client.requests if getattr(request.input, 'ssml', None)]
+        self.assertEqual(len(ssml_requests), 2)
+        self.assertEqual(len(client.requests), 4)
+        self.assertEqual(len(single_client.requests), 8)
+
+        self.assertEqual(lines, single_lines)
+        self.assertEqual(sorted(os.listdir(self.dir / 'batched')), sorted(os.listdir(self.dir / 'single')))
+        for key in ('a', 'as'):
+            # Each file holds exactly one spoken run of the batch (the fake numbers them)
+            spoken = [set(frame_fills((self.dir / 'batched' / line[key]).read_bytes())) - {SILENCE}
+                      for line in lines if line['s'] == 'A']
+            self.assertEqual(sorted(spoken, key=min), [{1}, {2}, {3}])
+
+class TestRunIo(TtsTestCase):
+    def test_blocking_io_runs_off_the_event_loop(self):
+        generator = self.generator()
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.ensure_future(tick())
+            try:
+                thread_name = await generator.run_io(lambda: time.sleep(0.2) or threading.current_thread().name)
+            finally:
+                ticker.cancel()
+                await generator.close()
+            return thread_name, ticks
+
+        thread_name, ticks = asyncio.run(run())
+        self.assertTrue(thread_name.startswith('tts-io'))
+        # The loop kept running while the call blocked its thread
+        self.assertGreater(ticks, 5)
+
+class TestInputPaths(TtsTestCase):
+    def test_manifest_paths_are_relative_to_manifest(self):
+        (self.dir / 'www').mkdir()
+        manifest = self.dir / 'www' / 'index.yaml'
+        manifest.write_text("- title: One\n  path: dialogues/one.json\n- path: two.json\n", encoding='utf-8')
+        self.assertEqual(read_manifest(manifest),
+                         [self.dir / 'www' / 'dialogues' / 'one.json', self.dir / 'www' / 'two.json'])
+
+    def test_manifest_without_path(self):
+        manifest = self.dir / 'index.yaml'
+        manifest.write_text("- title: One\n", encoding='utf-8')
+        with self.assertRaises(ValueError):
+            read_manifest(manifest)
+
+    def test_repeated_files_are_processed_once(self):
+        one = self.write_dialogues('one.json', dialogue('One', ('A', '你好！')))
+        two = self.write_dialogues('two.json', dialogue('Two', ('A', '再见。')))
+        manifest = self.dir / 'index.yaml'
+        manifest.write_text("- path: two.json\n- path: ./one.json\n", encoding='utf-8')
+
+        paths = collect_input_paths([str(one), str(two), str(one)], str(manifest))
+        self.assertEqual(paths, [one, two])
+
+class TestPlan(TtsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.audio_dir.mkdir()
+        # 你好！ has both files and names, 我们走吧。 only its normal file, 再见。 nothing
+        for path in get_audio_paths(self.audio_dir, '你好！', 'A'):
+            path.write_bytes(b'mp3')
+        get_audio_paths(self.audio_dir, '我们走吧。', 'B')[0].write_bytes(b'mp3')
+        done = {'s': 'A', 'c': '你好！', 'a': get_audio_paths(self.audio_dir, '你好！', 'A')[0].name,
+                'as': get_audio_paths(self.audio_dir, '你好！', 'A')[1].name}
+        self.dialogues = [
+            {'title': 'One', 'lines': [done, {'s': 'B', 'c': '我们走吧。'}, {'s': 'A', 'c': '再见。'}]},
+            {'title': 'Two', 'lines': [{'s': 'A', 'c': '再见。'}, {'c': 'no speaker'}]},
+        ]
+        self.path = self.write_dialogues('dialogues.json', *self.dialogues)
+
+    def plan(self, **options):
+        config = GenerationConfig(**{'force_normal': False, 'force_slow': False, 'max_rps': 10, **options})
+        return plan_generation(parse_dialogues(self.path.read_text(encoding='utf-8')), self.audio_dir, config)
+
+    def test_counts_missing_audio(self):
+        plan = self.plan()
+        self.assertEqual(plan.lines, 4)
+        # 我们走吧。 normal (file exists but the line has no name), both 再见。 files and 我们走吧。 slow
+        self.assertEqual((plan.normal, plan.slow), (2, 2))
+        self.assertEqual(plan.requests, 4)
+        self.assertEqual(plan.characters, 2 * len('我们走吧。') + 2 * len('再见。'))
+        # The second 再见。 line reuses the first one's audio
+        self.assertEqual((plan.duplicate_requests, plan.duplicate_characters), (2, 2 * len('再见。')))
+
+    def test_force_and_local_slow(self):
+        self.assertEqual((self.plan(force_normal=True).normal, self.plan(force_slow=True).slow), (3, 3))
+        plan = self.plan(local_slow=True)
+        self.assertEqual((plan.slow, plan.derived_slow), (0, 2))
+
+    def test_plan_synthesizes_nothing(self):
+        before = sorted(self.audio_dir.iterdir())
+        content = self.path.read_text(encoding='utf-8')
+        argv = ['tts.py', '-i', str(self.path), '-d', str(self.audio_dir), '--plan', '--max-rps', '2']
+        output = io.StringIO()
+        # The Google client would be needed to synthesize anything
+        with mock.patch.object(sys, 'argv', argv), mock.patch.dict(sys.modules, {'google': None}), \
+                redirect_stdout(output):
+            asyncio.run(main(parse_args()))
+
+        self.assertIn('Normal speed syntheses:      2', output.getvalue())
+        self.assertIn('Slow speed syntheses:        2', output.getvalue())
+        self.assertIn('Total API requests:          4', output.getvalue())
+        self.assertEqual(sorted(self.audio_dir.iterdir()), before)
+        self.assertEqual(self.path.read_text(encoding='utf-8'), content)
+        self.assertFalse(self.path.with_suffix('.bak.json').exists())
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestPostprocess(TtsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write_dialogues('dialogues.json', dialogue('One', ('A', '你好！')))
+        self.argv = ['tts.py', '-i', str(self.path), '-d', str(self.audio_dir),
+                     '--postprocess-dir', str(self.dir / 'processed')]
+
+    def test_missing_ffmpeg_fails_before_generation(self):
+        import audio_codec
+        with mock.patch.object(sys, 'argv', self.argv), \
+                mock.patch.object(audio_codec, 'FFMPEG', 'no-such-ffmpeg-binary'), \
+                redirect_stderr(io.StringIO()) as error, self.assertRaises(SystemExit):
+            parse_args()
+        self.assertIn('ffmpeg not found', error.getvalue())
+
+    def test_failed_postprocessing_is_a_failure_status(self):
+        import audio_codec
+        import audio_postprocess
+        generator = functools.partial(DialogueTTSGenerator, client=FakeTextToSpeechClient(),
+                                      texttospeech=fake_tts.texttospeech)
+        with mock.patch.object(sys, 'argv', self.argv), mock.patch.object(audio_codec, 'require_ffmpeg'), \
+                mock.patch.object(tts, 'DialogueTTSGenerator', generator), \
+                mock.patch.object(audio_postprocess, 'postprocess_directory',
+                                  return_value={'processed': 1, 'failed': 1}):
+            self.assertEqual(asyncio.run(main(parse_args())), 1)
+        # Generation itself went through
+        self.assertIn('a', json.loads(self.path.read_text(encoding='utf-8'))[0]['lines'][0])
+
+if __name__ == '__main__':
+    unittest.main()
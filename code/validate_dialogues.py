@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Any, Iterable, List, NamedTuple, Optional, Set
+
+from parse import DialogueLine, load_yaml_or_json
+from tts import SPEAKER_VOICES, get_file_hash
+
+LINE_FIELDS = set(DialogueLine._reverse_field_map)
+DIALOGUE_FIELDS = {'title', 'lines'}
+
+class ValidationIssue(NamedTuple):
+    """One problem found in a dialogue file; dialogue and line are 0-based indices"""
+    path: str
+    severity: str  # 'error' or 'warning'
+    message: str
+    dialogue: Optional[int] = None
+    line: Optional[int] = None
+
+    def __str__(self) -> str:
+        location = self.path
+        if self.dialogue is not None:
+            location += f": dialogue {self.dialogue}"
+        if self.line is not None:
+            location += f", line {self.line}"
+        return f"{location}: {self.severity}: {self.message}"
+
+class DialogueValidator:
+    """
+    Checks whole dialogue files in one pass and collects every problem instead
+    of stopping at the first one: structure and field types, speakers outside
+    the known set, repeated lines and titles, and audio references that are
+    missing from the audio store or don't match the line's current text.
+    """
+    def __init__(self, speakers: Optional[Iterable[str]] = None, audio_names: Optional[Set[str]] = None):
+        self.speakers = set(speakers) if speakers is not None else set(SPEAKER_VOICES)
+        # File names in the audio store; None skips the audio checks
+        self.audio_names = audio_names
+
+    def validate_file(self, path: str) -> List[ValidationIssue]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            return [ValidationIssue(path, 'error', f"Cannot read file: {e}")]
+        return self.validate_text(text, path)
+
+    def validate_text(self, text: str, path: str = '<string>') -> List[ValidationIssue]:
+        try:
+            content = load_yaml_or_json(text)
+        except Exception as e:
+            import yaml
+            if not isinstance(e, yaml.YAMLError):
+                raise
+            # The message includes the line and column of the syntax error
+            return [ValidationIssue(path, 'error', f"Syntax error: {e}")]
+
+        if content is None:
+            return []
+        if isinstance(content, dict):
+            return [ValidationIssue(path, 'error',
+                                    "Old title -> lines mapping format; convert it with convert_dialogues.py")]
+        if not isinstance(content, list):
+            return [ValidationIssue(path, 'error', f"Expected list of dialogues, got {type(content).__name__}")]
+        return self.validate_dialogues(content, path)
+
+    def validate_dialogues(self, content: List[Any], path: str = '<string>') -> List[ValidationIssue]:
+        issues = []
+        titles = {}
+        for i, dialogue in enumerate(content):
+            if not isinstance(dialogue, dict):
+                issues.append(ValidationIssue(path, 'error', f"Expected dict, got {type(dialogue).__name__}", i))
+                continue
+            for key in dialogue.keys() - DIALOGUE_FIELDS:
+                issues.append(ValidationIssue(path, 'warning', f"Unknown field '{key}'", i))
+
+            title = dialogue.get('title')
+            if title is not None and not isinstance(title, str):
+                issues.append(ValidationIssue(path, 'error', f"Title must be a string, got {type(title).__name__}", i))
+            elif title in titles:
+                issues.append(ValidationIssue(path, 'warning', f"Same title as dialogue {titles[title]}", i))
+            elif title is not None:
+                titles[title] = i
+
+            lines = dialogue.get('lines')
+            if lines is None:
+                issues.append(ValidationIssue(path, 'error', "Missing required field: 'lines'", i))
+                continue
+            if not isinstance(lines, list):
+                issues.append(ValidationIssue(path, 'error',
+                                              f"Expected list of dialogue lines, got {type(lines).__name__}", i))
+                continue
+            if not lines:
+                issues.append(ValidationIssue(path, 'warning', "Dialogue has no lines", i))
+
+            seen_lines = {}
+            for j, line in enumerate(lines):
+                issues.extend(self.validate_line(line, path, i, j, seen_lines))
+        return issues
+
+    def validate_line(self, line: Any, path: str, i: int, j: int, seen_lines: dict) -> List[ValidationIssue]:
+        def issue(severity: str, message: str) -> None:
+            issues.append(ValidationIssue(path, severity, message, i, j))
+
+        issues = []
+        if not isinstance(line, dict):
+            issue('error', f"Expected dict, got {type(line).__name__}")
+            return issues
+
+        for key, value in line.items():
+            if key not in LINE_FIELDS:
+                issue('warning', f"Unknown field '{key}'")
+            elif not isinstance(value, str):
+                issue('error', f"Field '{key}' must be a string, got {type(value).__name__}")
+
+        chinese, speaker = line.get('c'), line.get('s')
+        if chinese is None:
+            issue('error', "Missing required field: chinese text ('c')")
+        elif isinstance(chinese, str) and not chinese.strip():
+            issue('error', "Empty chinese text ('c')")
+        if speaker is None:
+            issue('warning', "No speaker ('s'); no audio will be generated for this line")
+        elif isinstance(speaker, str) and speaker not in self.speakers:
+            issue('error', f"Unknown speaker '{speaker}' (expected one of {', '.join(sorted(self.speakers))})")
+
+        if isinstance(chinese, str) and isinstance(speaker, str):
+            if (speaker, chinese) in seen_lines:
+                issue('warning', f"Same speaker and text as line {seen_lines[speaker, chinese]}")
+            else:
+                seen_lines[speaker, chinese] = j
+            if self.audio_names is not None:
+                self.check_audio(line, get_file_hash(chinese, speaker), issue)
+        return issues
+
+    def check_audio(self, line: dict, file_hash: str, issue) -> None:
+        for key, expected in (('a', f"{file_hash}.mp3"), ('as', f"{file_hash}_slow.mp3")):
+            name = line.get(key)
+            if not isinstance(name, str):
+                continue
+            if name != expected:
+                issue('error', f"Audio '{key}' is {name} but the line's text and speaker give {expected}; "
+                               f"regenerate it with tts.py")
+            elif name not in self.audio_names:
+                issue('error', f"Audio '{key}' file {name} is missing from the audio store")
+
+def list_audio_names(audio_dir: Path) -> Set[str]:
+    """All file names in the audio store, from a single directory listing"""
+    return {entry.name for entry in os.scandir(audio_dir)}
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check dialogue files and report every problem at once: structure, field types, speakers, '
+                    'repeated lines and audio references')
+    parser.add_argument('files', nargs='+',
+                        help='YAML/JSON dialogue files to check')
+    parser.add_argument('--audio-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            '..', 'output'),
+                        help="Directory referenced by 'a'/'as' fields (default: ../output)")
+    parser.add_argument('--no-audio', action='store_true',
+                        help="Don't check audio references")
+    parser.add_argument('--speakers', default=','.join(SPEAKER_VOICES),
+                        help=f"Comma-separated allowed speakers (default: {','.join(SPEAKER_VOICES)})")
+    parser.add_argument('--strict', action='store_true',
+                        help='Exit with an error status on warnings too')
+    args = parser.parse_args()
+
+    audio_names = None
+    if not args.no_audio:
+        try:
+            audio_names = list_audio_names(Path(args.audio_dir))
+        except FileNotFoundError:
+            print(f"Audio directory not found: {args.audio_dir} (use --no-audio to skip audio checks)",
+                  file=sys.stderr)
+            sys.exit(1)
+
+    validator = DialogueValidator(args.speakers.split(','), audio_names)
+    errors = warnings = 0
+    for path in args.files:
+        for issue in validator.validate_file(path):
+            print(issue)
+            if issue.severity == 'error':
+                errors += 1
+            else:
+                warnings += 1
+
+    print(f"{len(args.files)} files checked: {errors} errors, {warnings} warnings", file=sys.stderr)
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
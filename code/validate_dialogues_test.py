@@ -0,0 +1,56 @@
+import unittest
+from tts import get_file_hash
+from validate_dialogues import DialogueValidator
+
+class TestDialogueValidator(unittest.TestCase):
+    def setUp(self):
+        self.hash = get_file_hash("你好！", "A")
+        self.validator = DialogueValidator(audio_names={f"{self.hash}.mp3"})
+
+    def messages(self, text: str):
+        return [(issue.severity, issue.dialogue, issue.line, issue.message)
+                for issue in self.validator.validate_text(text, 'd.json')]
+
+    def test_valid_file(self):
+        text = f'[{{"title": "T", "lines": [{{"s": "A", "c": "你好！", "a": "{self.hash}.mp3"}}]}}]'
+        self.assertEqual(self.messages(text), [])
+
+    def test_collects_all_errors_with_locations(self):
+        text = """
+- title: First
+  lines:
+    - {s: A, c: 你好！}
+    - {s: E, c: 再见。}
+    - {s: A, c: 你好！}
+- title: First
+  lines:
+    - {s: B}
+    - {s: A, c: 谢谢, x: 1}
+- lines: not a list
+"""
+        issues = self.messages(text)
+        self.assertIn(('error', 0, 1, "Unknown speaker 'E' (expected one of A, B, C, D)"), issues)
+        self.assertIn(('warning', 0, 2, "Same speaker and text as line 0"), issues)
+        self.assertIn(('warning', 1, None, "Same title as dialogue 0"), issues)
+        self.assertIn(('error', 1, 0, "Missing required field: chinese text ('c')"), issues)
+        self.assertIn(('warning', 1, 1, "Unknown field 'x'"), issues)
+        self.assertIn(('error', 2, None, "Expected list of dialogue lines, got str"), issues)
+
+    def test_audio_references(self):
+        other = get_file_hash("再见", "B")
+        text = f'''[{{"lines": [
+            {{"s": "A", "c": "你好！", "a": "{self.hash}.mp3", "as": "{self.hash}_slow.mp3"}},
+            {{"s": "A", "c": "再见", "a": "{other}.mp3"}}
+        ]}}]'''
+        severities, messages = zip(*[(s, m) for s, _, _, m in self.messages(text)])
+        self.assertEqual(severities, ('error', 'error'))
+        self.assertIn("missing from the audio store", messages[0])
+        self.assertIn("regenerate it", messages[1])
+
+    def test_file_level_errors(self):
+        self.assertIn("Old title -> lines mapping format", self.messages("T:\n  - {s: A, c: 你好}\n")[0][3])
+        self.assertIn("Syntax error", self.messages("- [unclosed\n")[0][3])
+        self.assertEqual(self.messages(""), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+from parse import Dialogue, DialogueParseError
+from session import get_session
+from trie import Trie
+from text_utils import segment_text_with_trie
+from find_unknown_words import get_default_vocabulary_path
+
+NGRAM_NAMES = {1: 'words', 2: 'bigrams', 3: 'trigrams'}
+
+class CorpusStats:
+    """
+    Running word and n-gram counts over a stream of dialogues.
+
+    Term frequency counts every occurrence; document frequency counts the
+    number of dialogues an n-gram appears in at least once. N-grams never
+    cross line boundaries.
+    """
+    def __init__(self, word_trie: Trie, max_n: int = 3):
+        if max_n < 1:
+            raise ValueError("max_n must be at least 1")
+        self.word_trie = word_trie
+        self.max_n = max_n
+        self.dialogue_count = 0
+        self.term_freq: List[Counter] = [Counter() for _ in range(max_n)]
+        self.doc_freq: List[Counter] = [Counter() for _ in range(max_n)]
+
+    def add_dialogue(self, dialogue: Dialogue) -> None:
+        """Count all n-grams of a single dialogue."""
+        seen = [set() for _ in range(self.max_n)]
+        for line in dialogue.lines:
+            tokens = segment_text_with_trie(line.chinese, self.word_trie)
+            for n in range(1, self.max_n + 1):
+                grams = [tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+                self.term_freq[n - 1].update(grams)
+                seen[n - 1].update(grams)
+        for n, grams in enumerate(seen):
+            self.doc_freq[n].update(grams)
+        self.dialogue_count += 1
+
+    def most_common(self, n: int, limit: Optional[int] = None) -> List[Tuple[Tuple[str, ...], int, int]]:
+        """Return (ngram, term frequency, document frequency) sorted by frequency, then ngram."""
+        counts = self.term_freq[n - 1]
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(gram, tf, self.doc_freq[n - 1][gram]) for gram, tf in ranked]
+
+def iter_dialogues(paths: Iterable[str]) -> Iterator[Dialogue]:
+    """Yield dialogues from each file in turn."""
+    for path in paths:
+        yield from get_session().dialogue_file(path)
+
+def write_report(stats: CorpusStats, output: TextIO, top: Optional[int] = None) -> None:
+    """Write word and n-gram counts as tab-separated sections."""
+    output.write(f"# dialogues 1-{stats.dialogue_count}\n")
+    for n in range(1, stats.max_n + 1):
+        output.write(f"## {NGRAM_NAMES.get(n, f'{n}-grams')}\n")
+        # The unigram section is always complete, like the plain frankstats dumps
+        limit = None if n == 1 else top
+        for gram, tf, df in stats.most_common(n, limit):
+            output.write(f"{' '.join(gram)}\t{tf}\t{df}\n")
+
+def parse_checkpoints(text: str) -> List[int]:
+    """Parse a comma-separated list of positive, increasing dialogue counts."""
+    try:
+        checkpoints = [int(part) for part in text.split(',') if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid checkpoint list: {text}")
+    if any(c <= 0 for c in checkpoints):
+        raise argparse.ArgumentTypeError("Checkpoints must be positive")
+    if checkpoints != sorted(set(checkpoints)):
+        raise argparse.ArgumentTypeError("Checkpoints must be strictly increasing")
+    return checkpoints
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compute word frequency, document frequency and n-gram counts over dialogue files')
+    parser.add_argument('dialogues', nargs='+',
+                        help='YAML/JSON files containing dialogues, read in the given order')
+    parser.add_argument('--vocabulary',
+                        help='File containing vocabulary for word segmentation (default: ../words/10K.txt)')
+    parser.add_argument('--checkpoints', type=parse_checkpoints,
+                        help='Comma-separated dialogue counts to write cumulative reports at, '
+                             'e.g. 10,20,30 (default: one report over all dialogues)')
+    parser.add_argument('-n', '--max-n', type=int, default=3,
+                        help='Longest n-gram to count (default: 3)')
+    parser.add_argument('--top', type=int, default=100,
+                        help='Number of bigrams/trigrams to list per report (default: 100)')
+    parser.add_argument('-o', '--output-dir',
+                        help='Write one report per checkpoint into this directory (default: stdout)')
+    parser.add_argument('--prefix', default='stats',
+                        help='File name prefix for reports in --output-dir (default: stats)')
+    args = parser.parse_args()
+
+    if args.max_n < 1:
+        print("Error: --max-n must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if args.vocabulary is None:
+        args.vocabulary = get_default_vocabulary_path()
+
+    try:
+        word_trie = get_session().trie(args.vocabulary)
+    except Exception as e:
+        print(f"Error processing vocabulary file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir) if args.output_dir else None
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    def emit(stats: CorpusStats) -> None:
+        if output_dir:
+            path = output_dir / f"{args.prefix}-{stats.dialogue_count}.tsv"
+            with open(path, 'w', encoding='utf-8') as f:
+                write_report(stats, f, args.top)
+            print(f"Wrote {path}", file=sys.stderr)
+        else:
+            write_report(stats, sys.stdout, args.top)
+            print()
+
+    stats = CorpusStats(word_trie, args.max_n)
+    pending = list(args.checkpoints or [])
+    try:
+        for dialogue in iter_dialogues(args.dialogues):
+            stats.add_dialogue(dialogue)
+            if pending and stats.dialogue_count == pending[0]:
+                emit(stats)
+                pending.pop(0)
+    except FileNotFoundError as e:
+        print(f"Dialogue file not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    except DialogueParseError as e:
+        print(f"Error parsing dialogues: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if pending:
+        print(f"Warning: only {stats.dialogue_count} dialogues available, "
+              f"skipping checkpoints {', '.join(map(str, pending))}", file=sys.stderr)
+    if not args.checkpoints or pending:
+        emit(stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import unittest
+from io import StringIO
+from parse import Dialogue, DialogueLine
+from trie import build_trie_from_words
+from word_stats import CorpusStats, write_report
+
+class TestCorpusStats(unittest.TestCase):
+    def setUp(self):
+        self.trie = build_trie_from_words(["你好", "我们", "老师"])
+        self.dialogues = [
+            Dialogue(lines=[
+                DialogueLine(chinese="你好，老师！", speaker="A"),
+                DialogueLine(chinese="你好！", speaker="B"),
+            ]),
+            Dialogue(lines=[
+                DialogueLine(chinese="我们好", speaker="A"),
+            ]),
+        ]
+
+    def test_term_and_document_frequency(self):
+        stats = CorpusStats(self.trie)
+        for dialogue in self.dialogues:
+            stats.add_dialogue(dialogue)
+
+        self.assertEqual(stats.dialogue_count, 2)
+        self.assertEqual(stats.term_freq[0][("你好",)], 2)
+        self.assertEqual(stats.doc_freq[0][("你好",)], 1)
+        self.assertEqual(stats.term_freq[0][("好",)], 1)
+        self.assertEqual(stats.term_freq[1][("你好", "老师")], 1)
+        self.assertEqual(stats.term_freq[1][("老师", "你好")], 0)
+
+    def test_most_common_order(self):
+        stats = CorpusStats(self.trie, max_n=1)
+        for dialogue in self.dialogues:
+            stats.add_dialogue(dialogue)
+
+        ranked = stats.most_common(1)
+        self.assertEqual(ranked[0], (("你好",), 2, 1))
+        self.assertEqual([gram for gram, _, _ in ranked[1:]], [("好",), ("我们",), ("老师",)])
+
+    def test_cumulative_reports(self):
+        stats = CorpusStats(self.trie, max_n=2)
+        reports = []
+        for dialogue in self.dialogues:
+            stats.add_dialogue(dialogue)
+            output = StringIO()
+            write_report(stats, output)
+            reports.append(output.getvalue())
+
+        self.assertTrue(reports[0].startswith("# dialogues 1-1\n"))
+        self.assertNotIn("我们", reports[0])
+        self.assertTrue(reports[1].startswith("# dialogues 1-2\n"))
+        self.assertIn("我们\t1\t1\n", reports[1])
+        self.assertIn("## bigrams\n你好 老师\t1\t1\n", reports[1])
+
+if __name__ == '__main__':
+    unittest.main()